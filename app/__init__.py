@@ -1,4 +1,5 @@
 import logging
+import threading
 from flask import Flask
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
@@ -6,12 +7,31 @@ from flask_login import LoginManager
 from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 from app.core.config import Config
-from app.core.extensions import db, login_manager, jwt, migrate, cors, init_extensions, scheduler, mail
+from app.core.extensions import db, login_manager, jwt, migrate, cors, init_extensions, scheduler, mail, expiry_index, notification_broker, alert_scheduler, job_registry, scheduler_leader
 from app.core.errors import register_error_handlers
 from app.core.middleware import log_request, handle_cors, validate_request
+from app.commands import register_commands
 from app.routes import main_bp, auth_bp
 from app.api.v1 import api_bp
+from app.services.inventory_service import InventoryService
+from app.services.ocr_service import OCRService
 from app.tasks.cleanup import cleanup_expired_items
+from app.tasks.archive_notifications import archive_notifications
+from app.tasks.prune_email_outbox import prune_email_outbox
+from app.tasks.purge_items import purge_deleted_items
+from app.tasks.expiry_alerts import send_due_alerts
+from app.tasks.expiry_check import check_expiry_dates
+from app.tasks.notification_deliveries import send_queued_deliveries
+
+_scheduler_lock = threading.Lock()
+
+def start_scheduler():
+    """Start the background scheduler in this process, once."""
+    if scheduler.running:
+        return
+    with _scheduler_lock:
+        if not scheduler.running:
+            scheduler.start()
 
 def create_app(config_class=Config):
     """Create and configure the Flask application."""
@@ -27,18 +47,67 @@ def create_app(config_class=Config):
     migrate.init_app(app, db)
     scheduler.init_app(app)
     mail.init_app(app)
+    expiry_index.init_app(app)
+    notification_broker.init_app(app)
+    alert_scheduler.init_app(app)
+    job_registry.init_app(app)
+    scheduler_leader.init_app(app)
+    
+    # Scheduled jobs; every run is recorded in job_runs
+    overrun_seconds = app.config.get('JOB_OVERRUN_SECONDS', 3600)
+    
+    # Cleanup expired items hourly; once caught up each run is a single query
+    job_registry.register('cleanup_expired_items', cleanup_expired_items, 'cron',
+                          max_seconds=overrun_seconds, backfill=True, minute=0)
+    
+    # Refresh item statuses once the day has rolled over
+    job_registry.register('refresh_item_statuses', InventoryService().refresh_statuses, 'cron',
+                          max_seconds=overrun_seconds, hour=0, minute=5)
+    
+    # Create expiry notifications and queue digests for every user
+    job_registry.register('check_expiry_dates', check_expiry_dates, 'cron',
+                          max_seconds=overrun_seconds,
+                          hour=app.config.get('EXPIRY_CHECK_HOUR', 0),
+                          minute=app.config.get('EXPIRY_CHECK_MINUTE', 30))
+    
+    # Send urgent SMS queued by the expiry runs
+    delivery_interval = app.config.get('NOTIFICATION_DELIVERY_INTERVAL_SECONDS', 30)
+    job_registry.register('send_queued_deliveries', send_queued_deliveries, 'interval',
+                          max_seconds=delivery_interval, seconds=delivery_interval)
     
-    # Schedule cleanup task to run daily at midnight
-    scheduler.add_job(
-        id='cleanup_expired_items',
-        func=cleanup_expired_items,
-        trigger='cron',
-        hour=0,
-        minute=0
-    )
+    # Move read and old notifications to the archive daily
+    job_registry.register('archive_notifications', archive_notifications, 'cron',
+                          max_seconds=overrun_seconds, hour=1, minute=0)
     
-    # Start the scheduler
-    scheduler.start()
+    # Delete sent outbox emails past their retention daily
+    job_registry.register('prune_email_outbox', prune_email_outbox, 'cron',
+                          max_seconds=overrun_seconds, hour=1, minute=15)
+    
+    # Move soft-deleted items to the archive off-peak, in small throttled chunks
+    job_registry.register('purge_deleted_items', purge_deleted_items, 'cron',
+                          max_seconds=overrun_seconds, hour=3, minute=15)
+    
+    # Drop old job history
+    job_registry.register('prune_job_runs', job_registry.prune, 'cron', hour=1, minute=30)
+    
+    # Fire expiry alerts from the in-process alert heap as they come due
+    if alert_scheduler.enabled:
+        interval = app.config.get('ALERT_SCHEDULER_INTERVAL_SECONDS', 60)
+        job_registry.register('send_due_alerts', send_due_alerts, 'interval',
+                              max_seconds=interval, seconds=interval)
+    
+    job_registry.schedule(scheduler)
+    # Every scheduler process keeps a heartbeat; only the lease holder runs the jobs above
+    scheduler_leader.schedule(scheduler)
+    # Close out runs left "running" by a leader that went away
+    scheduler_leader.on_elected(job_registry.fail_abandoned_runs)
+    
+    # Start the scheduler with the first request, so only processes serving
+    # requests (each forked worker on its own) run it; CLI commands and tests
+    # build the app without joining the leader election. `flask jobs worker`
+    # runs it in a dedicated process instead.
+    if app.config.get('SCHEDULER_AUTOSTART', True) and not app.testing:
+        app.before_request(start_scheduler)
     
     # Register error handlers
     register_error_handlers(app)
@@ -53,8 +122,15 @@ def create_app(config_class=Config):
     app.register_blueprint(auth_bp, url_prefix='/auth')
     app.register_blueprint(api_bp, url_prefix='/api/v1')
     
+    # Register CLI commands
+    register_commands(app)
+    
     # Create database tables
     with app.app_context():
         db.create_all()
     
+    # Load the OCR model now so workers forked from this process share it
+    if app.config.get('OCR_PRELOAD'):
+        OCRService.preload()
+    
     return app 
\ No newline at end of file
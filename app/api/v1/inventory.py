@@ -1,11 +1,16 @@
+from datetime import datetime
 from flask import jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.api.v1 import api_bp
-from app.core.extensions import db
-from app.models.item import Item
+from app.core.extensions import db, expiry_index
+from app.models.item import Item, EXPIRING_SOON_DAYS
 from app.models.user import User
 from app.services.zoho_service import ZohoService
 from app.services.notification_service import NotificationService
+from app.services.inventory_service import InventoryService
+
+# Upper bound for the number of upcoming items returned by the summary
+MAX_SUMMARY_UPCOMING = 50
 
 @api_bp.route('/inventory', methods=['GET'])
 @jwt_required()
@@ -55,15 +60,22 @@ def update_item(item_id):
     
     data = request.get_json()
     
+    # Validate the expiry date before changing anything
+    if 'expiry_date' in data:
+        try:
+            expiry_date = datetime.strptime(data['expiry_date'], '%Y-%m-%d').date() if data['expiry_date'] else None
+        except (TypeError, ValueError):
+            return jsonify({'error': 'expiry_date must be a date in YYYY-MM-DD format'}), 400
+    
     try:
         # Update fields if provided
-        for field in ['name', 'quantity', 'unit', 'expiry_date', 'location', 'notes']:
+        for field in ['name', 'quantity', 'unit', 'location', 'notes']:
             if field in data:
                 setattr(item, field, data[field])
         
         # Handle expiry date
         if 'expiry_date' in data:
-            item.expiry_date = data['expiry_date']
+            item.expiry_date = expiry_date
         
         # Handle discount
         if 'discount_percentage' in data:
@@ -71,9 +83,8 @@ def update_item(item_id):
         
         item.save()
         
-        # Check for notifications
-        notification_service = NotificationService()
-        notification_service.check_expiry_dates()
+        # Notify about this item only if it now falls on an alert day
+        NotificationService().check_item(item)
         
         return jsonify(item.to_dict())
         
@@ -101,17 +112,53 @@ def delete_item(item_id):
 @api_bp.route('/inventory/expiring', methods=['GET'])
 @jwt_required()
 def get_expiring_items():
-    """Get items that are expiring soon."""
+    """Get items that are expiring soon.
+    
+    Query params:
+        horizon_days: Size of the expiry window in days (default 30)
+    """
     user_id = get_jwt_identity()
-    items = Item.query.filter_by(user_id=user_id).all()
-    expiring_items = [item for item in items if item.is_near_expiry]
-    return jsonify([item.to_dict() for item in expiring_items])
+    horizon_days = request.args.get('horizon_days', default=EXPIRING_SOON_DAYS, type=int)
+    if horizon_days < 0:
+        return jsonify({'error': 'horizon_days must be a non-negative integer'}), 400
+    
+    if expiry_index.enabled:
+        items = _items_by_id(user_id, expiry_index.expiring_item_ids(user_id, horizon_days))
+    else:
+        items = Item.expiring_query(user_id, horizon_days).all()
+    return jsonify([item.to_dict() for item in items])
 
 @api_bp.route('/inventory/expired', methods=['GET'])
 @jwt_required()
 def get_expired_items():
     """Get expired items."""
     user_id = get_jwt_identity()
-    items = Item.query.filter_by(user_id=user_id).all()
-    expired_items = [item for item in items if item.is_expired]
-    return jsonify([item.to_dict() for item in expired_items]) 
\ No newline at end of file
+    if expiry_index.enabled:
+        items = _items_by_id(user_id, expiry_index.expired_item_ids(user_id))
+    else:
+        items = Item.expired_query(user_id).all()
+    return jsonify([item.to_dict() for item in items])
+
+def _items_by_id(user_id, item_ids):
+    """Load a user's items by primary key, preserving the order of ``item_ids``."""
+    if not item_ids:
+        return []
+    items = {item.id: item for item in Item.query.filter(Item.user_id == user_id, Item.id.in_(item_ids))}
+    return [items[item_id] for item_id in item_ids if item_id in items]
+
+@api_bp.route('/inventory/summary', methods=['GET'])
+@jwt_required()
+def get_inventory_summary():
+    """Get counts, quantity and stock value per status plus the soonest-expiring items.
+    
+    Query params:
+        limit: Number of soonest-expiring items to include (default 5, max 50)
+    """
+    user_id = get_jwt_identity()
+    limit = request.args.get('limit', default=5, type=int)
+    if limit < 0:
+        return jsonify({'error': 'limit must be a non-negative integer'}), 400
+    
+    summary = InventoryService().get_summary(user_id, min(limit, MAX_SUMMARY_UPCOMING))
+    summary['upcoming'] = [item.to_dict() for item in summary['upcoming']]
+    return jsonify(summary)
\ No newline at end of file
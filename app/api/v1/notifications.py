@@ -1,20 +1,98 @@
-from flask import jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from datetime import timedelta
+from flask import Response, current_app, jsonify, request, stream_with_context
+from flask_jwt_extended import create_access_token, get_jwt, get_jwt_identity, get_jwt_request_location, jwt_required
 from app.api.v1 import api_bp
-from app.core.extensions import db
-from app.models.notification import Notification
+from app.core.extensions import db, jwt
+from app.core.middleware import require_admin
+from app.models.notification import Notification, STATUS_UNREAD
 from app.models.user import User
+from app.services.digest_schedule import DigestSchedule
+from app.services.email_outbox_service import EmailOutboxService
 from app.services.notification_service import NotificationService
 
+# Largest page of notifications returned at once
+MAX_NOTIFICATIONS_PAGE = 100
+
+# Scope claim of the short-lived tokens that may only open the notification stream
+STREAM_TOKEN_SCOPE = 'notifications_stream'
+
+@jwt.token_verification_loader
+def verify_token_scope(jwt_header, jwt_data):
+    """Refuse stream tokens, which travel in URLs, everywhere but the stream."""
+    return jwt_data.get('scope') is None or request.endpoint == 'api.stream_notifications'
+
 @api_bp.route('/notifications', methods=['GET'])
 @jwt_required()
 def get_notifications():
-    """Get user's notifications."""
+    """Get user's notifications, newest first.
+    
+    Pass the ``X-Next-Cursor`` response header back as ``cursor`` to get the
+    next page; the header is absent on the last page.
+    """
     user_id = get_jwt_identity()
     limit = request.args.get('limit', default=10, type=int)
+    if limit < 1:
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+    limit = min(limit, MAX_NOTIFICATIONS_PAGE)
+    cursor = request.args.get('cursor')
+    
     notification_service = NotificationService()
-    notifications = notification_service.get_user_notifications(user_id, limit)
-    return jsonify([notification.to_dict() for notification in notifications])
+    try:
+        notifications = notification_service.get_user_notifications(user_id, limit, cursor=cursor)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    response = jsonify([notification.to_dict() for notification in notifications])
+    if len(notifications) == limit:
+        response.headers['X-Next-Cursor'] = notification_service.notification_cursor(notifications[-1])
+    return response
+
+@api_bp.route('/notifications/unread-count', methods=['GET'])
+@jwt_required()
+def get_unread_count():
+    """Get the number of unread notifications."""
+    user_id = get_jwt_identity()
+    return jsonify({'unread': NotificationService().get_unread_count(user_id)})
+
+@api_bp.route('/notifications/outbox-metrics', methods=['GET'])
+@require_admin
+def get_outbox_metrics():
+    """Get email outbox queue depth and lag (admin only)."""
+    return jsonify(EmailOutboxService().metrics())
+
+@api_bp.route('/notifications/stream-token', methods=['POST'])
+@jwt_required()
+def create_stream_token():
+    """Issue a short-lived token that can only open the notification stream.
+    
+    It is checked when the stream opens, so clients fetch a fresh one
+    whenever they reconnect.
+    """
+    seconds = current_app.config.get('NOTIFICATION_STREAM_TOKEN_SECONDS', 60)
+    token = create_access_token(identity=get_jwt_identity(), expires_delta=timedelta(seconds=seconds),
+                                additional_claims={'scope': STREAM_TOKEN_SCOPE})
+    return jsonify({'token': token, 'expires_in': seconds})
+
+@api_bp.route('/notifications/stream', methods=['GET'])
+@jwt_required(locations=['headers', 'query_string'])
+def stream_notifications():
+    """Stream new notifications and unread counts as Server-Sent Events.
+    
+    ``EventSource`` cannot set headers, so it passes a token from
+    ``POST /notifications/stream-token`` as the ``jwt`` query parameter.
+    Query strings end up in access logs and browser history, so regular
+    access tokens are only accepted in the ``Authorization`` header.
+    """
+    if get_jwt_request_location() == 'query_string' and get_jwt().get('scope') != STREAM_TOKEN_SCOPE:
+        return jsonify({'error': 'Use a stream token from /notifications/stream-token in the query string'}), 401
+    user_id = get_jwt_identity()
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    events = NotificationService().stream_events(user_id, last_event_id)
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 @api_bp.route('/notifications/<int:notification_id>', methods=['PUT'])
 @jwt_required()
@@ -36,8 +114,8 @@ def mark_all_notifications_read():
     try:
         Notification.query.filter_by(
             user_id=user_id,
-            status='pending'
-        ).update({'status': 'read'})
+            status=STATUS_UNREAD
+        ).update({'status': 'read', 'is_read': True})
         db.session.commit()
         return jsonify({'message': 'All notifications marked as read'})
     except Exception as e:
@@ -57,7 +135,9 @@ def get_notification_preferences():
     return jsonify({
         'email_notifications': user.email_notifications,
         'sms_notifications': user.sms_notifications,
-        'in_app_notifications': user.in_app_notifications
+        'in_app_notifications': user.in_app_notifications,
+        'timezone': user.timezone,
+        'phone_number': user.phone_number
     })
 
 @api_bp.route('/notifications/preferences', methods=['PUT'])
@@ -71,6 +151,8 @@ def update_notification_preferences():
         return jsonify({'error': 'User not found'}), 404
     
     data = request.get_json()
+    if data.get('timezone') and not DigestSchedule.is_valid_timezone(data['timezone']):
+        return jsonify({'error': 'Unknown timezone'}), 400
     
     try:
         if 'email_notifications' in data:
@@ -79,6 +161,10 @@ def update_notification_preferences():
             user.sms_notifications = data['sms_notifications']
         if 'in_app_notifications' in data:
             user.in_app_notifications = data['in_app_notifications']
+        if 'timezone' in data:
+            user.timezone = data['timezone'] or None
+        if 'phone_number' in data:
+            user.phone_number = data['phone_number'] or None
         
         user.save()
         return jsonify({'message': 'Notification preferences updated'})
@@ -2,6 +2,7 @@ from flask import jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from werkzeug.utils import secure_filename
 import os
+from datetime import datetime
 from app.api.v1 import api_bp
 from app.core.extensions import db
 from app.core.config import Config
@@ -96,7 +97,7 @@ def update_item_expiry_from_image(item_id):
         os.remove(filepath)
         
         if result and result.get('expiry_date'):
-            item.expiry_date = result['expiry_date']
+            item.expiry_date = datetime.fromisoformat(result['expiry_date']).date()
             item.save()
             return jsonify({
                 'message': 'Item expiry date updated successfully',
@@ -0,0 +1,132 @@
+import time
+from datetime import timedelta
+import click
+from flask import current_app
+
+def register_commands(app):
+    """Register the application's CLI commands."""
+    
+    @app.cli.command('send-emails')
+    @click.option('--once', is_flag=True, help='Send everything that is due, then exit.')
+    @click.option('--interval', default=10, show_default=True,
+                  help='Seconds to wait when the outbox has nothing due.')
+    def send_emails(once, interval):
+        """Deliver queued emails from the outbox."""
+        from app.services.email_outbox_service import EmailOutboxService
+        
+        service = EmailOutboxService()
+        while True:
+            try:
+                totals = service.run()
+            except Exception as e:
+                current_app.logger.error(f"Error sending outbox emails: {str(e)}")
+                from app.core.extensions import db
+                db.session.rollback()
+                totals = None
+            
+            if once:
+                if totals is not None:
+                    click.echo(f"{totals['sent']} sent, {totals['retry']} to retry, {totals['failed']} failed")
+                break
+            time.sleep(interval)
+    
+    @app.cli.command('notify')
+    @click.option('--processes', type=int, default=None,
+                  help='Worker processes for a local run (default: CPU count).')
+    @click.option('--shard-count', type=int, default=None,
+                  help='Total number of shards (default: number of processes).')
+    @click.option('--shard-index', type=int, default=None,
+                  help='Run only this shard, e.g. one per machine.')
+    def notify(processes, shard_count, shard_index):
+        """Run the expiry notification check, sharded by user."""
+        if shard_index is not None:
+            if not shard_count or not 0 <= shard_index < shard_count:
+                raise click.BadParameter('--shard-index needs --shard-count greater than it')
+            from app.services.notification_service import NotificationService
+            stats = NotificationService().run_shard(shard_index, shard_count)
+            click.echo(f"Shard {shard_index}/{shard_count}: {stats['notifications']} notifications, "
+                       f"{stats['emails_queued']} emails queued in {stats['seconds']}s")
+            return
+        
+        from app.services.notification_runner import NotificationRunner
+        summary = NotificationRunner().run(shard_count=shard_count, processes=processes)
+        click.echo(f"{summary['notifications']} notifications, {summary['emails_queued']} emails queued "
+                   f"over {len(summary['shards'])} shards in {summary['seconds']}s")
+    
+    @app.cli.group('jobs')
+    def jobs():
+        """Inspect and run scheduled background jobs."""
+    
+    @jobs.command('list')
+    @click.option('--last', default=50, show_default=True, help='Runs per job the figures cover.')
+    def list_jobs(last):
+        """Show each job's schedule and recent latency."""
+        from app.core.extensions import job_registry
+        from app.models.job_watermark import JobWatermark
+        for job in job_registry.jobs.values():
+            stats = job_registry.stats(job.id, last=last)
+            schedule = ' '.join(f'{key}={value}' for key, value in job.trigger_args.items())
+            click.echo(f"{job.id} [{job.trigger} {schedule}]")
+            watermark = JobWatermark.get(job.id)
+            if watermark:
+                click.echo(f"  processed through {watermark}")
+            if not stats['runs']:
+                click.echo("  no runs yet")
+                continue
+            click.echo(f"  last {stats['last_status']} at {stats['last_started_at']}; "
+                       f"{stats['runs']} runs, {stats['failed']} failed, {stats['overruns']} overran; "
+                       f"avg {stats['avg_seconds']}s, p95 {stats['p95_seconds']}s, max {stats['max_seconds']}s")
+    
+    @jobs.command('run')
+    @click.argument('job_id')
+    def run_job(job_id):
+        """Run a job now."""
+        from app.core.extensions import job_registry
+        if job_id not in job_registry.jobs:
+            raise click.BadParameter(f'unknown job {job_id}', param_hint='JOB_ID')
+        _echo_run(job_registry.run(job_id, trigger='manual'))
+    
+    @jobs.command('backfill')
+    @click.argument('job_id')
+    @click.option('--start', 'start', type=click.DateTime(formats=['%Y-%m-%d']), required=True,
+                  help='First day to process.')
+    @click.option('--end', 'end', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+                  help='Last day to process (default: same as --start).')
+    def backfill_job(job_id, start, end):
+        """Run a job once for each day in a range."""
+        from app.core.extensions import job_registry
+        job = job_registry.jobs.get(job_id)
+        if job is None or not job.backfill:
+            raise click.BadParameter(f'{job_id} is not a job that can be backfilled', param_hint='JOB_ID')
+        day, last = start.date(), (end or start).date()
+        while day <= last:
+            _echo_run(job_registry.run(job_id, trigger='backfill', day=day))
+            day += timedelta(days=1)
+    
+    @jobs.command('worker')
+    def job_worker():
+        """Run the scheduler in this process until interrupted."""
+        from app import start_scheduler
+        from app.core.extensions import scheduler
+        start_scheduler()
+        click.echo('Scheduler running; press Ctrl+C to stop.')
+        try:
+            while True:
+                time.sleep(60)
+        except KeyboardInterrupt:
+            scheduler.shutdown()
+    
+    @jobs.command('history')
+    @click.argument('job_id')
+    @click.option('--limit', default=20, show_default=True)
+    def job_history(job_id, limit):
+        """Show a job's most recent runs."""
+        from app.core.extensions import job_registry
+        for run in job_registry.history(job_id, limit=limit):
+            _echo_run(run)
+
+def _echo_run(run):
+    day = f" for {run['run_for']}" if run['run_for'] else ''
+    click.echo(f"{run['started_at']} {run['job_id']}{day} ({run['trigger']}): {run['status']} "
+               f"in {run['duration_seconds']}s, {run['rows_processed']} rows"
+               + (f" - {run['error']}" if run['error'] else ''))
@@ -0,0 +1,257 @@
+import heapq
+import threading
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+# Key in Session.info holding item changes flushed but not yet committed
+PENDING_CHANGES_KEY = 'alert_scheduler_changes'
+
+# Marker change meaning "forget everything and reload"
+RESET = (None, None)
+
+# Each poll re-reads this much of the previous one, for writes that committed
+# after the poll with an earlier ``updated_at``
+POLL_OVERLAP = timedelta(minutes=1)
+
+class AlertScheduler:
+    """Optional in-process min-heap of upcoming expiry alerts.
+
+    Each item with an expiry date has one alert per ``NOTIFICATION_DAYS``
+    offset, due at ``EXPIRY_ALERT_HOUR`` (in ``SCHEDULER_TIMEZONE``) on
+    ``expiry_date - offset``. Alerts are kept in a heap ordered by due time,
+    so finding what is due is a peek at the top instead of a table scan.
+
+    The heap is loaded lazily, one window of ``ALERT_SCHEDULER_WINDOW_DAYS``
+    at a time starting today; by default that is a single due time. Only
+    alerts due before ``loaded_until`` are held, and only items with one of
+    them are tracked: the window reads exactly the expiry dates its alerts
+    fall on (an ``IN`` match on ``idx_expiry_date``), and an item is dropped
+    once its last loaded alert fires. The next window is read once time
+    reaches it.
+
+    Committed ORM creates, updates and deletes of items in this process are
+    applied as they happen; superseded heap entries are skipped when popped.
+    Bulk ``UPDATE``/``DELETE`` statements on items drop the heap so it is
+    reloaded. Alerts are only fired by the scheduler leader, while items are
+    mostly written by web workers, so every ``pop_due`` also polls items by
+    ``updated_at`` for writes committed elsewhere since the previous poll.
+    Items hard-deleted by another process are not seen, but their alerts
+    find no item when fired. Fired alerts still go through ``dedup_key``
+    and a periodic full check remains the safety net.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.window_days = 1
+        self.alert_hour = 8
+        self.timezone = ZoneInfo('UTC')
+        self.offsets: Tuple[int, ...] = ()
+        self._heap: List[Tuple[datetime, int, int, date]] = []
+        self._expiry: Dict[int, date] = {}
+        self._loaded_until: Optional[datetime] = None
+        self._polled_at: Optional[datetime] = None
+        self._recent: Dict[int, datetime] = {}
+        # Expiry of each alert handed out by the last pop_due, for requeue
+        self._fired: Dict[Tuple[int, int], date] = {}
+        self._lock = threading.RLock()
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configure the scheduler from app config and start following ORM writes."""
+        self.enabled = app.config.get('ALERT_SCHEDULER_ENABLED', False)
+        self.window_days = app.config.get('ALERT_SCHEDULER_WINDOW_DAYS', self.window_days)
+        self.alert_hour = app.config.get('EXPIRY_ALERT_HOUR', self.alert_hour)
+        self.timezone = ZoneInfo(app.config.get('SCHEDULER_TIMEZONE', 'UTC'))
+        self.offsets = tuple(sorted({days for days in app.config.get('NOTIFICATION_DAYS', ()) if days > 0}))
+        if self.enabled and not self._listening:
+            event.listen(Session, 'after_flush', self._after_flush)
+            event.listen(Session, 'after_commit', self._after_commit)
+            event.listen(Session, 'after_rollback', self._after_rollback)
+            event.listen(Session, 'do_orm_execute', self._on_orm_execute)
+            self._listening = True
+
+    def detach(self):
+        """Stop following ORM writes and drop the heap."""
+        if self._listening:
+            event.remove(Session, 'after_flush', self._after_flush)
+            event.remove(Session, 'after_commit', self._after_commit)
+            event.remove(Session, 'after_rollback', self._after_rollback)
+            event.remove(Session, 'do_orm_execute', self._on_orm_execute)
+            self._listening = False
+        self.clear()
+
+    def clear(self):
+        """Drop all loaded alerts; the next call reloads from the database."""
+        with self._lock:
+            self._heap = []
+            self._expiry = {}
+            self._loaded_until = None
+            self._polled_at = None
+            self._recent = {}
+            self._fired = {}
+
+    def __len__(self):
+        return len(self._heap)
+
+    def next_due(self) -> Optional[datetime]:
+        """When the earliest loaded alert is due, if any."""
+        with self._lock:
+            self._ensure_loaded()
+            self._skip_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: Optional[datetime] = None) -> List[Tuple[int, int]]:
+        """Remove and return the ``(item_id, days_before_expiry)`` alerts due by ``now``.
+
+        ``now`` is a naive time in ``SCHEDULER_TIMEZONE`` (default: the current time).
+        """
+        now = now or self._now()
+        with self._lock:
+            self._ensure_loaded()
+            self._poll_changes()
+            while self._loaded_until <= now:
+                self._load_window(self._loaded_until)
+
+            due = []
+            self._fired = {}
+            while self._heap and self._heap[0][0] <= now:
+                alert_at, item_id, days, expiry = heapq.heappop(self._heap)
+                if self._expiry.get(item_id) != expiry or (item_id, days) in due:
+                    continue
+                due.append((item_id, days))
+                self._fired[(item_id, days)] = expiry
+                if not any(alert_at < self._alert_at(expiry, later) < self._loaded_until for later in self.offsets):
+                    # No more loaded alerts for this item; stop tracking it
+                    del self._expiry[item_id]
+            return due
+
+    def requeue(self, alerts: List[Tuple[int, int]]):
+        """Put alerts from the last ``pop_due`` back, e.g. when storing them failed."""
+        with self._lock:
+            if self._loaded_until is None:
+                # Dropped since; the reload starts at midnight and includes them
+                return
+            for item_id, days in alerts:
+                expiry = self._fired.pop((item_id, days), None)
+                if expiry is None or self._expiry.get(item_id, expiry) != expiry:
+                    # Rescheduled in the meantime; its new alerts are already queued
+                    continue
+                self._expiry[item_id] = expiry
+                heapq.heappush(self._heap, (self._alert_at(expiry, days), item_id, days, expiry))
+
+    # Loading
+
+    def _ensure_loaded(self):
+        if self._loaded_until is None:
+            self._polled_at = datetime.utcnow()
+            # Start at midnight so alerts due earlier today still fire
+            self._load_window(self._today_start())
+
+    def _poll_changes(self):
+        """Apply item writes committed by other processes since the last poll."""
+        from app.core.extensions import db
+        from app.models.item import Item
+        polled_at = datetime.utcnow()
+        rows = db.session.query(Item.id, Item.expiry_date, Item.updated_at).filter(
+            Item.updated_at > self._polled_at - POLL_OVERLAP
+        ).all()
+        recent = {}
+        for item_id, expiry, updated_at in rows:
+            recent[item_id] = updated_at
+            # Seen by the previous poll, or already applied from this process
+            if self._recent.get(item_id) == updated_at or self._expiry.get(item_id) == expiry:
+                continue
+            self._apply(item_id, expiry)
+        self._recent = recent
+        self._polled_at = polled_at
+
+    def _now(self) -> datetime:
+        """The current time in ``SCHEDULER_TIMEZONE``, naive like the heap's due times."""
+        return datetime.now(self.timezone).replace(tzinfo=None)
+
+    def _today_start(self) -> datetime:
+        return datetime.combine(self._now().date(), time.min)
+
+    def _alert_at(self, expiry: date, days: int) -> datetime:
+        return datetime.combine(expiry - timedelta(days=days), time(hour=self.alert_hour))
+
+    def _load_window(self, start: datetime):
+        """Load the alerts due in ``[start, start + window)``."""
+        from app.core.extensions import db
+        from app.models.item import Item
+        end = datetime.combine(start.date() + timedelta(days=self.window_days), time(hour=self.alert_hour))
+        due_days = [start.date() + timedelta(days=n) for n in range((end.date() - start.date()).days + 1)]
+        due_days = [day for day in due_days if start <= datetime.combine(day, time(hour=self.alert_hour)) < end]
+        expiry_dates = sorted({day + timedelta(days=days) for day in due_days for days in self.offsets})
+        if expiry_dates:
+            # Only items with an alert inside the window
+            rows = db.session.query(Item.id, Item.expiry_date).filter(
+                Item.expiry_date.in_(expiry_dates)
+            ).yield_per(1000)
+            for item_id, expiry in rows:
+                if self._push_alerts(item_id, expiry, start, end):
+                    self._expiry[item_id] = expiry
+        self._loaded_until = end
+
+    def _push_alerts(self, item_id: int, expiry: date, start: datetime, end: datetime) -> int:
+        """Queue the item's alerts due in ``[start, end)``; returns how many."""
+        pushed = 0
+        for days in self.offsets:
+            alert_at = self._alert_at(expiry, days)
+            if start <= alert_at < end:
+                heapq.heappush(self._heap, (alert_at, item_id, days, expiry))
+                pushed += 1
+        return pushed
+
+    def _skip_stale(self):
+        while self._heap and self._expiry.get(self._heap[0][1]) != self._heap[0][3]:
+            heapq.heappop(self._heap)
+
+    def _apply(self, item_id: int, expiry: Optional[date]):
+        with self._lock:
+            if self._loaded_until is None:
+                return
+            # Alerts for earlier days are not fired retroactively; today's still are
+            if expiry is not None and self._push_alerts(item_id, expiry, self._today_start(), self._loaded_until):
+                self._expiry[item_id] = expiry
+            else:
+                # No alerts loaded for it (any queued ones are now stale)
+                self._expiry.pop(item_id, None)
+
+    # ORM event handlers
+
+    def _after_flush(self, session, flush_context):
+        from app.models.item import Item
+        changes = session.info.setdefault(PENDING_CHANGES_KEY, [])
+        for item in session.new:
+            if isinstance(item, Item) and item.expiry_date is not None:
+                changes.append((item.id, item.expiry_date))
+        for item in session.deleted:
+            if isinstance(item, Item):
+                changes.append((item.id, None))
+        for item in session.dirty:
+            if isinstance(item, Item) and inspect(item).attrs.expiry_date.history.has_changes():
+                changes.append((item.id, item.expiry_date))
+
+    def _after_commit(self, session):
+        for item_id, expiry in session.info.pop(PENDING_CHANGES_KEY, []):
+            if (item_id, expiry) == RESET:
+                self.clear()
+            else:
+                self._apply(item_id, expiry)
+
+    def _after_rollback(self, session):
+        session.info.pop(PENDING_CHANGES_KEY, None)
+
+    def _on_orm_execute(self, orm_execute_state):
+        from app.models.item import Item
+        if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+            return
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and mapper.class_ is Item:
+            orm_execute_state.session.info.setdefault(PENDING_CHANGES_KEY, []).append(RESET)
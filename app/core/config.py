@@ -24,6 +24,7 @@ class Config:
     # File Upload
     UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'uploads')
     MAX_CONTENT_LENGTH = 16777216  # 16MB in bytes
+    OCR_PRELOAD = os.getenv('OCR_PRELOAD', 'False').lower() == 'true'  # Load the OCR model at startup (use with gunicorn --preload)
     
     # Zoho Integration
     ZOHO_CLIENT_ID = os.getenv('ZOHO_CLIENT_ID')
@@ -42,9 +43,86 @@ class Config:
     MAIL_USERNAME = os.getenv('MAIL_USERNAME')
     MAIL_PASSWORD = os.getenv('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.getenv('MAIL_DEFAULT_SENDER')
+    MAIL_DISPATCH_WORKERS = int(os.getenv('MAIL_DISPATCH_WORKERS', '4'))  # Parallel SMTP connections for bulk sends
+    MAIL_MAX_MESSAGES_PER_CONNECTION = int(os.getenv('MAIL_MAX_MESSAGES_PER_CONNECTION', '100'))
+    APP_BASE_URL = os.getenv('APP_BASE_URL', 'http://localhost:5000')  # Links in emails sent outside a request
+    
+    # Email outbox (delivered by `flask send-emails`)
+    EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', '100'))
+    EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', '5'))
+    EMAIL_OUTBOX_LEASE_SECONDS = int(os.getenv('EMAIL_OUTBOX_LEASE_SECONDS', '600'))
+    EMAIL_OUTBOX_BACKOFF_SECONDS = int(os.getenv('EMAIL_OUTBOX_BACKOFF_SECONDS', '60'))  # Doubles per attempt
+    EMAIL_OUTBOX_MAX_BACKOFF_SECONDS = int(os.getenv('EMAIL_OUTBOX_MAX_BACKOFF_SECONDS', '3600'))
+    EMAIL_OUTBOX_SENT_RETENTION_DAYS = int(os.getenv('EMAIL_OUTBOX_SENT_RETENTION_DAYS', '7'))  # Sent rows are deleted after this
+    EMAIL_OUTBOX_PRUNE_BATCH_SIZE = int(os.getenv('EMAIL_OUTBOX_PRUNE_BATCH_SIZE', '1000'))
+    
+    # Digest delivery windows (each user's digest is due at a fixed slot in their morning)
+    DIGEST_LOCAL_HOUR = int(os.getenv('DIGEST_LOCAL_HOUR', '8'))  # Window opens at this hour in the user's timezone
+    DIGEST_WINDOW_MINUTES = int(os.getenv('DIGEST_WINDOW_MINUTES', '180'))  # Digests are spread over this many minutes
+    DIGEST_DEFAULT_TIMEZONE = os.getenv('DIGEST_DEFAULT_TIMEZONE', 'UTC')  # For users without a timezone
     
     # Notification Settings
     try:
         NOTIFICATION_DAYS = [int(d.strip()) for d in os.getenv('NOTIFICATION_DAYS', '30,15,7,3,1').split(',')]
     except (ValueError, AttributeError):
-        NOTIFICATION_DAYS = [30, 15, 7, 3, 1] 
\ No newline at end of file
+        NOTIFICATION_DAYS = [30, 15, 7, 3, 1]
+    
+    # Expiry notification run (scheduled daily; also `flask notify`)
+    EXPIRY_CHECK_HOUR = int(os.getenv('EXPIRY_CHECK_HOUR', '0'))  # In SCHEDULER_TIMEZONE
+    EXPIRY_CHECK_MINUTE = int(os.getenv('EXPIRY_CHECK_MINUTE', '30'))
+    NOTIFICATION_RUN_SHARDS = int(os.getenv('NOTIFICATION_RUN_SHARDS', '0'))  # Run one after another by the scheduled job; 0 = one
+    
+    # Expired item cleanup
+    CLEANUP_BATCH_SIZE = int(os.getenv('CLEANUP_BATCH_SIZE', '500'))  # Items removed per transaction
+    CLEANUP_MAX_BATCHES_PER_RUN = int(os.getenv('CLEANUP_MAX_BATCHES_PER_RUN', '40'))  # A backlog drains over several runs
+    ITEM_PURGE_AFTER_HOURS = int(os.getenv('ITEM_PURGE_AFTER_HOURS', '24'))  # Soft-deleted items are archived after this
+    ITEM_PURGE_BATCH_SIZE = int(os.getenv('ITEM_PURGE_BATCH_SIZE', '200'))
+    ITEM_PURGE_PAUSE_SECONDS = float(os.getenv('ITEM_PURGE_PAUSE_SECONDS', '0.5'))  # Between chunks
+    ZOHO_DEACTIVATION_BATCH_SIZE = int(os.getenv('ZOHO_DEACTIVATION_BATCH_SIZE', '100'))  # Sent per Zoho sync
+    ZOHO_DEACTIVATION_MAX_ATTEMPTS = int(os.getenv('ZOHO_DEACTIVATION_MAX_ATTEMPTS', '5'))
+    
+    # Scheduled jobs (cron triggers such as EXPIRY_CHECK_HOUR run in this timezone, not the host's)
+    SCHEDULER_TIMEZONE = os.getenv('SCHEDULER_TIMEZONE', 'UTC')
+    
+    # Background job history
+    JOB_OVERRUN_SECONDS = int(os.getenv('JOB_OVERRUN_SECONDS', '3600'))  # Daily jobs running longer are flagged
+    JOB_RUN_RETENTION_DAYS = int(os.getenv('JOB_RUN_RETENTION_DAYS', '30'))
+    
+    # Scheduler leader election (only the lease holder runs scheduled jobs)
+    SCHEDULER_AUTOSTART = os.getenv('SCHEDULER_AUTOSTART', 'True').lower() == 'true'  # Start with the first web request
+    LEADER_ELECTION_ENABLED = os.getenv('LEADER_ELECTION_ENABLED', 'True').lower() == 'true'
+    LEADER_LEASE_SECONDS = int(os.getenv('LEADER_LEASE_SECONDS', '60'))  # Standbys take over after this
+    LEADER_HEARTBEAT_SECONDS = int(os.getenv('LEADER_HEARTBEAT_SECONDS', '15'))  # Must be well under the lease
+    
+    # Notification channels (a notification fans out to each one the user has enabled)
+    NOTIFICATION_CHANNELS = [c.strip() for c in os.getenv('NOTIFICATION_CHANNELS', 'in_app,email,sms').split(',') if c.strip()]
+    NOTIFICATION_EMAIL_PROVIDER = os.getenv('NOTIFICATION_EMAIL_PROVIDER', 'smtp')  # smtp or local (log only)
+    NOTIFICATION_EMAIL_BATCH_SIZE = int(os.getenv('NOTIFICATION_EMAIL_BATCH_SIZE', '50'))
+    NOTIFICATION_EMAIL_RATE_PER_SECOND = float(os.getenv('NOTIFICATION_EMAIL_RATE_PER_SECOND', '10'))  # 0 = unlimited
+    NOTIFICATION_SMS_PROVIDER = os.getenv('NOTIFICATION_SMS_PROVIDER', 'twilio')  # twilio or local (log only)
+    NOTIFICATION_SMS_BATCH_SIZE = int(os.getenv('NOTIFICATION_SMS_BATCH_SIZE', '10'))
+    NOTIFICATION_SMS_RATE_PER_SECOND = float(os.getenv('NOTIFICATION_SMS_RATE_PER_SECOND', '1'))  # Twilio long codes send 1/s
+    NOTIFICATION_DELIVERY_INTERVAL_SECONDS = int(os.getenv('NOTIFICATION_DELIVERY_INTERVAL_SECONDS', '30'))  # Queued SMS sender
+    NOTIFICATION_DELIVERY_BATCH_SIZE = int(os.getenv('NOTIFICATION_DELIVERY_BATCH_SIZE', '200'))
+    NOTIFICATION_DELIVERY_MAX_ATTEMPTS = int(os.getenv('NOTIFICATION_DELIVERY_MAX_ATTEMPTS', '5'))
+    
+    # Notification retention (older rows are moved to notifications_archive)
+    NOTIFICATION_READ_RETENTION_DAYS = int(os.getenv('NOTIFICATION_READ_RETENTION_DAYS', '30'))
+    NOTIFICATION_RETENTION_DAYS = int(os.getenv('NOTIFICATION_RETENTION_DAYS', '90'))
+    NOTIFICATION_ARCHIVE_BATCH_SIZE = int(os.getenv('NOTIFICATION_ARCHIVE_BATCH_SIZE', '1000'))
+    
+    # Notification stream (Server-Sent Events)
+    NOTIFICATION_STREAM_POLL_SECONDS = float(os.getenv('NOTIFICATION_STREAM_POLL_SECONDS', '5'))  # Database check for other workers' writes
+    NOTIFICATION_STREAM_MAX_SECONDS = int(os.getenv('NOTIFICATION_STREAM_MAX_SECONDS', '300'))  # Clients reconnect after this
+    NOTIFICATION_STREAM_TOKEN_SECONDS = int(os.getenv('NOTIFICATION_STREAM_TOKEN_SECONDS', '60'))  # Lifetime of stream-only tokens
+    
+    # Expiry alert scheduler (optional in-process heap of upcoming alerts)
+    ALERT_SCHEDULER_ENABLED = os.getenv('ALERT_SCHEDULER_ENABLED', 'False').lower() == 'true'
+    ALERT_SCHEDULER_WINDOW_DAYS = int(os.getenv('ALERT_SCHEDULER_WINDOW_DAYS', '1'))  # Days of alerts loaded at a time
+    ALERT_SCHEDULER_INTERVAL_SECONDS = int(os.getenv('ALERT_SCHEDULER_INTERVAL_SECONDS', '60'))
+    EXPIRY_ALERT_HOUR = int(os.getenv('EXPIRY_ALERT_HOUR', '8'))  # Hour (in SCHEDULER_TIMEZONE) alerts become due
+    
+    # Expiry timeline index (optional in-process cache of per-user expiry dates)
+    EXPIRY_INDEX_ENABLED = os.getenv('EXPIRY_INDEX_ENABLED', 'False').lower() == 'true'
+    EXPIRY_INDEX_MAX_ENTRIES = int(os.getenv('EXPIRY_INDEX_MAX_ENTRIES', '1000000'))
+    EXPIRY_INDEX_TTL = int(os.getenv('EXPIRY_INDEX_TTL', '300'))  # Seconds before a user's timeline is reloaded
\ No newline at end of file
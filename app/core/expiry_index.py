@@ -0,0 +1,214 @@
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, List, Optional
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+# Keys pack (expiry ordinal, item id) into one signed 64-bit integer so a
+# user's timeline is a single sorted array('q') that bisect can search.
+ID_BITS = 32
+ID_MASK = (1 << ID_BITS) - 1
+
+# Key in Session.info holding changes flushed but not yet committed
+PENDING_CHANGES_KEY = 'expiry_index_changes'
+
+def _key(expiry, item_id: int) -> int:
+    return (expiry.toordinal() << ID_BITS) | item_id
+
+def _day_start(ordinal: int) -> int:
+    return ordinal << ID_BITS
+
+class _Timeline:
+    """Sorted expiry keys for one user."""
+
+    __slots__ = ('keys', 'loaded_at')
+
+    def __init__(self, keys: array):
+        self.keys = keys
+        self.loaded_at = time.monotonic()
+
+class ExpiryIndex:
+    """Optional in-process index of item expiry dates per user.
+
+    Each cached user has a sorted array of ``(expiry_ordinal, item_id)`` keys,
+    so horizon and bucket queries are answered with binary search instead of
+    a database round trip. Users are loaded from SQL on first use (or once
+    their entry is older than ``EXPIRY_INDEX_TTL`` seconds) and evicted least
+    recently used first once ``EXPIRY_INDEX_MAX_ENTRIES`` keys are held.
+
+    Loaded timelines follow ORM writes committed in this process: item
+    changes are collected after each flush and applied after commit. Bulk
+    ``UPDATE``/``DELETE`` statements on items drop the whole index. Writes
+    made by other processes become visible when the TTL expires.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.max_entries = 1000000
+        self.ttl = 300
+        self._timelines: 'OrderedDict[int, _Timeline]' = OrderedDict()
+        self._size = 0
+        self._lock = threading.RLock()
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configure the index from app config and start following ORM writes."""
+        self.enabled = app.config.get('EXPIRY_INDEX_ENABLED', False)
+        self.max_entries = app.config.get('EXPIRY_INDEX_MAX_ENTRIES', self.max_entries)
+        self.ttl = app.config.get('EXPIRY_INDEX_TTL', self.ttl)
+        if self.enabled and not self._listening:
+            event.listen(Session, 'after_flush', self._after_flush)
+            event.listen(Session, 'after_commit', self._after_commit)
+            event.listen(Session, 'after_rollback', self._after_rollback)
+            event.listen(Session, 'do_orm_execute', self._on_orm_execute)
+            self._listening = True
+
+    def detach(self):
+        """Stop following ORM writes and drop all cached timelines."""
+        if self._listening:
+            event.remove(Session, 'after_flush', self._after_flush)
+            event.remove(Session, 'after_commit', self._after_commit)
+            event.remove(Session, 'after_rollback', self._after_rollback)
+            event.remove(Session, 'do_orm_execute', self._on_orm_execute)
+            self._listening = False
+        self.clear()
+
+    def clear(self, user_id: Optional[int] = None):
+        """Drop one user's timeline, or every timeline."""
+        with self._lock:
+            if user_id is None:
+                self._timelines.clear()
+                self._size = 0
+            else:
+                timeline = self._timelines.pop(user_id, None)
+                if timeline is not None:
+                    self._size -= len(timeline.keys)
+
+    def __len__(self):
+        return self._size
+
+    # Queries
+
+    def expiring_item_ids(self, user_id: int, horizon_days: int) -> List[int]:
+        """IDs of items expiring after today and within ``horizon_days``, soonest first."""
+        keys = self._timeline(user_id).keys
+        today = date.today().toordinal()
+        lo = bisect_left(keys, _day_start(today + 1))
+        hi = bisect_left(keys, _day_start(today + horizon_days + 1))
+        return [key & ID_MASK for key in keys[lo:hi]]
+
+    def expired_item_ids(self, user_id: int) -> List[int]:
+        """IDs of items expiring on or before today, oldest first."""
+        keys = self._timeline(user_id).keys
+        hi = bisect_left(keys, _day_start(date.today().toordinal() + 1))
+        return [key & ID_MASK for key in keys[:hi]]
+
+    def bucket_counts(self, user_id: int, horizon_days: int) -> Dict[str, int]:
+        """Count dated items that are expired, expiring within the horizon, or active."""
+        keys = self._timeline(user_id).keys
+        today = date.today().toordinal()
+        expired_end = bisect_left(keys, _day_start(today + 1))
+        expiring_end = bisect_left(keys, _day_start(today + horizon_days + 1))
+        return {
+            'expired': expired_end,
+            'expiring_soon': expiring_end - expired_end,
+            'active': len(keys) - expiring_end
+        }
+
+    # Cache management
+
+    def _timeline(self, user_id: int) -> _Timeline:
+        with self._lock:
+            timeline = self._timelines.get(user_id)
+            if timeline is not None and time.monotonic() - timeline.loaded_at < self.ttl:
+                self._timelines.move_to_end(user_id)
+                return timeline
+
+        # Miss or stale entry: rebuild from SQL
+        timeline = _Timeline(self._load_keys(user_id))
+        with self._lock:
+            self.clear(user_id)
+            self._timelines[user_id] = timeline
+            self._size += len(timeline.keys)
+            self._evict()
+        return timeline
+
+    def _load_keys(self, user_id: int) -> array:
+        from app.core.extensions import db
+        from app.models.item import Item
+        rows = db.session.query(Item.expiry_date, Item.id).filter(
+            Item.user_id == user_id,
+            Item.expiry_date.isnot(None)
+        ).order_by(Item.expiry_date, Item.id).all()
+        return array('q', (_key(expiry, item_id) for expiry, item_id in rows))
+
+    def _evict(self):
+        # Always keep the most recently used timeline, even if it alone exceeds the cap
+        while self._size > self.max_entries and len(self._timelines) > 1:
+            _, timeline = self._timelines.popitem(last=False)
+            self._size -= len(timeline.keys)
+
+    def _apply(self, user_id: int, old_key: Optional[int], new_key: Optional[int]):
+        with self._lock:
+            timeline = self._timelines.get(user_id)
+            if timeline is None:
+                return
+            keys = timeline.keys
+            if old_key is not None:
+                position = bisect_left(keys, old_key)
+                if position < len(keys) and keys[position] == old_key:
+                    del keys[position]
+                    self._size -= 1
+            if new_key is not None:
+                insort(keys, new_key)
+                self._size += 1
+                self._evict()
+
+    # ORM event handlers
+
+    def _after_flush(self, session, flush_context):
+        from app.models.item import Item
+        changes = session.info.setdefault(PENDING_CHANGES_KEY, [])
+        for item in session.new:
+            if isinstance(item, Item) and item.expiry_date is not None:
+                changes.append((item.user_id, None, _key(item.expiry_date, item.id)))
+        for item in session.deleted:
+            if isinstance(item, Item) and item.expiry_date is not None:
+                changes.append((item.user_id, _key(item.expiry_date, item.id), None))
+        for item in session.dirty:
+            if not isinstance(item, Item):
+                continue
+            history = inspect(item).attrs.expiry_date.history
+            if not history.has_changes():
+                continue
+            old_expiry = history.deleted[0] if history.deleted else None
+            changes.append((
+                item.user_id,
+                _key(old_expiry, item.id) if old_expiry is not None else None,
+                _key(item.expiry_date, item.id) if item.expiry_date is not None else None
+            ))
+
+    def _after_commit(self, session):
+        for user_id, old_key, new_key in session.info.pop(PENDING_CHANGES_KEY, []):
+            if user_id is None:
+                self.clear()
+            else:
+                self._apply(user_id, old_key, new_key)
+
+    def _after_rollback(self, session):
+        session.info.pop(PENDING_CHANGES_KEY, None)
+
+    def _on_orm_execute(self, orm_execute_state):
+        from app.models.item import Item
+        if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+            return
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and mapper.class_ is Item:
+            # Bulk statements bypass per-object history; rebuild everyone after commit
+            orm_execute_state.session.info.setdefault(PENDING_CHANGES_KEY, []).append((None, None, None))
@@ -5,6 +5,11 @@ from flask_apscheduler import APScheduler
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from flask_mail import Mail
+from app.core.expiry_index import ExpiryIndex
+from app.core.notification_broker import NotificationBroker
+from app.core.alert_scheduler import AlertScheduler
+from app.core.job_registry import JobRegistry
+from app.core.leader_election import LeaderElection
 
 # Initialize extensions
 db = SQLAlchemy()
@@ -14,6 +19,11 @@ scheduler = APScheduler()
 cors = CORS()
 jwt = JWTManager()
 mail = Mail()
+expiry_index = ExpiryIndex()
+notification_broker = NotificationBroker()
+alert_scheduler = AlertScheduler()
+job_registry = JobRegistry()
+scheduler_leader = LeaderElection()
 
 def init_extensions(app):
     """Initialize Flask extensions."""
@@ -0,0 +1,196 @@
+import os
+import socket
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Job(NamedTuple):
+    """A registered background job."""
+    id: str
+    func: Callable
+    trigger: str
+    trigger_args: Dict[str, Any]
+    # Runs longer than this are logged and counted as overruns
+    max_seconds: Optional[float]
+    # Whether ``func`` takes the day to process, so it can be backfilled
+    backfill: bool
+
+class JobRegistry:
+    """Named background jobs, with every run recorded in ``job_runs``.
+
+    Jobs are registered once in ``create_app`` and added to the scheduler
+    through ``schedule``; the scheduler then calls ``run`` in every process,
+    which returns straight away unless this process is the scheduler
+    leader (see ``LeaderElection``). Otherwise it gives the
+    job an application context, records its start, end, duration, the row
+    count it returns and any error, and logs overruns past ``max_seconds``.
+    The same ``run`` is used by ``flask jobs run`` and ``flask jobs backfill``,
+    so manual runs show up in the same history. Scheduled runs of
+    ``interval`` jobs, which fire every few seconds, are only recorded when
+    they did something: processed rows, failed or overran.
+    """
+
+    def __init__(self, app=None):
+        self.jobs: Dict[str, Job] = {}
+        self.app = None
+        self.retention_days = 30
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.retention_days = app.config.get('JOB_RUN_RETENTION_DAYS', self.retention_days)
+
+    def register(self, job_id: str, func: Callable, trigger: str, max_seconds: Optional[float] = None,
+                 backfill: bool = False, **trigger_args):
+        """Register ``func`` as ``job_id`` with an APScheduler trigger (``cron``, ``interval``)."""
+        self.jobs[job_id] = Job(job_id, func, trigger, trigger_args, max_seconds, backfill)
+
+    def schedule(self, scheduler):
+        """Add every registered job to ``scheduler``."""
+        for job in self.jobs.values():
+            scheduler.add_job(id=job.id, func=self.run, args=[job.id], trigger=job.trigger,
+                              replace_existing=True, **job.trigger_args)
+
+    def run(self, job_id: str, trigger: str = 'scheduled', day: Optional[date] = None) -> Optional[Dict[str, Any]]:
+        """Run a job now and record it; returns the recorded run.
+
+        Scheduled runs only happen in the process holding scheduler
+        leadership; elsewhere they are skipped and ``None`` is returned, as
+        it is for scheduled interval runs that had nothing to do. Manual and
+        backfill runs always go ahead.
+        """
+        from app.core.extensions import db, scheduler_leader
+        from app.models.job_run import JobRun, JOB_SUCCEEDED, JOB_FAILED
+
+        job = self.jobs[job_id]
+        if day is not None and not job.backfill:
+            raise ValueError(f"Job {job_id} cannot be run for a given day")
+
+        with self.app.app_context():
+            if trigger == 'scheduled' and not scheduler_leader.is_leader():
+                logger.debug(f"Skipping {job_id}: this process is on standby")
+                return None
+            self._check_overrun(job)
+            started_at = datetime.utcnow()
+            quiet = trigger == 'scheduled' and job.trigger == 'interval'
+            run_id = None
+            if not quiet:
+                run = JobRun(job_id=job_id, trigger=trigger, run_for=day, started_at=started_at,
+                             worker=f'{socket.gethostname()}:{os.getpid()}')
+                db.session.add(run)
+                db.session.commit()
+                run_id = run.id
+
+            started = time.monotonic()
+            error = None
+            result = None
+            try:
+                result = job.func(day) if day is not None else job.func()
+            except Exception as e:
+                logger.exception(f"Job {job_id} failed")
+                db.session.rollback()
+                error = str(e)
+            duration = time.monotonic() - started
+            rows = result if isinstance(result, int) and not isinstance(result, bool) else None
+            overran = bool(job.max_seconds and duration > job.max_seconds)
+
+            if run_id is None:
+                if not (error or overran or rows):
+                    return None
+                run = JobRun(job_id=job_id, trigger=trigger, run_for=day, started_at=started_at,
+                             worker=f'{socket.gethostname()}:{os.getpid()}')
+                db.session.add(run)
+            else:
+                run = db.session.get(JobRun, run_id)
+            run.status = JOB_FAILED if error else JOB_SUCCEEDED
+            run.finished_at = datetime.utcnow()
+            run.duration_seconds = round(duration, 3)
+            run.rows_processed = rows
+            run.error = error
+            db.session.commit()
+
+            if overran:
+                logger.warning(f"Job {job_id} overran: {duration:.1f}s (limit {job.max_seconds}s)")
+            return run.to_dict()
+
+    def history(self, job_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """The most recent runs of a job, newest first."""
+        from app.models.job_run import JobRun
+        runs = JobRun.query.filter(JobRun.job_id == job_id).order_by(
+            JobRun.started_at.desc(), JobRun.id.desc()
+        ).limit(limit)
+        return [run.to_dict() for run in runs]
+
+    def stats(self, job_id: str, last: int = 50) -> Dict[str, Any]:
+        """Latency and failure figures over a job's last ``last`` finished runs."""
+        from app.models.job_run import JobRun, JOB_RUNNING, JOB_FAILED
+        job = self.jobs.get(job_id)
+        runs = JobRun.query.filter(
+            JobRun.job_id == job_id,
+            JobRun.status != JOB_RUNNING
+        ).order_by(JobRun.started_at.desc(), JobRun.id.desc()).limit(last).all()
+
+        durations = sorted(run.duration_seconds for run in runs if run.duration_seconds is not None)
+        max_seconds = job.max_seconds if job else None
+        return {
+            'runs': len(runs),
+            'failed': sum(1 for run in runs if run.status == JOB_FAILED),
+            'overruns': sum(1 for d in durations if max_seconds and d > max_seconds),
+            'avg_seconds': round(sum(durations) / len(durations), 3) if durations else None,
+            'p95_seconds': durations[min(int(len(durations) * 0.95), len(durations) - 1)] if durations else None,
+            'max_seconds': durations[-1] if durations else None,
+            'last_status': runs[0].status if runs else None,
+            'last_started_at': runs[0].started_at.isoformat() if runs else None
+        }
+
+    def prune(self) -> int:
+        """Delete runs older than ``JOB_RUN_RETENTION_DAYS``; returns rows deleted."""
+        from app.core.extensions import db
+        from app.models.job_run import JobRun
+        cutoff = datetime.utcnow() - timedelta(days=self.retention_days)
+        deleted = JobRun.query.filter(JobRun.started_at < cutoff).delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
+
+    def fail_abandoned_runs(self) -> int:
+        """Mark scheduled runs still ``running`` as failed; returns rows updated.
+
+        Called when this process takes over the scheduler lease: only the
+        leader runs scheduled jobs, so any such row was left by a previous
+        leader that died or lost the lease before finishing it.
+        """
+        from app.core.extensions import db
+        from app.models.job_run import JobRun, JOB_RUNNING, JOB_FAILED
+        failed = JobRun.query.filter(
+            JobRun.status == JOB_RUNNING,
+            JobRun.trigger == 'scheduled'
+        ).update({
+            JobRun.status: JOB_FAILED,
+            JobRun.finished_at: datetime.utcnow(),
+            JobRun.error: 'Abandoned: the scheduler leader changed before the run finished'
+        }, synchronize_session=False)
+        db.session.commit()
+        if failed:
+            logger.warning(f"Marked {failed} abandoned job runs as failed")
+        return failed
+
+    def _check_overrun(self, job: Job):
+        """Warn if an earlier run of ``job`` is still going past its limit."""
+        from app.models.job_run import JobRun, JOB_RUNNING
+        if not job.max_seconds:
+            return
+        cutoff = datetime.utcnow() - timedelta(seconds=job.max_seconds)
+        stuck = JobRun.query.filter(
+            JobRun.job_id == job.id,
+            JobRun.status == JOB_RUNNING,
+            JobRun.started_at < cutoff
+        ).order_by(JobRun.started_at).first()
+        if stuck is not None:
+            logger.warning(
+                f"Job {job.id} run {stuck.id} on {stuck.worker} started at {stuck.started_at} "
+                f"is still running past its {job.max_seconds}s limit"
+            )
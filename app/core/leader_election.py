@@ -0,0 +1,170 @@
+import atexit
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+import logging
+
+logger = logging.getLogger(__name__)
+
+class LeaderElection:
+    """Elect one process in the cluster to run scheduled jobs.
+
+    Every process running APScheduler joins the election, but only the holder of the
+    ``scheduler`` lease in ``scheduler_leases`` runs scheduled jobs; the
+    others stay on standby. The leader renews its lease every
+    ``LEADER_HEARTBEAT_SECONDS``; if it dies, the lease runs out after
+    ``LEADER_LEASE_SECONDS`` and the next standby heartbeat takes over. A
+    process that shuts down cleanly gives the lease up at exit.
+
+    Taking and renewing the lease is a single conditional ``UPDATE`` (or an
+    ``INSERT`` for the first holder), so two processes can never both
+    succeed. A process only considers itself leader until the lease would
+    have expired as measured from before it asked, so a paused leader stops
+    running jobs before a standby can take over. Callbacks added with
+    ``on_elected`` run whenever this process becomes leader. Lease expiry is compared
+    against each node's clock, which assumes clocks are kept in sync.
+    """
+
+    def __init__(self, app=None, name: str = 'scheduler'):
+        self.name = name
+        self.enabled = True
+        self.lease_seconds = 60
+        self.heartbeat_seconds = 15
+        self._pid = None
+        self.identity = None
+        self._check_fork()
+        self.app = None
+        self._leader_until = 0.0
+        self._lock = threading.Lock()
+        self._atexit_registered = False
+        self._elected_callbacks = []
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('LEADER_ELECTION_ENABLED', True)
+        self.lease_seconds = app.config.get('LEADER_LEASE_SECONDS', self.lease_seconds)
+        self.heartbeat_seconds = app.config.get('LEADER_HEARTBEAT_SECONDS', self.heartbeat_seconds)
+        if self.enabled and not self._atexit_registered:
+            atexit.register(self._release_at_exit)
+            self._atexit_registered = True
+
+    def schedule(self, scheduler):
+        """Add the lease heartbeat to ``scheduler``; it runs in every process."""
+        if self.enabled:
+            scheduler.add_job(id=f'{self.name}_leader_heartbeat', func=self.heartbeat, trigger='interval',
+                              seconds=self.heartbeat_seconds, replace_existing=True)
+
+    def on_elected(self, callback):
+        """Call ``callback`` each time this process takes over the lease."""
+        self._elected_callbacks.append(callback)
+
+    def is_leader(self) -> bool:
+        """Whether this process may run scheduled jobs right now."""
+        if not self.enabled:
+            return True
+        self._check_fork()
+        if time.monotonic() < self._leader_until:
+            return True
+        return self.try_acquire()
+
+    def heartbeat(self):
+        """Renew the lease if held, or take it over if it has expired."""
+        with self.app.app_context():
+            try:
+                self.try_acquire()
+            except Exception as e:
+                logger.error(f"Leader heartbeat failed: {str(e)}")
+
+    def try_acquire(self) -> bool:
+        """Take or renew the lease; returns whether this process holds it."""
+        from app.core.extensions import db
+        from app.models.scheduler_lease import SchedulerLease
+
+        with self._lock:
+            self._check_fork()
+            # Measured before asking, so our view expires no later than the row's
+            valid_until = time.monotonic() + self.lease_seconds
+            now = datetime.utcnow()
+            expires_at = now + timedelta(seconds=self.lease_seconds)
+            was_leader = self._leader_until > 0
+
+            try:
+                result = db.session.execute(
+                    db.update(SchedulerLease).where(
+                        SchedulerLease.name == self.name,
+                        db.or_(SchedulerLease.holder == self.identity, SchedulerLease.expires_at < now)
+                    ).values(
+                        holder=self.identity,
+                        expires_at=expires_at,
+                        acquired_at=db.case((SchedulerLease.holder == self.identity, SchedulerLease.acquired_at),
+                                            else_=now)
+                    ),
+                    execution_options={'synchronize_session': False}
+                )
+                acquired = result.rowcount == 1
+                if not acquired and db.session.get(SchedulerLease, self.name) is None:
+                    db.session.add(SchedulerLease(name=self.name, holder=self.identity,
+                                                  acquired_at=now, expires_at=expires_at))
+                    db.session.flush()
+                    acquired = True
+                db.session.commit()
+            except IntegrityError:
+                # Another process created the lease first
+                db.session.rollback()
+                acquired = False
+
+            self._leader_until = valid_until if acquired else 0.0
+            if acquired and not was_leader:
+                logger.info(f"{self.identity} is now the {self.name} leader")
+            elif was_leader and not acquired:
+                logger.warning(f"{self.identity} lost the {self.name} lease")
+            elected = acquired and not was_leader
+
+        if elected:
+            for callback in self._elected_callbacks:
+                try:
+                    callback()
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"{self.name} election callback failed: {str(e)}")
+        return acquired
+
+    def release(self):
+        """Give the lease up so a standby can take over immediately."""
+        from app.core.extensions import db
+        from app.models.scheduler_lease import SchedulerLease
+        with self._lock:
+            if not self._leader_until:
+                return
+            self._leader_until = 0.0
+            db.session.execute(
+                db.update(SchedulerLease).where(
+                    SchedulerLease.name == self.name,
+                    SchedulerLease.holder == self.identity
+                ).values(expires_at=datetime.utcnow()),
+                execution_options={'synchronize_session': False}
+            )
+            db.session.commit()
+
+    def _release_at_exit(self):
+        if self.app is None or not self._leader_until:
+            return
+        try:
+            with self.app.app_context():
+                self.release()
+        except Exception as e:
+            logger.warning(f"Could not release the {self.name} lease: {str(e)}")
+
+    def _check_fork(self):
+        """Give a forked worker its own identity; it does not inherit leadership."""
+        pid = os.getpid()
+        if pid != self._pid:
+            self._pid = pid
+            self.identity = f'{socket.gethostname()}:{pid}:{uuid.uuid4().hex[:8]}'
+            self._leader_until = 0.0
@@ -0,0 +1,111 @@
+import queue
+import threading
+from typing import Dict, Optional, Set
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# Key in Session.info holding users whose notifications changed in this transaction
+PENDING_USERS_KEY = 'notification_broker_users'
+
+# Marker for "wake every subscriber" (bulk statements with unknown users)
+ALL_USERS = None
+
+class NotificationBroker:
+    """In-process pub/sub that wakes notification streams on new activity.
+
+    Streams subscribe per user and get a wake-up whenever a transaction that
+    inserted, updated or deleted that user's notifications commits in this
+    process; bulk statements on ``notifications`` wake every stream. Wake-ups
+    carry no payload: the stream reads what changed from the database, so a
+    missed or coalesced wake-up loses nothing. Changes committed by other
+    processes are picked up by the streams' periodic database poll.
+    """
+
+    def __init__(self, app=None):
+        self._subscribers: Dict[int, Set[queue.Queue]] = {}
+        self._lock = threading.Lock()
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Start following ORM writes to notifications."""
+        if not self._listening:
+            event.listen(Session, 'after_flush', self._after_flush)
+            event.listen(Session, 'after_commit', self._after_commit)
+            event.listen(Session, 'after_rollback', self._after_rollback)
+            event.listen(Session, 'do_orm_execute', self._on_orm_execute)
+            self._listening = True
+
+    def detach(self):
+        """Stop following ORM writes."""
+        if self._listening:
+            event.remove(Session, 'after_flush', self._after_flush)
+            event.remove(Session, 'after_commit', self._after_commit)
+            event.remove(Session, 'after_rollback', self._after_rollback)
+            event.remove(Session, 'do_orm_execute', self._on_orm_execute)
+            self._listening = False
+
+    def subscribe(self, user_id: int) -> queue.Queue:
+        """Register a stream for ``user_id``; wait on the returned queue for wake-ups."""
+        # One slot is enough: pending wake-ups coalesce into one
+        subscription = queue.Queue(maxsize=1)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, user_id: int, subscription: queue.Queue):
+        """Remove a stream registered with ``subscribe``."""
+        with self._lock:
+            subscriptions = self._subscribers.get(user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscribers[user_id]
+
+    def publish(self, user_id: Optional[int]):
+        """Wake the streams of ``user_id``, or every stream if it is ``None``."""
+        with self._lock:
+            if user_id is ALL_USERS:
+                subscriptions = [s for group in self._subscribers.values() for s in group]
+            else:
+                subscriptions = list(self._subscribers.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.put_nowait(True)
+            except queue.Full:
+                pass
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(group) for group in self._subscribers.values())
+
+    # ORM event handlers
+
+    def _after_flush(self, session, flush_context):
+        from app.models.notification import Notification
+        users = session.info.setdefault(PENDING_USERS_KEY, set())
+        for notification in list(session.new) + list(session.dirty) + list(session.deleted):
+            if isinstance(notification, Notification):
+                users.add(notification.user_id)
+
+    def _after_commit(self, session):
+        users = session.info.pop(PENDING_USERS_KEY, None)
+        if not users:
+            return
+        if ALL_USERS in users:
+            self.publish(ALL_USERS)
+            return
+        for user_id in users:
+            self.publish(user_id)
+
+    def _after_rollback(self, session):
+        session.info.pop(PENDING_USERS_KEY, None)
+
+    def _on_orm_execute(self, orm_execute_state):
+        from app.models.notification import Notification
+        if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+            return
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and mapper.class_ is Notification:
+            orm_execute_state.session.info.setdefault(PENDING_USERS_KEY, set()).add(ALL_USERS)
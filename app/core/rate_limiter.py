@@ -0,0 +1,28 @@
+import threading
+import time
+
+class RateLimiter:
+    """Thread-safe pacing of sends to at most ``rate`` per second.
+
+    Each ``acquire(count)`` reserves the next ``count`` slots and sleeps until
+    the first of them, so callers sharing a limiter are spaced out evenly
+    instead of bursting. A rate of 0 or less disables the limit.
+    """
+
+    def __init__(self, rate: float = 0):
+        self.rate = rate
+        self._next_free = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, count: int = 1) -> float:
+        """Wait for ``count`` slots; returns the seconds slept."""
+        if self.rate <= 0 or count <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_free)
+            self._next_free = start + count / self.rate
+        wait = start - now
+        if wait > 0:
+            time.sleep(wait)
+        return max(wait, 0.0)
@@ -1,7 +1,13 @@
 """Models package."""
 from app.models.base import BaseModel
 from app.models.user import User
-from app.models.item import Item
-from app.models.notification import Notification
+from app.models.item import Item, ItemArchive
+from app.models.notification import Notification, NotificationArchive
+from app.models.email_outbox import EmailOutbox
+from app.models.notification_delivery import NotificationDelivery
+from app.models.job_run import JobRun
+from app.models.zoho_deactivation import ZohoDeactivation
+from app.models.scheduler_lease import SchedulerLease
+from app.models.job_watermark import JobWatermark
 
-__all__ = ['BaseModel', 'User', 'Item', 'Notification'] 
\ No newline at end of file
+__all__ = ['BaseModel', 'User', 'Item', 'ItemArchive', 'Notification', 'NotificationArchive', 'EmailOutbox', 'NotificationDelivery', 'JobRun', 'ZohoDeactivation', 'SchedulerLease', 'JobWatermark'] 
\ No newline at end of file
@@ -0,0 +1,64 @@
+from datetime import datetime
+from app.core.extensions import db
+from app.models.base import BaseModel
+
+# Outbox statuses
+OUTBOX_PENDING = 'pending'
+OUTBOX_SENDING = 'sending'
+OUTBOX_SENT = 'sent'
+OUTBOX_FAILED = 'failed'
+
+class EmailOutbox(BaseModel):
+    """An email waiting to be sent by the outbox sender.
+    
+    Rows are written in the same transaction as the change that produced
+    them and delivered later, so SMTP latency or outages never block the
+    writer and a failed send is retried instead of lost.
+    
+    Attributes:
+        recipient (str): Address the email is sent to
+        subject (str): Subject line
+        template (str): Template name under ``templates/emails``
+        context (dict): JSON-serialisable template variables
+        status (str): pending, sending, sent or failed
+        attempts (int): Delivery attempts made so far
+        next_attempt_at (datetime): When the row may next be claimed; while
+            ``sending`` this is the end of the sender's lease
+        last_error (str): Error from the most recent failed attempt
+        sent_at (datetime): When the email was delivered
+    """
+    
+    __tablename__ = 'email_outbox'
+    __table_args__ = (
+        db.Index('idx_email_outbox_due', 'status', 'next_attempt_at'),
+    )
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+    recipient = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(200), nullable=False)
+    template = db.Column(db.String(100), nullable=False)
+    context = db.Column(db.JSON, nullable=False, default=dict)
+    status = db.Column(db.String(20), nullable=False, default=OUTBOX_PENDING)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.Text)
+    sent_at = db.Column(db.DateTime)
+    
+    def to_dict(self):
+        """Convert outbox entry to dictionary."""
+        data = super().to_dict()
+        data.update({
+            'user_id': self.user_id,
+            'recipient': self.recipient,
+            'subject': self.subject,
+            'template': self.template,
+            'status': self.status,
+            'attempts': self.attempts,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'last_error': self.last_error,
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None
+        })
+        return data
+    
+    def __repr__(self):
+        return f'<EmailOutbox {self.id}: {self.template} to {self.recipient} ({self.status})>'
@@ -1,4 +1,6 @@
-from datetime import datetime
+from datetime import date, datetime, timedelta
+from sqlalchemy import DDL, event
+from sqlalchemy.orm import Session, with_loader_criteria
 from app.core.extensions import db
 from app.models.base import BaseModel
 
@@ -12,6 +14,12 @@ STATUS_PENDING = 'Pending Expiry Date'
 EXPIRING_SOON_DAYS = 30
 PENDING_STATUS_HOURS = 24
 
+# Search index
+SEARCH_FTS_TABLE = 'items_fts'
+
+# Execution option that lets an ORM statement see soft-deleted items
+INCLUDE_DELETED = 'include_deleted'
+
 class Item(BaseModel):
     """Item model for inventory management.
     
@@ -29,7 +37,7 @@ class Item(BaseModel):
         unit (str): Unit of measurement
         batch_number (str): Optional batch number
         purchase_date (datetime): Date of purchase
-        expiry_date (datetime): Expiry date
+        expiry_date (date): Expiry date
         purchase_price (float): Original purchase price
         selling_price (float): Current selling price
         cost_price (float): Cost price for inventory valuation
@@ -39,9 +47,27 @@ class Item(BaseModel):
         image_url (str): Optional URL to item image
         status (str): Current status (Active/Expired/Expiring Soon/Pending)
         zoho_item_id (str): Unique identifier in Zoho Inventory
+        deleted_at (datetime): When the cleanup soft-deleted the item (UTC)
+    
+    Soft-deleted items are hidden from every ORM query unless it is run
+    with the ``include_deleted`` execution option (see ``including_deleted``),
+    and are later moved to ``items_archive`` by ``purge_deleted_items``.
     """
     
     __tablename__ = 'items'
+    __table_args__ = (
+        db.Index('idx_user_expiry', 'user_id', 'expiry_date',
+                 postgresql_where=db.text('deleted_at IS NULL'),
+                 sqlite_where=db.text('deleted_at IS NULL')),
+        db.Index('idx_expiry_date', 'expiry_date',
+                 postgresql_where=db.text('expiry_date IS NOT NULL'),
+                 sqlite_where=db.text('expiry_date IS NOT NULL')),
+        # Polled by the alert scheduler for writes from other processes
+        db.Index('idx_items_updated_at', 'updated_at'),
+        db.Index('idx_items_deleted_at', 'deleted_at',
+                 postgresql_where=db.text('deleted_at IS NOT NULL'),
+                 sqlite_where=db.text('deleted_at IS NOT NULL')),
+    )
     
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
@@ -49,7 +75,7 @@ class Item(BaseModel):
     unit = db.Column(db.String(20))
     batch_number = db.Column(db.String(50))
     purchase_date = db.Column(db.DateTime)
-    expiry_date = db.Column(db.DateTime)
+    expiry_date = db.Column(db.Date)
     purchase_price = db.Column(db.Float)
     selling_price = db.Column(db.Float)
     cost_price = db.Column(db.Float)
@@ -59,6 +85,7 @@ class Item(BaseModel):
     image_url = db.Column(db.String(255))
     status_changed_at = db.Column(db.DateTime)
     status = db.Column(db.String(20), default='Pending Expiry Date')
+    deleted_at = db.Column(db.DateTime)
     
     # Foreign keys
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -72,34 +99,50 @@ class Item(BaseModel):
         """Calculate days until expiry."""
         if not self.expiry_date:
             return None
-        current_date = datetime.now().date()
-        # Convert expiry_date to date if it's a datetime
-        expiry_date = self.expiry_date.date() if isinstance(self.expiry_date, datetime) else self.expiry_date
-        days = (expiry_date - current_date).days
-        return days
+        return (self.expiry_date - date.today()).days
     
     @property
     def is_expired(self):
         """Check if item is expired."""
         if not self.expiry_date:
             return False
-        current_date = datetime.now().date()
-        # Convert expiry_date to date if it's a datetime
-        expiry_date = self.expiry_date.date() if isinstance(self.expiry_date, datetime) else self.expiry_date
-        is_expired = expiry_date <= current_date
-        return is_expired
+        return self.expiry_date <= date.today()
     
     @property
     def is_near_expiry(self):
         """Check if item is near expiry (within 30 days)."""
         if not self.expiry_date:
             return False
-        current_date = datetime.now().date()
-        # Convert expiry_date to date if it's a datetime
-        expiry_date = self.expiry_date.date() if isinstance(self.expiry_date, datetime) else self.expiry_date
-        days = (expiry_date - current_date).days
-        is_near = 0 < days <= 30
-        return is_near
+        days = (self.expiry_date - date.today()).days
+        return 0 < days <= 30
+    
+    @classmethod
+    def expiring_query(cls, user_id, horizon_days=EXPIRING_SOON_DAYS):
+        """Query a user's items expiring within the next ``horizon_days`` days.
+        
+        Matches the ``is_near_expiry`` semantics (expires after today and no
+        later than today + horizon) as a range on ``expiry_date`` so it can be
+        served by the ``(user_id, expiry_date)`` index. Soonest expiry first.
+        """
+        today = date.today()
+        return cls.query.filter(
+            cls.user_id == user_id,
+            cls.expiry_date > today,
+            cls.expiry_date <= today + timedelta(days=horizon_days)
+        ).order_by(cls.expiry_date.asc(), cls.id.asc())
+    
+    @classmethod
+    def expired_query(cls, user_id):
+        """Query a user's expired items (expiry on or before today), soonest first."""
+        return cls.query.filter(
+            cls.user_id == user_id,
+            cls.expiry_date <= date.today()
+        ).order_by(cls.expiry_date.asc(), cls.id.asc())
+    
+    @classmethod
+    def including_deleted(cls):
+        """Query items including soft-deleted ones awaiting the purge."""
+        return cls.query.execution_options(**{INCLUDE_DELETED: True})
     
     def set_discount(self, percentage):
         """Set discounted price based on percentage."""
@@ -109,17 +152,15 @@ class Item(BaseModel):
     
     def to_dict(self):
         """Convert item to dictionary."""
-        current_date = datetime.now().date()
+        current_date = date.today()
         days_until_expiry = None
         status = 'Unknown'
 
         if self.expiry_date:
-            # Convert expiry_date to date if it's a datetime
-            expiry_date = self.expiry_date.date() if isinstance(self.expiry_date, datetime) else self.expiry_date
-            if expiry_date <= current_date:
+            if self.expiry_date <= current_date:
                 status = STATUS_EXPIRED
             else:
-                days_until_expiry = (expiry_date - current_date).days
+                days_until_expiry = (self.expiry_date - current_date).days
                 if days_until_expiry <= EXPIRING_SOON_DAYS:
                     status = STATUS_EXPIRING_SOON
                 else:
@@ -178,7 +219,8 @@ class Item(BaseModel):
     def validate_dates(self):
         """Validate date relationships."""
         if self.purchase_date and self.expiry_date:
-            if self.purchase_date > self.expiry_date:
+            purchase_date = self.purchase_date.date() if isinstance(self.purchase_date, datetime) else self.purchase_date
+            if purchase_date > self.expiry_date:
                 raise ValueError("Purchase date cannot be after expiry date")
     
     def validate(self):
@@ -199,10 +241,7 @@ class Item(BaseModel):
             self.status = 'Pending Expiry Date'
             return
             
-        current_date = datetime.now().date()
-        # Convert expiry_date to date if it's a datetime
-        expiry_date = self.expiry_date.date() if isinstance(self.expiry_date, datetime) else self.expiry_date
-        days_until_expiry = (expiry_date - current_date).days
+        days_until_expiry = (self.expiry_date - date.today()).days
         
         old_status = self.status
         if days_until_expiry <= 0:
@@ -226,4 +265,92 @@ class Item(BaseModel):
             self.status = 'Active'
             
         if old_status != self.status:
-            db.session.commit() 
\ No newline at end of file
+            db.session.commit() 
+
+
+class ItemArchive(db.Model):
+    """Cold storage for expired items purged from ``items``, kept for waste reporting."""
+    __tablename__ = 'items_archive'
+    __table_args__ = (
+        db.Index('idx_items_archive_user_deleted', 'user_id', 'deleted_at'),
+    )
+    
+    # Same ids as the hot table; rows are copied, not re-numbered
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, nullable=False)
+    name = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.Text)
+    quantity = db.Column(db.Float)
+    unit = db.Column(db.String(20))
+    batch_number = db.Column(db.String(50))
+    purchase_date = db.Column(db.DateTime)
+    expiry_date = db.Column(db.Date)
+    purchase_price = db.Column(db.Float)
+    selling_price = db.Column(db.Float)
+    cost_price = db.Column(db.Float)
+    discounted_price = db.Column(db.Float)
+    location = db.Column(db.String(100))
+    status = db.Column(db.String(20))
+    zoho_item_id = db.Column(db.String(100))
+    created_at = db.Column(db.DateTime)
+    deleted_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ItemArchive {self.name}>'
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _exclude_deleted_items(orm_execute_state):
+    """Add ``deleted_at IS NULL`` for items to ORM selects, updates and deletes.
+
+    Relationship lazy loads are covered too, so ``user.items`` never lists a
+    soft-deleted item even for a user that was not itself loaded by a query.
+    """
+    if (
+        (orm_execute_state.is_select or orm_execute_state.is_update or orm_execute_state.is_delete)
+        and not orm_execute_state.is_column_load
+        and not orm_execute_state.execution_options.get(INCLUDE_DELETED, False)
+    ):
+        orm_execute_state.statement = orm_execute_state.statement.options(
+            with_loader_criteria(Item, lambda cls: cls.deleted_at.is_(None), include_aliases=True)
+        )
+
+
+# Search index DDL. On PostgreSQL the searchable columns get pg_trgm GIN
+# indexes so substring and similarity lookups avoid a sequential scan. On
+# SQLite an external-content FTS5 table shadows the same columns and is kept
+# in sync by triggers. Migrations create the same objects for existing
+# databases; these listeners cover databases built with ``db.create_all()``.
+event.listen(
+    Item.__table__, 'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql')
+)
+for _column in ('name', 'description', 'unit'):
+    event.listen(
+        Item.__table__, 'after_create',
+        DDL(
+            f'CREATE INDEX IF NOT EXISTS idx_items_{_column}_trgm '
+            f'ON items USING gin ({_column} gin_trgm_ops)'
+        ).execute_if(dialect='postgresql')
+    )
+for _statement in (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_FTS_TABLE} USING fts5("
+    f"name, description, unit, content='items', content_rowid='id')",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_FTS_TABLE}_ai AFTER INSERT ON items BEGIN "
+    f"INSERT INTO {SEARCH_FTS_TABLE}(rowid, name, description, unit) "
+    f"VALUES (new.id, new.name, new.description, new.unit); END",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_FTS_TABLE}_ad AFTER DELETE ON items BEGIN "
+    f"INSERT INTO {SEARCH_FTS_TABLE}({SEARCH_FTS_TABLE}, rowid, name, description, unit) "
+    f"VALUES ('delete', old.id, old.name, old.description, old.unit); END",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_FTS_TABLE}_au AFTER UPDATE OF name, description, unit ON items BEGIN "
+    f"INSERT INTO {SEARCH_FTS_TABLE}({SEARCH_FTS_TABLE}, rowid, name, description, unit) "
+    f"VALUES ('delete', old.id, old.name, old.description, old.unit); "
+    f"INSERT INTO {SEARCH_FTS_TABLE}(rowid, name, description, unit) "
+    f"VALUES (new.id, new.name, new.description, new.unit); END",
+):
+    event.listen(Item.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+event.listen(
+    Item.__table__, 'before_drop',
+    DDL(f'DROP TABLE IF EXISTS {SEARCH_FTS_TABLE}').execute_if(dialect='sqlite')
+)
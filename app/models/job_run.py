@@ -0,0 +1,60 @@
+from datetime import datetime
+from app.core.extensions import db
+from app.models.base import BaseModel
+
+# Job run statuses
+JOB_RUNNING = 'running'
+JOB_SUCCEEDED = 'succeeded'
+JOB_FAILED = 'failed'
+
+class JobRun(BaseModel):
+    """One run of a registered background job.
+    
+    Attributes:
+        job_id (str): Registered job name, e.g. ``cleanup_expired_items``
+        trigger (str): scheduled, manual or backfill
+        run_for (date): Day a backfill run processed
+        status (str): running, succeeded or failed
+        started_at (datetime): When the run started (UTC)
+        finished_at (datetime): When the run ended (UTC)
+        duration_seconds (float): Wall time of the run
+        rows_processed (int): Rows the job reported handling
+        error (str): Error that ended a failed run
+        worker (str): ``host:pid`` of the process that ran the job
+    """
+    
+    __tablename__ = 'job_runs'
+    __table_args__ = (
+        db.Index('idx_job_runs_job_started', 'job_id', 'started_at'),
+    )
+    
+    job_id = db.Column(db.String(100), nullable=False)
+    trigger = db.Column(db.String(20), nullable=False, default='scheduled')
+    run_for = db.Column(db.Date)
+    status = db.Column(db.String(20), nullable=False, default=JOB_RUNNING)
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    duration_seconds = db.Column(db.Float)
+    rows_processed = db.Column(db.Integer)
+    error = db.Column(db.Text)
+    worker = db.Column(db.String(100))
+    
+    def to_dict(self):
+        """Convert job run to dictionary."""
+        data = super().to_dict()
+        data.update({
+            'job_id': self.job_id,
+            'trigger': self.trigger,
+            'run_for': self.run_for.isoformat() if self.run_for else None,
+            'status': self.status,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'duration_seconds': self.duration_seconds,
+            'rows_processed': self.rows_processed,
+            'error': self.error,
+            'worker': self.worker
+        })
+        return data
+    
+    def __repr__(self):
+        return f'<JobRun {self.job_id} {self.started_at} ({self.status})>'
@@ -0,0 +1,39 @@
+from datetime import date, datetime
+from typing import Optional
+from app.core.extensions import db
+
+class JobWatermark(db.Model):
+    """The last day a daily job has fully processed.
+    
+    Jobs that work through days in order keep their progress here, so a
+    run after a missed night knows where to resume from.
+    
+    Attributes:
+        job_id (str): Registered job name, e.g. ``cleanup_expired_items``
+        processed_through (date): Every day up to and including this is done
+        updated_at (datetime): When the watermark last moved (UTC)
+    """
+    
+    __tablename__ = 'job_watermarks'
+    
+    job_id = db.Column(db.String(100), primary_key=True)
+    processed_through = db.Column(db.Date, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    @classmethod
+    def get(cls, job_id: str) -> Optional[date]:
+        """The day ``job_id`` has processed through, or None if it never has."""
+        watermark = db.session.get(cls, job_id)
+        return watermark.processed_through if watermark else None
+    
+    @classmethod
+    def advance(cls, job_id: str, day: date):
+        """Move the watermark forward to ``day``; never moves it back. Caller commits."""
+        watermark = db.session.get(cls, job_id)
+        if watermark is None:
+            db.session.add(cls(job_id=job_id, processed_through=day))
+        elif day > watermark.processed_through:
+            watermark.processed_through = day
+    
+    def __repr__(self):
+        return f'<JobWatermark {self.job_id} through {self.processed_through}>'
@@ -1,9 +1,31 @@
 from datetime import datetime
 from app.core.extensions import db
 
+# Status of notifications the user has not read yet
+STATUS_UNREAD = 'pending'
+
+def expiry_priority(days_until_expiry: int) -> str:
+    """Alert priority for an item expiring in ``days_until_expiry`` days."""
+    if days_until_expiry <= 3:
+        return 'high'
+    if days_until_expiry <= 7:
+        return 'normal'
+    return 'low'
+
 class Notification(db.Model):
     """Model for storing user notifications."""
     __tablename__ = 'notifications'
+    __table_args__ = (
+        db.Index('uq_notifications_dedup_key', 'dedup_key', unique=True),
+        db.Index('idx_notifications_user_created', 'user_id', db.text('created_at DESC')),
+        db.Index('idx_notifications_user_status', 'user_id', 'status'),
+        # Serves unlinking and the foreign key check when items are purged
+        db.Index('ix_notifications_item_id', 'item_id'),
+        # Unread counts are an index-only count over this user's entries
+        db.Index('idx_notifications_user_unread', 'user_id',
+                 postgresql_where=db.text(f"status = '{STATUS_UNREAD}'"),
+                 sqlite_where=db.text(f"status = '{STATUS_UNREAD}'")),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -14,6 +36,8 @@ class Notification(db.Model):
     status = db.Column(db.String(20), default='pending')
     is_read = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Deterministic key for generated alerts so reruns cannot duplicate them
+    dedup_key = db.Column(db.String(120))
     
     def to_dict(self):
         """Convert notification to dictionary."""
@@ -30,4 +54,43 @@ class Notification(db.Model):
         }
     
     def __repr__(self):
-        return f'<Notification {self.id}: {self.message}>' 
\ No newline at end of file
+        return f'<Notification {self.id}: {self.message}>'
+
+class NotificationArchive(db.Model):
+    """Cold storage for read or old notifications moved out of ``notifications``."""
+    __tablename__ = 'notifications_archive'
+    __table_args__ = (
+        db.Index('idx_notifications_archive_user_created', 'user_id', 'created_at'),
+    )
+    
+    # Same ids as the hot table; rows are copied, not re-numbered
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, nullable=False)
+    item_id = db.Column(db.Integer)
+    message = db.Column(db.String(500), nullable=False)
+    type = db.Column(db.String(20))
+    priority = db.Column(db.String(20))
+    status = db.Column(db.String(20))
+    is_read = db.Column(db.Boolean)
+    created_at = db.Column(db.DateTime)
+    dedup_key = db.Column(db.String(120))
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convert archived notification to dictionary."""
+        return {
+            'id': self.id,
+            'message': self.message,
+            'type': self.type,
+            'priority': self.priority,
+            'status': self.status,
+            'user_id': self.user_id,
+            'item_id': self.item_id,
+            'is_read': self.is_read,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'archived_at': self.archived_at.isoformat() if self.archived_at else None
+        }
+    
+    def __repr__(self):
+        return f'<NotificationArchive {self.id}: {self.message}>'
+
@@ -0,0 +1,65 @@
+from datetime import datetime
+from app.core.extensions import db
+from app.models.base import BaseModel
+
+# Delivery statuses
+DELIVERY_PENDING = 'pending'
+DELIVERY_SENT = 'sent'
+DELIVERY_FAILED = 'failed'
+
+class NotificationDelivery(BaseModel):
+    """Delivery of one notification over one external channel.
+    
+    The notification row itself is the in-app copy; email and SMS copies
+    are tracked here, one row per channel, so fanning a notification out
+    again only retries the channels that have not been sent.
+    
+    Attributes:
+        notification_id (int): Notification being delivered
+        channel (str): Channel name, e.g. ``email`` or ``sms``
+        status (str): pending, sent or failed
+        attempts (int): Delivery attempts made so far
+        last_error (str): Error from the most recent failed attempt
+        sent_at (datetime): When the channel accepted the message
+    """
+    
+    __tablename__ = 'notification_deliveries'
+    __table_args__ = (
+        db.Index('uq_notification_deliveries_channel', 'notification_id', 'channel', unique=True),
+    )
+    
+    notification_id = db.Column(db.Integer, db.ForeignKey('notifications.id', ondelete='CASCADE'), nullable=False)
+    channel = db.Column(db.String(20), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default=DELIVERY_PENDING)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text)
+    sent_at = db.Column(db.DateTime)
+    
+    def mark_sent(self):
+        """Record a successful send (committed by the caller)."""
+        self.status = DELIVERY_SENT
+        self.attempts += 1
+        self.sent_at = datetime.utcnow()
+        self.last_error = None
+    
+    def mark_failed(self, error=None):
+        """Record a failed send (committed by the caller)."""
+        self.status = DELIVERY_FAILED
+        self.attempts += 1
+        self.last_error = error
+    
+    def to_dict(self):
+        """Convert delivery to dictionary."""
+        data = super().to_dict()
+        data.update({
+            'notification_id': self.notification_id,
+            'channel': self.channel,
+            'status': self.status,
+            'attempts': self.attempts,
+            'last_error': self.last_error,
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None
+        })
+        return data
+    
+    def __repr__(self):
+        return f'<NotificationDelivery {self.notification_id} via {self.channel} ({self.status})>'
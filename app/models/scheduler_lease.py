@@ -0,0 +1,21 @@
+from app.core.extensions import db
+
+class SchedulerLease(db.Model):
+    """A named lease held by one process at a time, e.g. scheduler leadership.
+
+    Attributes:
+        name (str): What the lease is for
+        holder (str): ``host:pid:token`` of the process holding it
+        acquired_at (datetime): When the current holder took it over (UTC)
+        expires_at (datetime): When other processes may take it over (UTC)
+    """
+
+    __tablename__ = 'scheduler_leases'
+
+    name = db.Column(db.String(100), primary_key=True)
+    holder = db.Column(db.String(200), nullable=False)
+    acquired_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f'<SchedulerLease {self.name} held by {self.holder} until {self.expires_at}>'
@@ -23,6 +23,9 @@ class User(UserMixin, BaseModel):
     email_notifications = db.Column(db.Boolean, default=True)
     sms_notifications = db.Column(db.Boolean, default=False)
     in_app_notifications = db.Column(db.Boolean, default=True)
+    phone_number = db.Column(db.String(20))  # E.164, e.g. +15551234567; needed for SMS
+    last_digest_sent_at = db.Column(db.DateTime, index=True)
+    timezone = db.Column(db.String(50))  # IANA name; digests are delivered in the user's morning
     
     # Relationships
     items = db.relationship('Item', backref='user', lazy=True)
@@ -46,7 +49,8 @@ class User(UserMixin, BaseModel):
             'is_admin': self.is_admin,
             'email_notifications': self.email_notifications,
             'sms_notifications': self.sms_notifications,
-            'in_app_notifications': self.in_app_notifications
+            'in_app_notifications': self.in_app_notifications,
+            'phone_number': self.phone_number
         })
         return data
     
@@ -0,0 +1,40 @@
+from app.core.extensions import db
+from app.models.base import BaseModel
+
+# Deactivation statuses
+DEACTIVATION_PENDING = 'pending'
+DEACTIVATION_DONE = 'done'
+DEACTIVATION_FAILED = 'failed'
+
+class ZohoDeactivation(BaseModel):
+    """A Zoho item to mark inactive, queued by the expired-item cleanup.
+    
+    Zoho tokens live in the user's session, so scheduled jobs cannot call
+    Zoho themselves. The cleanup queues a row in the same transaction that
+    soft-deletes the item. The next time the user's inventory is synced, the
+    queue is handed to a background job along with the session's access
+    token, and the sync skips queued items so they are not imported again.
+    
+    Attributes:
+        user_id (int): Owner of the deleted item
+        zoho_item_id (str): Item to mark inactive in Zoho
+        status (str): pending, done or failed
+        attempts (int): Calls made so far
+        last_error (str): Why the most recent call failed
+        processed_at (datetime): When Zoho accepted the change
+    """
+    
+    __tablename__ = 'zoho_deactivations'
+    __table_args__ = (
+        db.Index('idx_zoho_deactivations_user_status', 'user_id', 'status'),
+    )
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    zoho_item_id = db.Column(db.String(100), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default=DEACTIVATION_PENDING)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text)
+    processed_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<ZohoDeactivation {self.zoho_item_id} ({self.status})>'
@@ -4,6 +4,8 @@ from app.core.extensions import db
 from app.models.item import Item
 from app.services.notification_service import NotificationService
 from app.services.zoho_service import ZohoService
+from app.services.inventory_service import InventoryService
+from app.services.search_service import SearchService
 from datetime import datetime, timedelta
 from flask import session
 from app.models.user import User
@@ -21,36 +23,26 @@ def index():
 @login_required
 def dashboard():
     """User dashboard."""
-    with current_app.app_context():
-        notification_service = NotificationService()
-        
-        # Get user's inventory items
-        items = Item.query.filter_by(user_id=current_user.id).all()
-        current_app.logger.info(f"Found {len(items)} total items for user {current_user.id}")
-        
-        # Update status for all items
-        for item in items:
-            item.update_status()
-            current_app.logger.info(f"Item {item.name} (ID: {item.id}): status={item.status}, expiry_date={item.expiry_date}, days_until_expiry={item.days_until_expiry}")
-        
-        # Get expiring and expired items using model properties
-        expiring_items = [item for item in items if item.is_near_expiry]
-        expired_items = [item for item in items if item.is_expired]
-        
-        current_app.logger.info(f"Dashboard counts - Expiring: {len(expiring_items)}, Expired: {len(expired_items)}")
-        for item in expiring_items:
-            current_app.logger.info(f"Expiring item: {item.name} (ID: {item.id}), days until expiry: {item.days_until_expiry}")
-        for item in expired_items:
-            current_app.logger.info(f"Expired item: {item.name} (ID: {item.id}), days until expiry: {item.days_until_expiry}")
-        
-        # Get recent notifications
-        notifications = notification_service.get_user_notifications(current_user.id, limit=5)
-        
-        return render_template('dashboard.html',
-                             items=items,
-                             expiring_items=expiring_items,
-                             expired_items=expired_items,
-                             notifications=notifications)
+    notification_service = NotificationService()
+    inventory_service = InventoryService()
+    
+    # Refresh statuses whose bucket changed since the nightly run (nothing once it has run today)
+    inventory_service.refresh_statuses(current_user.id)
+    
+    # Aggregate counts and the soonest-expiring items without loading the inventory
+    summary = inventory_service.get_summary(current_user.id)
+    current_app.logger.info(
+        f"Dashboard counts for user {current_user.id} - Total: {summary['total_items']}, "
+        f"Expiring: {summary['counts']['expiring_soon']}, Expired: {summary['counts']['expired']}"
+    )
+    
+    # Get recent notifications
+    notifications = notification_service.get_user_notifications(current_user.id, limit=5)
+    
+    return render_template('dashboard.html',
+                         summary=summary,
+                         expiring_items=summary['upcoming'],
+                         notifications=notifications)
 
 @main_bp.route('/inventory')
 @login_required
@@ -68,14 +60,7 @@ def inventory():
     if not sync_success:
         flash('Failed to sync with Zoho inventory. Please check your connection in Settings.', 'error')
     
-    # Update status for all items based on expiry date
-    items = Item.query.filter_by(user_id=current_user.id).all()
-    current_app.logger.info(f"Found {len(items)} total items for user {current_user.id}")
-    
-    for item in items:
-        item.update_status()
-        current_app.logger.info(f"Item {item.name} (ID: {item.id}): status={item.status}, expiry_date={item.expiry_date}, days_until_expiry={item.days_until_expiry}")
-    
+    # Stored statuses are kept current by refresh_statuses and the nightly job
     # Get filter parameters
     status = request.args.get('status')
     search = request.args.get('search', '').strip()
@@ -108,24 +93,13 @@ def inventory():
             )
             current_app.logger.info("Filtering for active items")
     
-    # Apply search filter
+    # Apply search filter (indexed and ranked by relevance)
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            db.or_(
-                Item.name.ilike(search_term),
-                Item.description.ilike(search_term),
-                Item.unit.ilike(search_term)
-            )
-        )
+        query = SearchService().apply_search(query, search)
     
     items = query.all()
     current_app.logger.info(f"Inventory view counts - Total: {len(items)}, Status filter: {status}")
     
-    # Update status for all items based on expiry date
-    for item in items:
-        item.update_status()
-    
     # Log items by status
     expired_count = len([item for item in items if item.status == 'Expired'])
     expiring_count = len([item for item in items if item.status == 'Expiring Soon'])
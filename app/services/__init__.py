@@ -2,5 +2,11 @@
 from app.services.zoho_service import ZohoService
 from app.services.notification_service import NotificationService
 from app.services.ocr_service import OCRService
+from app.services.inventory_service import InventoryService
+from app.services.search_service import SearchService
+from app.services.email_outbox_service import EmailOutboxService
+from app.services.notification_runner import NotificationRunner
+from app.services.digest_schedule import DigestSchedule
+from app.services.notification_fanout import NotificationFanout
 
-__all__ = ['ZohoService', 'NotificationService', 'OCRService'] 
\ No newline at end of file
+__all__ = ['ZohoService', 'NotificationService', 'OCRService', 'InventoryService', 'SearchService', 'EmailOutboxService', 'NotificationRunner', 'DigestSchedule', 'NotificationFanout'] 
\ No newline at end of file
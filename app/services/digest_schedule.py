@@ -0,0 +1,72 @@
+import zlib
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from flask import current_app
+
+class DigestSchedule:
+    """Delivery windows for daily digest emails.
+
+    Every user gets a fixed slot inside a window of ``DIGEST_WINDOW_MINUTES``
+    that opens at ``DIGEST_LOCAL_HOUR`` in their own timezone (or
+    ``DIGEST_DEFAULT_TIMEZONE`` if they have not set one). The slot's offset
+    into the window is a hash of the user id, so digests for users in the
+    same timezone are spread over the window instead of all being due at the
+    same second. Queued digests carry their slot as the outbox row's due
+    time, and the outbox sender delivers them in small batches as they come
+    due across the day, counting each item's days until expiry from the
+    user's date at that moment.
+    """
+
+    def __init__(self):
+        config = current_app.config
+        self.local_hour = config.get('DIGEST_LOCAL_HOUR', 8)
+        self.window_minutes = config.get('DIGEST_WINDOW_MINUTES', 180)
+        self.default_timezone = config.get('DIGEST_DEFAULT_TIMEZONE', 'UTC')
+
+    @staticmethod
+    def is_valid_timezone(name: Optional[str]) -> bool:
+        """Whether ``name`` is an IANA timezone name such as ``Europe/Berlin``."""
+        if not name:
+            return False
+        try:
+            ZoneInfo(name)
+        except (ZoneInfoNotFoundError, ValueError):
+            return False
+        return True
+
+    def offset(self, user_id: int) -> timedelta:
+        """The user's stable offset into the delivery window."""
+        window_seconds = max(int(self.window_minutes * 60), 1)
+        return timedelta(seconds=zlib.crc32(str(user_id).encode()) % window_seconds)
+
+    def send_at(self, user_id: int, timezone: Optional[str] = None,
+                now: Optional[datetime] = None) -> datetime:
+        """When a digest queued ``now`` should be sent, as naive UTC.
+
+        That is the next occurrence of the user's slot: today if it is still
+        ahead, otherwise tomorrow, so a digest produced in the user's evening
+        arrives the next morning rather than overnight.
+        """
+        now = now or datetime.utcnow()
+        zone = self._zone(timezone)
+        local_now = now.replace(tzinfo=dt_timezone.utc).astimezone(zone)
+        local_day = local_now.date()
+        slot = self._slot(user_id, local_day, zone)
+        if slot < local_now:
+            slot = self._slot(user_id, local_day + timedelta(days=1), zone)
+        return slot.astimezone(dt_timezone.utc).replace(tzinfo=None)
+
+    def local_date(self, timezone: Optional[str] = None, now: Optional[datetime] = None) -> date:
+        """The user's calendar date at ``now`` (naive UTC)."""
+        now = now or datetime.utcnow()
+        return now.replace(tzinfo=dt_timezone.utc).astimezone(self._zone(timezone)).date()
+
+    def _slot(self, user_id: int, day: date, zone: ZoneInfo) -> datetime:
+        opens = datetime.combine(day, time(hour=self.local_hour), tzinfo=zone)
+        return opens + self.offset(user_id)
+
+    def _zone(self, name: Optional[str]) -> ZoneInfo:
+        if self.is_valid_timezone(name):
+            return ZoneInfo(name)
+        return ZoneInfo(self.default_timezone)
@@ -0,0 +1,89 @@
+import smtplib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, List, NamedTuple, Optional, Tuple
+from flask import current_app
+from flask_mail import Message
+from app.core.extensions import mail
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Errors after which the SMTP session is unusable and must be reopened
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+class DeliveryResult(NamedTuple):
+    """Outcome of sending one message."""
+    key: Any
+    recipients: List[str]
+    sent: bool
+    error: Optional[str] = None
+
+class EmailDispatcher:
+    """Send many messages over a few reused SMTP connections.
+
+    Messages are split into chunks of at most ``MAIL_MAX_MESSAGES_PER_CONNECTION``;
+    each chunk is sent over a single ``mail.connect()`` session and chunks are
+    spread across ``MAIL_DISPATCH_WORKERS`` threads. A dropped connection is
+    reopened and the message retried once; any other failure only affects the
+    message it happened on. Results are returned in input order.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_per_connection: Optional[int] = None):
+        self.workers = workers or current_app.config.get('MAIL_DISPATCH_WORKERS', 4)
+        self.max_per_connection = max_per_connection or current_app.config.get(
+            'MAIL_MAX_MESSAGES_PER_CONNECTION', 100
+        )
+
+    def dispatch(self, messages: Iterable[Tuple[Any, Message]]) -> List[DeliveryResult]:
+        """Send ``(key, message)`` pairs and report the outcome for each key."""
+        messages = list(messages)
+        if not messages:
+            return []
+
+        chunks = [
+            messages[start:start + self.max_per_connection]
+            for start in range(0, len(messages), self.max_per_connection)
+        ]
+        app = current_app._get_current_object()
+        workers = max(1, min(self.workers, len(chunks)))
+
+        if workers == 1:
+            chunk_results = [self._send_chunk(app, chunk) for chunk in chunks]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='mail') as executor:
+                chunk_results = list(executor.map(lambda chunk: self._send_chunk(app, chunk), chunks))
+
+        results = [result for chunk in chunk_results for result in chunk]
+        failed = sum(1 for result in results if not result.sent)
+        logger.info(f"Dispatched {len(results) - failed} of {len(results)} emails over {len(chunks)} connections")
+        return results
+
+    def _send_chunk(self, app, chunk: List[Tuple[Any, Message]]) -> List[DeliveryResult]:
+        """Send one chunk over a single SMTP session."""
+        results = []
+        with app.app_context():
+            try:
+                with mail.connect() as connection:
+                    for key, message in chunk:
+                        results.append(self._send_one(connection, key, message))
+            except Exception as e:
+                # Opening or closing the session failed; report what was not sent
+                logger.error(f"SMTP connection error: {str(e)}")
+                results.extend(
+                    DeliveryResult(key, list(message.send_to), False, str(e))
+                    for key, message in chunk[len(results):]
+                )
+        return results
+
+    def _send_one(self, connection, key: Any, message: Message) -> DeliveryResult:
+        recipients = list(message.send_to)
+        try:
+            try:
+                connection.send(message)
+            except CONNECTION_ERRORS:
+                connection.host = connection.configure_host()
+                connection.send(message)
+            return DeliveryResult(key, recipients, True)
+        except Exception as e:
+            logger.error(f"Error sending email to {recipients}: {str(e)}")
+            return DeliveryResult(key, recipients, False, str(e))
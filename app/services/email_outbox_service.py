@@ -0,0 +1,186 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from flask import current_app
+from app.core.extensions import db
+from app.models.email_outbox import EmailOutbox, OUTBOX_PENDING, OUTBOX_SENDING, OUTBOX_SENT, OUTBOX_FAILED
+from app.services.email_dispatcher import EmailDispatcher
+from app.services.email_service import EmailService
+import logging
+
+logger = logging.getLogger(__name__)
+
+class EmailOutboxService:
+    """Service for queueing emails and delivering them from the outbox.
+
+    ``enqueue`` only adds a row to the session, so it commits together with
+    whatever produced the email. Senders claim due rows with
+    ``FOR UPDATE SKIP LOCKED`` (on PostgreSQL), so any number of sender
+    processes can run side by side without picking the same rows. A claimed
+    row is leased for ``EMAIL_OUTBOX_LEASE_SECONDS``; if its sender dies the
+    row becomes claimable again once the lease runs out. Failed sends (and
+    expired leases) are retried with exponential backoff until
+    ``EMAIL_OUTBOX_MAX_ATTEMPTS``.
+    """
+
+    def __init__(self):
+        config = current_app.config
+        self.batch_size = config.get('EMAIL_OUTBOX_BATCH_SIZE', 100)
+        self.max_attempts = config.get('EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+        self.lease_seconds = config.get('EMAIL_OUTBOX_LEASE_SECONDS', 600)
+        self.backoff_seconds = config.get('EMAIL_OUTBOX_BACKOFF_SECONDS', 60)
+        self.max_backoff_seconds = config.get('EMAIL_OUTBOX_MAX_BACKOFF_SECONDS', 3600)
+
+    @staticmethod
+    def enqueue(recipient: str, subject: str, template: str, context: Dict,
+                user_id: Optional[int] = None, send_at: Optional[datetime] = None) -> EmailOutbox:
+        """Queue an email; it is committed with the caller's transaction.
+
+        ``send_at`` (naive UTC) holds the email back until then; by default
+        it is due immediately.
+        """
+        entry = EmailOutbox(
+            user_id=user_id,
+            recipient=recipient,
+            subject=subject,
+            template=template,
+            context=context,
+            next_attempt_at=send_at or datetime.utcnow()
+        )
+        db.session.add(entry)
+        return entry
+
+    def claim_batch(self, limit: Optional[int] = None) -> List[EmailOutbox]:
+        """Claim due outbox rows for this sender and commit the lease.
+
+        A row whose lease ran out on its final attempt is given up here
+        instead of being claimed again.
+        """
+        now = datetime.utcnow()
+        EmailOutbox.query.filter(
+            EmailOutbox.status == OUTBOX_SENDING,
+            EmailOutbox.next_attempt_at <= now,
+            EmailOutbox.attempts >= self.max_attempts
+        ).update({
+            'status': OUTBOX_FAILED,
+            'last_error': 'Lease expired on the final attempt'
+        }, synchronize_session=False)
+
+        entries = EmailOutbox.query.filter(
+            EmailOutbox.status.in_([OUTBOX_PENDING, OUTBOX_SENDING]),
+            EmailOutbox.next_attempt_at <= now
+        ).order_by(
+            EmailOutbox.next_attempt_at, EmailOutbox.id
+        ).limit(limit or self.batch_size).with_for_update(skip_locked=True).all()
+
+        lease_until = now + timedelta(seconds=self.lease_seconds)
+        for entry in entries:
+            entry.status = OUTBOX_SENDING
+            entry.attempts += 1
+            entry.next_attempt_at = lease_until
+        ids = [entry.id for entry in entries]
+        db.session.commit()
+        if not ids:
+            return []
+
+        # Reload the committed rows in one query rather than one refresh per row
+        return EmailOutbox.query.filter(EmailOutbox.id.in_(ids)).order_by(
+            EmailOutbox.next_attempt_at, EmailOutbox.id
+        ).all()
+
+    def process_batch(self, limit: Optional[int] = None) -> Dict[str, int]:
+        """Claim and send one batch of due emails.
+
+        Returns:
+            Counts of rows ``sent``, scheduled for ``retry`` and ``failed`` for good
+        """
+        entries = self.claim_batch(limit)
+        counts = {'sent': 0, 'retry': 0, 'failed': 0}
+        if not entries:
+            return counts
+
+        messages = []
+        now = datetime.utcnow()
+        for entry in entries:
+            try:
+                html = EmailService.render(entry.template,
+                                           **EmailService.send_time_context(entry.template, entry.context, now))
+                messages.append((entry, EmailService.build_message(entry.subject, [entry.recipient], html)))
+            except Exception as e:
+                logger.error(f"Error rendering outbox email {entry.id}: {str(e)}")
+                counts[self._record_failure(entry, str(e), now)] += 1
+
+        for result in EmailDispatcher().dispatch(messages):
+            entry = result.key
+            if result.sent:
+                entry.status = OUTBOX_SENT
+                entry.sent_at = now
+                entry.last_error = None
+                counts['sent'] += 1
+            else:
+                counts[self._record_failure(entry, result.error, now)] += 1
+
+        db.session.commit()
+        return counts
+
+    def run(self, max_batches: Optional[int] = None) -> Dict[str, int]:
+        """Process batches until nothing is due (or ``max_batches`` were processed)."""
+        totals = {'sent': 0, 'retry': 0, 'failed': 0}
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            counts = self.process_batch()
+            batches += 1
+            for key, value in counts.items():
+                totals[key] += value
+            if not any(counts.values()):
+                break
+        if any(totals.values()):
+            metrics = self.metrics()
+            logger.info(
+                f"Email outbox: {totals['sent']} sent, {totals['retry']} to retry, {totals['failed']} failed; "
+                f"{metrics['pending']} pending, {metrics['due']} due, lag {metrics['lag_seconds']:.0f}s"
+            )
+        return totals
+
+    def metrics(self, now: Optional[datetime] = None) -> Dict[str, float]:
+        """Queue depth and lag of the outbox, from one grouped query.
+
+        Returns:
+            ``pending`` rows waiting for their send time or a retry, ``due``
+            rows whose time has come but that no sender has claimed yet,
+            ``sending`` rows leased by a sender, ``failed`` rows that gave up,
+            and ``lag_seconds``: how long the oldest due row has been waiting
+        """
+        now = now or datetime.utcnow()
+        is_due = db.and_(EmailOutbox.status == OUTBOX_PENDING, EmailOutbox.next_attempt_at <= now)
+        rows = db.session.query(
+            EmailOutbox.status,
+            db.func.count(EmailOutbox.id),
+            db.func.sum(db.case((is_due, 1), else_=0)),
+            db.func.min(db.case((is_due, EmailOutbox.next_attempt_at), else_=None))
+        ).filter(
+            EmailOutbox.status.in_([OUTBOX_PENDING, OUTBOX_SENDING, OUTBOX_FAILED])
+        ).group_by(EmailOutbox.status).all()
+
+        metrics = {'pending': 0, 'due': 0, 'sending': 0, 'failed': 0, 'lag_seconds': 0.0}
+        for status, count, due, oldest_due in rows:
+            metrics[status] = count
+            if status == OUTBOX_PENDING:
+                metrics['due'] = int(due or 0)
+                if oldest_due is not None:
+                    metrics['lag_seconds'] = max((now - oldest_due).total_seconds(), 0.0)
+        return metrics
+
+    def _record_failure(self, entry: EmailOutbox, error: Optional[str], now: datetime) -> str:
+        entry.last_error = error
+        if entry.attempts >= self.max_attempts:
+            entry.status = OUTBOX_FAILED
+            return 'failed'
+
+        entry.status = OUTBOX_PENDING
+        entry.next_attempt_at = now + self._backoff(entry.attempts)
+        return 'retry'
+
+    def _backoff(self, attempts: int) -> timedelta:
+        """Delay before the next attempt, doubling per attempt up to the cap."""
+        delay = self.backoff_seconds * (2 ** max(attempts - 1, 0))
+        return timedelta(seconds=min(delay, self.max_backoff_seconds))
@@ -1,8 +1,10 @@
-from flask import current_app, render_template
+from datetime import date, datetime
+from flask import current_app, has_request_context, render_template, url_for
 from flask_mail import Message
 from app.core.extensions import mail
+from app.models.notification import expiry_priority
 from app.models.user import User
-from typing import List, Dict
+from typing import List, Dict, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,30 +12,41 @@ logger = logging.getLogger(__name__)
 class EmailService:
     """Service for handling email communications."""
     
+    @staticmethod
+    def build_message(subject, recipients, html) -> Message:
+        """Build an HTML email."""
+        msg = Message(
+            subject=subject,
+            recipients=recipients,
+            sender=current_app.config['MAIL_DEFAULT_SENDER']
+        )
+        msg.html = html
+        return msg
+    
+    @staticmethod
+    def render(template: str, **context) -> str:
+        """Render ``emails/<template>.html`` with ``dashboard_url`` filled in."""
+        return render_template(f'emails/{template}.html',
+                               **{'dashboard_url': EmailService.dashboard_url(), **context})
+    
+    @staticmethod
+    def dashboard_url() -> Optional[str]:
+        """Absolute dashboard link, from ``APP_BASE_URL`` when there is no request."""
+        if has_request_context() or current_app.config.get('SERVER_NAME'):
+            return url_for('main.index', _external=True)
+        base_url = current_app.config.get('APP_BASE_URL')
+        if not base_url:
+            return None
+        path = current_app.url_map.bind('').build('main.index')
+        return base_url.rstrip('/') + path
+    
     @staticmethod
     def send_email(subject, recipients, template, **kwargs):
         """Send an email using a template."""
         try:
-            logger.info(f"Preparing to send email to {recipients}")
-            logger.info(f"Using template: {template}")
-            
-            msg = Message(
-                subject=subject,
-                recipients=recipients,
-                sender=current_app.config['MAIL_DEFAULT_SENDER']
-            )
-            
-            # Log email configuration
-            logger.info(f"Mail server: {current_app.config['MAIL_SERVER']}")
-            logger.info(f"Mail port: {current_app.config['MAIL_PORT']}")
-            logger.info(f"Mail use TLS: {current_app.config['MAIL_USE_TLS']}")
-            logger.info(f"Mail username: {current_app.config['MAIL_USERNAME']}")
-            
-            msg.html = render_template(f'emails/{template}.html', **kwargs)
-            logger.info("Email template rendered successfully")
-            
-            mail.send(msg)
-            logger.info("Email sent successfully")
+            html = EmailService.render(template, **kwargs)
+            mail.send(EmailService.build_message(subject, recipients, html))
+            logger.info(f"Email '{template}' sent to {recipients}")
             return True
         except Exception as e:
             logger.error(f"Error sending email: {str(e)}", exc_info=True)
@@ -50,6 +63,15 @@ class EmailService:
             token=token
         )
     
+    @staticmethod
+    def _items_needing_attention(items: List[Dict]) -> List[Dict]:
+        """Filter out test items and items that don't need attention."""
+        return [
+            item for item in items 
+            if not item['name'].lower().startswith('test') and 
+            item['days_until_expiry'] <= 7  # Only include items expiring within 7 days
+        ]
+    
     @staticmethod
     def send_daily_notification_email(user: User, items: List[Dict]):
         """Send daily notification email with items that need attention."""
@@ -57,12 +79,7 @@ class EmailService:
             logger.info("No items to notify about")
             return False
             
-        # Filter out test items and items that don't need attention
-        items_needing_attention = [
-            item for item in items 
-            if not item['name'].lower().startswith('test') and 
-            item['days_until_expiry'] <= 7  # Only include items expiring within 7 days
-        ]
+        items_needing_attention = EmailService._items_needing_attention(items)
         
         if not items_needing_attention:
             logger.info("No items need attention at this time")
@@ -77,6 +94,62 @@ class EmailService:
             items=items_needing_attention
         )
     
+    @staticmethod
+    def queue_daily_notification_email(user: User, items: List[Dict]) -> bool:
+        """Queue the daily notification email in the outbox.
+        
+        The email is committed with the caller's transaction and delivered by
+        the outbox sender in the user's digest window. Returns False if
+        nothing needs attention.
+        """
+        from app.services.digest_schedule import DigestSchedule
+        from app.services.email_outbox_service import EmailOutboxService
+        
+        items_needing_attention = EmailService._items_needing_attention(items)
+        if not items_needing_attention:
+            return False
+        
+        EmailOutboxService.enqueue(
+            recipient=user.email,
+            subject='Daily Expiry Alert Summary',
+            template='daily_notification',
+            context={'user': {'username': user.username}, 'timezone': user.timezone,
+                     'items': items_needing_attention},
+            user_id=user.id,
+            send_at=DigestSchedule().send_at(user.id, user.timezone)
+        )
+        return True
+    
+    @staticmethod
+    def send_time_context(template: str, context: Dict, now: Optional[datetime] = None) -> Dict:
+        """The context to render a queued email with at the moment it is sent."""
+        if template == 'daily_notification':
+            return EmailService._refresh_digest_items(context, now)
+        return context
+    
+    @staticmethod
+    def _refresh_digest_items(context: Dict, now: Optional[datetime] = None) -> Dict:
+        """Recompute a digest's days until expiry for the user's date at send time.
+        
+        Digests are built by the nightly run but sent in the user's morning, up
+        to a day later, so each item's days and priority are worked out again
+        from its expiry date. Items that have expired since count as expired.
+        """
+        from app.services.digest_schedule import DigestSchedule
+        
+        items = context.get('items', [])
+        if not any('expiry_date' in item for item in items):
+            return context
+        today = DigestSchedule().local_date(context.get('timezone'), now)
+        refreshed = []
+        for item in items:
+            if 'expiry_date' in item:
+                days = max((date.fromisoformat(item['expiry_date']) - today).days, 0)
+                item = {**item, 'days_until_expiry': days, 'priority': expiry_priority(days)}
+            refreshed.append(item)
+        refreshed.sort(key=lambda x: {'high': 0, 'normal': 1, 'low': 2}[x['priority']])
+        return {**context, 'items': refreshed}
+    
     @staticmethod
     def send_expiry_notification(user: User, item_name: str, days_until_expiry: int):
         """Send expiry notification email."""
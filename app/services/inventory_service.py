@@ -0,0 +1,145 @@
+from datetime import date, timedelta
+from typing import Dict, Any, Optional
+from app.core.extensions import db, expiry_index
+from app.models.item import (Item, EXPIRING_SOON_DAYS, STATUS_ACTIVE, STATUS_EXPIRED,
+                             STATUS_EXPIRING_SOON, STATUS_PENDING)
+from app.models.job_watermark import JobWatermark
+
+# Summary bucket names
+BUCKET_EXPIRED = 'expired'
+BUCKET_EXPIRING_SOON = 'expiring_soon'
+BUCKET_ACTIVE = 'active'
+BUCKET_PENDING = 'pending'
+
+# The last day a full status refresh ran, kept under the nightly job's name
+REFRESH_WATERMARK_JOB = 'refresh_item_statuses'
+
+class InventoryService:
+    """Service for inventory-level aggregates."""
+
+    def get_summary(self, user_id: int, upcoming_limit: int = 5) -> Dict[str, Any]:
+        """Summarise a user's inventory.
+
+        Counts, quantities and stock value per expiry bucket come from a single
+        grouped query; the soonest-expiring items come from one bounded query,
+        so the cost does not grow with the size of the inventory. When the
+        expiry index is enabled, the dated bucket counts and the soonest-expiring
+        item IDs come from it, and SQL only totals the inventory.
+
+        Args:
+            user_id: ID of the user whose inventory to summarise
+            upcoming_limit: Maximum number of soonest-expiring items to return
+        """
+        if expiry_index.enabled:
+            return self._summary_from_index(user_id, upcoming_limit)
+
+        today = date.today()
+        bucket = db.case(
+            (Item.expiry_date.is_(None), BUCKET_PENDING),
+            (Item.expiry_date <= today, BUCKET_EXPIRED),
+            (Item.expiry_date <= today + timedelta(days=EXPIRING_SOON_DAYS), BUCKET_EXPIRING_SOON),
+            else_=BUCKET_ACTIVE
+        ).label('bucket')
+
+        rows = db.session.query(
+            bucket,
+            db.func.count(Item.id),
+            db.func.coalesce(db.func.sum(Item.quantity), 0.0),
+            db.func.coalesce(db.func.sum(Item.quantity * Item.cost_price), 0.0)
+        ).filter(
+            Item.user_id == user_id
+        ).group_by(bucket).all()
+
+        counts = {name: 0 for name in (BUCKET_EXPIRED, BUCKET_EXPIRING_SOON, BUCKET_ACTIVE, BUCKET_PENDING)}
+        total_quantity = 0.0
+        stock_value = 0.0
+        for name, count, quantity, value in rows:
+            counts[name] = count
+            total_quantity += quantity
+            stock_value += value
+
+        upcoming = Item.expiring_query(user_id).limit(upcoming_limit).all() if upcoming_limit > 0 else []
+
+        return {
+            'total_items': sum(counts.values()),
+            'counts': counts,
+            'total_quantity': total_quantity,
+            'stock_value': round(stock_value, 2),
+            'upcoming': upcoming
+        }
+
+    def _summary_from_index(self, user_id: int, upcoming_limit: int) -> Dict[str, Any]:
+        """``get_summary`` with the dated buckets answered by the expiry index."""
+        pending, total_quantity, stock_value = db.session.query(
+            db.func.coalesce(db.func.sum(db.case((Item.expiry_date.is_(None), 1), else_=0)), 0),
+            db.func.coalesce(db.func.sum(Item.quantity), 0.0),
+            db.func.coalesce(db.func.sum(Item.quantity * Item.cost_price), 0.0)
+        ).filter(
+            Item.user_id == user_id
+        ).one()
+
+        counts = expiry_index.bucket_counts(user_id, EXPIRING_SOON_DAYS)
+        counts[BUCKET_PENDING] = pending
+
+        upcoming = []
+        item_ids = expiry_index.expiring_item_ids(user_id, EXPIRING_SOON_DAYS)[:max(upcoming_limit, 0)]
+        if item_ids:
+            items = {item.id: item for item in Item.query.filter(Item.user_id == user_id, Item.id.in_(item_ids))}
+            upcoming = [items[item_id] for item_id in item_ids if item_id in items]
+
+        return {
+            'total_items': sum(counts.values()),
+            'counts': counts,
+            'total_quantity': total_quantity,
+            'stock_value': round(stock_value, 2),
+            'upcoming': upcoming
+        }
+
+    def refresh_statuses(self, user_id: Optional[int] = None) -> int:
+        """Bring ``status`` in line with ``expiry_date`` with one ``UPDATE ... CASE``.
+
+        A full run (the nightly ``refresh_item_statuses`` job) checks every
+        item and records the day in ``job_watermarks``. A per-user call, as
+        made on each dashboard visit, only looks at items whose bucket can have
+        changed since that day: those that expired, or came within
+        ``EXPIRING_SOON_DAYS``, in between. Both are ``expiry_date`` ranges on
+        ``idx_user_expiry``, and once the nightly run has happened today there
+        is nothing to check at all.
+
+        Args:
+            user_id: Only refresh this user's items (default: every user)
+
+        Returns:
+            int: Number of items whose status changed
+        """
+        today = date.today()
+        status = db.case(
+            (Item.expiry_date.is_(None), STATUS_PENDING),
+            (Item.expiry_date <= today, STATUS_EXPIRED),
+            (Item.expiry_date <= today + timedelta(days=EXPIRING_SOON_DAYS), STATUS_EXPIRING_SOON),
+            else_=STATUS_ACTIVE
+        )
+        stale = db.or_(Item.status.is_(None), Item.status != status)
+        if user_id is not None:
+            refreshed = JobWatermark.get(REFRESH_WATERMARK_JOB)
+            if refreshed is not None:
+                if refreshed >= today:
+                    return 0
+                soon = timedelta(days=EXPIRING_SOON_DAYS)
+                crossed = db.or_(
+                    db.and_(Item.expiry_date > refreshed, Item.expiry_date <= today),
+                    db.and_(Item.expiry_date > refreshed + soon, Item.expiry_date <= today + soon)
+                )
+                stale = db.and_(crossed, stale)
+            stale = db.and_(Item.user_id == user_id, stale)
+
+        changed = 0
+        if db.session.query(db.exists().where(stale)).scalar():
+            changed = db.session.execute(
+                db.update(Item).where(stale).values(status=status),
+                execution_options={'synchronize_session': False}
+            ).rowcount
+        if user_id is None:
+            JobWatermark.advance(REFRESH_WATERMARK_JOB, today)
+        db.session.commit()
+        return changed
@@ -0,0 +1,196 @@
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional, Tuple
+from flask import current_app
+from app.core.rate_limiter import RateLimiter
+from app.models.notification import Notification
+from app.models.user import User
+from app.services.email_dispatcher import DeliveryResult, EmailDispatcher
+from app.services.email_service import EmailService
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Longest SMS body sent; longer messages are cut (two concatenated segments)
+MAX_SMS_LENGTH = 306
+
+# Messages the local stand-in providers keep for inspection
+LOCAL_OUTBOX_SIZE = 100
+
+class ChannelMessage(NamedTuple):
+    """One notification rendered for one channel."""
+    key: Any
+    recipient: str
+    subject: str
+    body: str
+    html: Optional[str] = None
+
+# Providers
+
+class LocalProvider:
+    """Stand-in provider that logs messages and keeps the latest in ``outbox``.
+
+    Each subclass has its own ``outbox``, capped at ``LOCAL_OUTBOX_SIZE``
+    messages, so a long-running development server does not grow it forever.
+    """
+
+    kind = ''
+    outbox: Deque[ChannelMessage]
+
+    def send_batch(self, messages: List[ChannelMessage]) -> List[DeliveryResult]:
+        results = []
+        for message in messages:
+            logger.info(f"[local {self.kind}] to {message.recipient}: {message.subject or message.body}")
+            self.outbox.append(message)
+            results.append(DeliveryResult(message.key, [message.recipient], True))
+        return results
+
+    @classmethod
+    def clear(cls):
+        """Forget the messages kept so far."""
+        cls.outbox.clear()
+
+class LocalEmailProvider(LocalProvider):
+    """Stand-in email provider."""
+
+    kind = 'email'
+    outbox = deque(maxlen=LOCAL_OUTBOX_SIZE)
+
+class SmtpEmailProvider:
+    """Email over SMTP through the shared ``EmailDispatcher``."""
+
+    def send_batch(self, messages: List[ChannelMessage]) -> List[DeliveryResult]:
+        return EmailDispatcher().dispatch(
+            (message.key, EmailService.build_message(message.subject, [message.recipient], message.html))
+            for message in messages
+        )
+
+class LocalSmsProvider(LocalProvider):
+    """Stand-in SMS provider."""
+
+    kind = 'sms'
+    outbox = deque(maxlen=LOCAL_OUTBOX_SIZE)
+
+class TwilioSmsProvider:
+    """SMS through Twilio; one API call per message, one client per batch."""
+
+    def send_batch(self, messages: List[ChannelMessage]) -> List[DeliveryResult]:
+        config = current_app.config
+        if not config.get('TWILIO_ACCOUNT_SID'):
+            return [DeliveryResult(message.key, [message.recipient], False, 'SMS is not configured')
+                    for message in messages]
+
+        from twilio.rest import Client
+        client = Client(config['TWILIO_ACCOUNT_SID'], config['TWILIO_AUTH_TOKEN'])
+        results = []
+        for message in messages:
+            try:
+                sent = client.messages.create(
+                    body=message.body,
+                    from_=config['TWILIO_PHONE_NUMBER'],
+                    to=message.recipient
+                )
+                results.append(DeliveryResult(message.key, [message.recipient], bool(sent.sid)))
+            except Exception as e:
+                logger.error(f"Error sending SMS to {message.recipient}: {str(e)}")
+                results.append(DeliveryResult(message.key, [message.recipient], False, str(e)))
+        return results
+
+EMAIL_PROVIDERS: Dict[str, Callable[[], Any]] = {'smtp': SmtpEmailProvider, 'local': LocalEmailProvider}
+SMS_PROVIDERS: Dict[str, Callable[[], Any]] = {'twilio': TwilioSmsProvider, 'local': LocalSmsProvider}
+
+# Channels
+
+class NotificationChannel(ABC):
+    """A way of reaching a user, with its own pacing and batching.
+
+    A channel decides whether a user wants it (their ``<name>_notifications``
+    preference plus an address to send to) and renders a notification into
+    a ``ChannelMessage``; its provider does the sending. Messages go to the
+    provider in batches of ``NOTIFICATION_<NAME>_BATCH_SIZE``, paced to
+    ``NOTIFICATION_<NAME>_RATE_PER_SECOND`` by a limiter shared by every
+    instance of the channel in this process.
+    """
+
+    name = ''
+    # True if the notification row itself is the delivery (nothing to send)
+    stored = False
+
+    _limiters: Dict[Tuple[str, float], RateLimiter] = {}
+
+    def __init__(self, provider=None):
+        config = current_app.config
+        prefix = f'NOTIFICATION_{self.name.upper()}'
+        self.batch_size = config.get(f'{prefix}_BATCH_SIZE', 50)
+        self.rate = config.get(f'{prefix}_RATE_PER_SECOND', 0)
+        self.provider = provider or self._default_provider()
+        key = (self.name, self.rate)
+        self.limiter = self._limiters.setdefault(key, RateLimiter(self.rate))
+
+    def _default_provider(self):
+        return None
+
+    @abstractmethod
+    def address(self, user: User) -> Optional[str]:
+        """Where this channel reaches ``user``, if anywhere."""
+
+    def enabled_for(self, user: User) -> bool:
+        return bool(getattr(user, f'{self.name}_notifications', False)) and bool(self.address(user))
+
+    def build(self, key: Any, notification: Notification, user: User) -> ChannelMessage:
+        """Render ``notification`` for ``user``; runs in the caller's thread."""
+        return ChannelMessage(key, self.address(user), 'Expiry Tracker notification', notification.message)
+
+    def send(self, messages: List[ChannelMessage]) -> List[DeliveryResult]:
+        """Send messages in paced batches; results are in input order."""
+        results = []
+        for start in range(0, len(messages), self.batch_size):
+            batch = messages[start:start + self.batch_size]
+            self.limiter.acquire(len(batch))
+            try:
+                results.extend(self.provider.send_batch(batch))
+            except Exception as e:
+                logger.error(f"Error sending {self.name} batch: {str(e)}")
+                results.extend(DeliveryResult(message.key, [message.recipient], False, str(e))
+                               for message in batch)
+        return results
+
+class InAppChannel(NotificationChannel):
+    """The notification row itself; streams pick it up when it commits."""
+
+    name = 'in_app'
+    stored = True
+
+    def address(self, user: User) -> Optional[str]:
+        return str(user.id)
+
+class EmailChannel(NotificationChannel):
+    """One email per notification, rendered from ``emails/notification.html``."""
+
+    name = 'email'
+
+    def _default_provider(self):
+        return EMAIL_PROVIDERS[current_app.config.get('NOTIFICATION_EMAIL_PROVIDER', 'smtp')]()
+
+    def address(self, user: User) -> Optional[str]:
+        return user.email
+
+    def build(self, key: Any, notification: Notification, user: User) -> ChannelMessage:
+        html = EmailService.render('notification', user={'username': user.username}, notification=notification)
+        return ChannelMessage(key, user.email, 'Expiry Tracker notification', notification.message, html)
+
+class SmsChannel(NotificationChannel):
+    """Plain-text SMS to the user's ``phone_number``."""
+
+    name = 'sms'
+
+    def _default_provider(self):
+        return SMS_PROVIDERS[current_app.config.get('NOTIFICATION_SMS_PROVIDER', 'twilio')]()
+
+    def address(self, user: User) -> Optional[str]:
+        return user.phone_number
+
+    def build(self, key: Any, notification: Notification, user: User) -> ChannelMessage:
+        return ChannelMessage(key, user.phone_number, '', notification.message[:MAX_SMS_LENGTH])
+
+CHANNELS = {channel.name: channel for channel in (InAppChannel, EmailChannel, SmsChannel)}
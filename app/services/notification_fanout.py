@@ -0,0 +1,146 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+from flask import current_app
+from app.core.extensions import db
+from app.models.notification import Notification
+from app.models.notification_delivery import NotificationDelivery, DELIVERY_PENDING, DELIVERY_FAILED, DELIVERY_SENT
+from app.models.user import User
+from app.services.email_dispatcher import DeliveryResult
+from app.services.notification_channels import CHANNELS, ChannelMessage, NotificationChannel
+import logging
+
+logger = logging.getLogger(__name__)
+
+class NotificationFanout:
+    """Deliver notifications over every channel their users have enabled.
+
+    Users, existing deliveries and rendered messages are prepared in the
+    calling thread; then each channel sends its messages on its own thread,
+    so a slow SMS gateway does not hold up email. Outcomes are recorded as
+    ``NotificationDelivery`` rows in one commit. Deliveries already sent are
+    skipped, so fanning the same notifications out again only retries what
+    failed.
+    """
+
+    def __init__(self, channels: Optional[Iterable[str]] = None):
+        names = channels or current_app.config.get('NOTIFICATION_CHANNELS', list(CHANNELS))
+        self.channels: List[NotificationChannel] = [CHANNELS[name]() for name in names]
+
+    def deliver(self, notifications: Iterable[Notification],
+                channels: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, int]]:
+        """Fan ``notifications`` out to their users' enabled channels.
+
+        Args:
+            notifications: Notifications to deliver
+            channels: Only use these of this fan-out's channels (default: all)
+
+        Returns:
+            Per channel, counts of messages ``sent``, ``failed`` and
+            ``skipped`` (channel disabled, no address, or already sent)
+        """
+        notifications = list(notifications)
+        selected = self.channels
+        if channels is not None:
+            names = set(channels)
+            selected = [channel for channel in self.channels if channel.name in names]
+        counts = {channel.name: {'sent': 0, 'failed': 0, 'skipped': 0} for channel in selected}
+        if not notifications:
+            return counts
+
+        users = {user.id: user for user in User.query.filter(
+            User.id.in_({notification.user_id for notification in notifications})
+        )}
+        deliveries = {
+            (delivery.notification_id, delivery.channel): delivery
+            for delivery in NotificationDelivery.query.filter(
+                NotificationDelivery.notification_id.in_([notification.id for notification in notifications]),
+                NotificationDelivery.channel.in_([channel.name for channel in selected])
+            )
+        }
+
+        outgoing: Dict[str, List[ChannelMessage]] = {}
+        for channel in selected:
+            messages = outgoing.setdefault(channel.name, [])
+            for notification in notifications:
+                user = users.get(notification.user_id)
+                if user is None or not channel.enabled_for(user):
+                    delivery = deliveries.get((notification.id, channel.name))
+                    if delivery is not None and delivery.status != DELIVERY_SENT:
+                        # Queued, but the user can no longer be reached this way
+                        delivery.mark_failed('Channel disabled or no address')
+                    counts[channel.name]['skipped'] += 1
+                    continue
+                if channel.stored:
+                    counts[channel.name]['sent'] += 1
+                    continue
+
+                delivery = deliveries.get((notification.id, channel.name))
+                if delivery is None:
+                    delivery = NotificationDelivery(notification_id=notification.id, channel=channel.name, attempts=0)
+                    db.session.add(delivery)
+                elif delivery.status == DELIVERY_SENT:
+                    counts[channel.name]['skipped'] += 1
+                    continue
+                try:
+                    messages.append(channel.build(delivery, notification, user))
+                except Exception as e:
+                    logger.error(f"Error rendering {channel.name} notification {notification.id}: {str(e)}")
+                    delivery.mark_failed(str(e))
+                    counts[channel.name]['failed'] += 1
+
+        for channel_name, results in self._send(outgoing).items():
+            for result in results:
+                if result.sent:
+                    result.key.mark_sent()
+                    counts[channel_name]['sent'] += 1
+                else:
+                    result.key.mark_failed(result.error)
+                    counts[channel_name]['failed'] += 1
+
+        db.session.commit()
+        logger.info("Notification fan-out: " + ", ".join(
+            f"{name} {stats['sent']} sent/{stats['failed']} failed" for name, stats in counts.items()
+        ))
+        return counts
+
+    def deliver_queued(self, limit: int, max_attempts: int) -> Dict[str, Dict[str, int]]:
+        """Send up to ``limit`` queued deliveries per channel of this fan-out.
+
+        Deliveries are queued as ``pending`` rows (for example by the expiry
+        run for urgent SMS); failed ones are retried until they have been
+        attempted ``max_attempts`` times. Oldest first. Each channel only
+        sends what was queued for it.
+        """
+        counts = {}
+        for channel in self.channels:
+            rows = db.session.query(NotificationDelivery.notification_id).filter(
+                NotificationDelivery.channel == channel.name,
+                db.or_(
+                    NotificationDelivery.status == DELIVERY_PENDING,
+                    db.and_(NotificationDelivery.status == DELIVERY_FAILED,
+                            NotificationDelivery.attempts < max_attempts)
+                )
+            ).order_by(NotificationDelivery.id).limit(limit)
+            notification_ids = [notification_id for (notification_id,) in rows]
+            queued = Notification.query.filter(Notification.id.in_(notification_ids)).all()
+            counts.update(self.deliver(queued, channels=[channel.name]))
+        return counts
+
+    def _send(self, outgoing: Dict[str, List[ChannelMessage]]) -> Dict[str, List[DeliveryResult]]:
+        """Send every channel's messages, one thread per channel."""
+        work = [(channel, outgoing[channel.name]) for channel in self.channels if outgoing.get(channel.name)]
+        if not work:
+            return {}
+        if len(work) == 1:
+            channel, messages = work[0]
+            return {channel.name: channel.send(messages)}
+
+        app = current_app._get_current_object()
+
+        def send(channel: NotificationChannel, messages: List[ChannelMessage]) -> List[DeliveryResult]:
+            with app.app_context():
+                return channel.send(messages)
+
+        with ThreadPoolExecutor(max_workers=len(work), thread_name_prefix='fanout') as executor:
+            futures = {channel.name: executor.submit(send, channel, messages) for channel, messages in work}
+            return {name: future.result() for name, future in futures.items()}
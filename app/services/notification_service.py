@@ -1,12 +1,39 @@
-from datetime import datetime, timedelta
-from typing import List, Optional, Union, Dict
+import base64
+import binascii
+import json
+import queue
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Iterable, Iterator, List, Optional, Tuple, Union, Dict
 from flask import current_app
-from app.core.extensions import db
-from app.models.notification import Notification
+from sqlalchemy.orm import contains_eager
+from app.core.extensions import db, notification_broker
+from app.models.notification import Notification, STATUS_UNREAD, expiry_priority
+from app.models.notification_delivery import NotificationDelivery, DELIVERY_PENDING
 from app.models.item import Item
 from app.models.user import User
 from app.services.email_service import EmailService
 
+# Rows fetched per round trip when streaming the expiry scan, and rows per
+# notification insert
+SCAN_BATCH_SIZE = 1000
+
+# Minimum time between two digest emails to the same user
+DIGEST_INTERVAL_HOURS = 24
+
+# Notifications sent per stream update
+STREAM_BATCH_SIZE = 100
+
+# Notification values only carried into the email digest
+DIGEST_ONLY_KEYS = ('days_until_expiry', 'expiry_date')
+
+# Alert priorities also queued for SMS delivery
+URGENT_PRIORITIES = ('high',)
+
+def expiry_dedup_key(item_id: int, days_until_expiry: int, expiry_date: date) -> str:
+    """Key identifying one expiry alert: item, offset and the expiry date it refers to."""
+    return f"expiry:{item_id}:{days_until_expiry}:{expiry_date.isoformat()}"
+
 class NotificationService:
     """Service for handling expiry notifications."""
     
@@ -20,199 +47,471 @@ class NotificationService:
             self._notification_days = current_app.config['NOTIFICATION_DAYS']
         return self._notification_days
     
-    def check_expiry_dates(self) -> List[Notification]:
-        """Check items for expiry and create notifications."""
+    def check_expiry_dates(self, shard: Optional[Tuple[int, int]] = None) -> List[Notification]:
+        """Check items for expiry and create notifications.
+        
+        Args:
+            shard: Optional ``(index, count)``; only users in the shard's
+                contiguous ``user_id`` range are processed, so ``count`` runs
+                with different indexes cover every user exactly once
+        """
+        notifications, _ = self._check_expiry_dates(shard)
+        return notifications
+    
+    def run_shard(self, index: int, count: int) -> Dict[str, Any]:
+        """Run the expiry check for one shard of users and report its stats."""
+        started = time.monotonic()
+        notifications, queued_user_ids = self._check_expiry_dates((index, count))
+        return {
+            'shard': index,
+            'notifications': len(notifications),
+            'emails_queued': len(queued_user_ids),
+            'seconds': round(time.monotonic() - started, 3)
+        }
+    
+    @staticmethod
+    def _shard_filter(index: int, count: int) -> List:
+        """Conditions limiting ``Item.user_id`` to shard ``index`` of ``count``.
+        
+        The ``user_id`` span is split into ``count`` contiguous ranges, so a
+        shard reads one stretch of ``idx_user_expiry`` rather than every
+        ``count``-th user. The first and last ranges are open-ended, which
+        keeps users added during the run covered.
+        """
+        low, high = db.session.query(db.func.min(User.id), db.func.max(User.id)).one()
+        if low is None:
+            return []
+        span = high - low + 1
+        conditions = []
+        if index > 0:
+            conditions.append(Item.user_id >= low + span * index // count)
+        if index < count - 1:
+            conditions.append(Item.user_id < low + span * (index + 1) // count)
+        return conditions
+    
+    def _check_expiry_dates(self, shard: Optional[Tuple[int, int]]) -> Tuple[List[Notification], List[int]]:
+        """Create expiry notifications and queue digests; returns both."""
         notifications = []
-        today = datetime.utcnow()
+        today = date.today()
+        now = datetime.utcnow()
+        digest_due = self._digest_due(now)
         
         # Group notifications by user
         user_notifications: Dict[int, Dict] = {}
         
-        # Get all items with expiry dates
-        items = Item.query.filter(
-            Item.expiry_date.isnot(None),
-            Item.expiry_date > today
-        ).all()
+        # Only items landing exactly on a notification offset are candidates;
+        # match those dates in SQL (served by idx_expiry_date) and stream them.
+        # The owning user is joined in so preferences need no per-item lookup.
+        target_dates = sorted({today + timedelta(days=days) for days in self.notification_days if days > 0})
+        items = Item.query.join(Item.user).options(
+            contains_eager(Item.user)
+        ).filter(
+            Item.expiry_date.in_(target_dates)
+        )
+        
+        # Get recently expired items (expiring today) for users due a digest email
+        recently_expired = db.session.query(Item.user_id, Item.name, Item.expiry_date).join(Item.user).filter(
+            Item.expiry_date == today,
+            User.email_notifications.is_(True),
+            digest_due
+        )
         
-        # Get recently expired items (expired in last 24 hours)
-        recently_expired = Item.query.filter(
-            Item.expiry_date.isnot(None),
-            Item.expiry_date <= today,
-            Item.expiry_date >= today - timedelta(days=1)
-        ).all()
+        if shard is not None:
+            in_shard = self._shard_filter(*shard)
+            items = items.filter(*in_shard)
+            recently_expired = recently_expired.filter(*in_shard)
+        items = items.order_by(Item.expiry_date, Item.id).yield_per(SCAN_BATCH_SIZE)
+        recently_expired = recently_expired.yield_per(SCAN_BATCH_SIZE)
         
         # Handle recently expired items first
-        for item in recently_expired:
-            if item.user.email_notifications:
-                if item.user_id not in user_notifications:
-                    user_notifications[item.user_id] = {
-                        'expiring': [],
-                        'expired': []
-                    }
-                
-                user_notifications[item.user_id]['expired'].append({
-                    'name': item.name,
-                    'days_until_expiry': 0,
-                    'priority': 'high'
-                })
+        for user_id, name, expiry_date in recently_expired:
+            if user_id not in user_notifications:
+                user_notifications[user_id] = {
+                    'expiring': [],
+                    'expired': []
+                }
+            
+            user_notifications[user_id]['expired'].append({
+                'name': name,
+                'expiry_date': expiry_date.isoformat(),
+                'days_until_expiry': 0,
+                'priority': 'high'
+            })
         
-        # Handle items approaching expiry
+        # Handle items approaching expiry in batches: each batch is one insert,
+        # and rows already created by an earlier run are skipped on dedup_key
+        batch = []
+        sms_user_ids = set()
+        digest_cutoff = now - timedelta(hours=DIGEST_INTERVAL_HOURS)
         for item in items:
-            days_until_expiry = item.days_until_expiry
+            days_until_expiry = (item.expiry_date - today).days
+            if self._wants_sms(item.user):
+                sms_user_ids.add(item.user_id)
+            wants_email = bool(item.user.email_notifications) and (
+                item.user.last_digest_sent_at is None or item.user.last_digest_sent_at <= digest_cutoff
+            )
+            batch.append((self._notification_values(item, days_until_expiry), item.name, wants_email))
+            if len(batch) >= SCAN_BATCH_SIZE:
+                notifications.extend(self._insert_batch(batch, user_notifications))
+                batch = []
+        if batch:
+            notifications.extend(self._insert_batch(batch, user_notifications))
+        
+        self._queue_urgent(self._urgent_ids(notifications, sms_user_ids))
+        # Commit once the scan is done; committing mid-stream would close the cursor
+        db.session.commit()
+        
+        queued_user_ids = self._queue_digests(user_notifications, digest_due, now)
+        return notifications, queued_user_ids
+    
+    def check_item(self, item: Item) -> List[Notification]:
+        """Create today's expiry notification for one item, e.g. after an edit.
+        
+        The single-item counterpart of ``check_expiry_dates``: nothing is
+        created unless the item expires exactly ``NOTIFICATION_DAYS`` from today.
+        """
+        if item.expiry_date is None:
+            return []
+        days_until_expiry = (item.expiry_date - date.today()).days
+        if days_until_expiry <= 0 or days_until_expiry not in self.notification_days:
+            return []
+        return self.send_due_alerts([(item.id, days_until_expiry)])
+    
+    def send_due_alerts(self, alerts: List[Tuple[int, int]]) -> List[Notification]:
+        """Create notifications for alerts popped from the alert scheduler.
+        
+        Args:
+            alerts: ``(item_id, days_before_expiry)`` pairs that are due
+        """
+        notifications = []
+        if not alerts:
+            return notifications
+        
+        now = datetime.utcnow()
+        digest_cutoff = now - timedelta(hours=DIGEST_INTERVAL_HOURS)
+        user_notifications: Dict[int, Dict] = {}
+        days_by_item: Dict[int, List[int]] = {}
+        for item_id, days in alerts:
+            days_by_item.setdefault(item_id, []).append(days)
+        
+        item_ids = sorted(days_by_item)
+        sms_user_ids = set()
+        for start in range(0, len(item_ids), SCAN_BATCH_SIZE):
+            chunk = item_ids[start:start + SCAN_BATCH_SIZE]
+            items = Item.query.join(Item.user).options(
+                contains_eager(Item.user)
+            ).filter(
+                Item.id.in_(chunk),
+                Item.expiry_date.isnot(None)
+            ).all()
             
-            # Check if we need to send a notification
-            if days_until_expiry in self.notification_days:
-                notification = self._create_notification(item)
-                if notification:
-                    notifications.append(notification)
-                    
-                    # Group notification by user
-                    if item.user.email_notifications:
-                        if item.user_id not in user_notifications:
-                            user_notifications[item.user_id] = {
-                                'expiring': [],
-                                'expired': []
-                            }
-                        
-                        user_notifications[item.user_id]['expiring'].append({
-                            'name': item.name,
-                            'days_until_expiry': days_until_expiry,
-                            'priority': notification.priority
-                        })
-        
-        # Send batched email notifications
-        for user_id, data in user_notifications.items():
-            user = User.query.get(user_id)
-            if user and self._should_send_email(user_id):
-                # Combine expiring and expired items
-                all_items = data['expired'] + data['expiring']
-                # Sort items by priority (high -> normal -> low)
-                all_items.sort(key=lambda x: {'high': 0, 'normal': 1, 'low': 2}[x['priority']])
-                
-                if all_items:  # Only send if there are items to notify about
-                    if EmailService.send_daily_notification_email(user, all_items):
-                        self._mark_email_sent(user_id)
+            batch = []
+            for item in items:
+                if self._wants_sms(item.user):
+                    sms_user_ids.add(item.user_id)
+                wants_email = bool(item.user.email_notifications) and (
+                    item.user.last_digest_sent_at is None or item.user.last_digest_sent_at <= digest_cutoff
+                )
+                for days in days_by_item[item.id]:
+                    batch.append((self._notification_values(item, days), item.name, wants_email))
+            notifications.extend(self._insert_batch(batch, user_notifications))
         
+        self._queue_urgent(self._urgent_ids(notifications, sms_user_ids))
+        db.session.commit()
+        self._queue_digests(user_notifications, self._digest_due(now), now)
         return notifications
     
-    def _should_send_email(self, user_id: int) -> bool:
-        """Check if we should send an email to this user."""
-        # Get the last email notification for this user
-        last_notification = Notification.query.filter_by(
-            user_id=user_id,
-            type='email',
-            status='sent'
-        ).order_by(Notification.created_at.desc()).first()
+    def _queue_digests(self, user_notifications: Dict[int, Dict], digest_due, now: datetime) -> List[int]:
+        """Queue digest emails in the outbox; the sender delivers and retries them.
         
-        if not last_notification:
-            return True
+        Returns the IDs of the users a digest was queued for.
+        """
+        queued_user_ids = []
+        for user in self._load_email_recipients(user_notifications.keys(), digest_due):
+            data = user_notifications[user.id]
+            # Combine expiring and expired items
+            all_items = data['expired'] + data['expiring']
+            # Sort items by priority (high -> normal -> low)
+            all_items.sort(key=lambda x: {'high': 0, 'normal': 1, 'low': 2}[x['priority']])
             
-        # Check if 24 hours have passed since the last email
-        hours_since_last = (datetime.utcnow() - last_notification.created_at).total_seconds() / 3600
-        return hours_since_last >= 24
-    
-    def _mark_email_sent(self, user_id: int):
-        """Mark that an email was sent to this user."""
-        notification = Notification(
-            message="Daily expiry alert email sent",
-            type='email',
-            status='sent',
-            user_id=user_id
-        )
-        db.session.add(notification)
+            if all_items:  # Only send if there are items to notify about
+                if EmailService.queue_daily_notification_email(user, all_items):
+                    queued_user_ids.append(user.id)
+        
+        # Record the digests with one update, committed together with the outbox rows
+        self._mark_digests_sent(queued_user_ids, now)
         db.session.commit()
+        
+        return queued_user_ids
+    
+    @staticmethod
+    def _digest_due(now: datetime):
+        """SQL condition for users whose last digest is older than the digest interval."""
+        return db.or_(
+            User.last_digest_sent_at.is_(None),
+            User.last_digest_sent_at <= now - timedelta(hours=DIGEST_INTERVAL_HOURS)
+        )
+    
+    def _load_email_recipients(self, user_ids: Iterable[int], digest_due) -> List[User]:
+        """Load the users among ``user_ids`` that are due a digest, in one statement."""
+        user_ids = list(user_ids)
+        if not user_ids:
+            return []
+        
+        return User.query.filter(
+            User.id.in_(user_ids),
+            digest_due
+        ).order_by(User.id).all()
+    
+    def _mark_digests_sent(self, user_ids: List[int], sent_at: datetime):
+        """Record a digest send for all ``user_ids`` (committed by the caller)."""
+        if not user_ids:
+            return
+        
+        User.query.filter(
+            User.id.in_(user_ids)
+        ).update({'last_digest_sent_at': sent_at}, synchronize_session=False)
     
-    def _create_notification(self, item: Item) -> Optional[Notification]:
-        """Create a notification for an item."""
-        days_until_expiry = item.days_until_expiry
+    def _insert_batch(self, batch: List[Tuple[Dict, str, bool]],
+                      user_notifications: Dict[int, Dict]) -> List[Notification]:
+        """Insert a batch of expiry notifications and queue the new ones for email."""
+        inserted = self._insert_notifications([values for values, _, _ in batch])
+        inserted_keys = {notification.dedup_key for notification in inserted}
         
-        # Determine priority based on days until expiry
+        for values, name, wants_email in batch:
+            if wants_email and values['dedup_key'] in inserted_keys:
+                user_id = values['user_id']
+                if user_id not in user_notifications:
+                    user_notifications[user_id] = {
+                        'expiring': [],
+                        'expired': []
+                    }
+                
+                user_notifications[user_id]['expiring'].append({
+                    'name': name,
+                    'expiry_date': values['expiry_date'].isoformat(),
+                    'days_until_expiry': values['days_until_expiry'],
+                    'priority': values['priority']
+                })
+        
+        return inserted
+    
+    def _notification_values(self, item: Item, days_until_expiry: int) -> Dict:
+        """Build the column values for an item's expiry notification.
+        
+        The ``days_until_expiry`` and ``expiry_date`` entries are used for the
+        email digest and are not columns.
+        """
+        priority = expiry_priority(days_until_expiry)
         if days_until_expiry == 1:
-            priority = 'high'
             message = f"Critical: Product {item.name} (ID: {item.id}) expires tomorrow!"
         elif days_until_expiry <= 3:
-            priority = 'high'
             message = f"Warning: Product {item.name} (ID: {item.id}) expires in {days_until_expiry} days!"
         elif days_until_expiry <= 7:
-            priority = 'normal'
             message = f"Notice: Product {item.name} (ID: {item.id}) expires in {days_until_expiry} days."
         else:
-            priority = 'low'
             message = f"Info: Product {item.name} (ID: {item.id}) expires in {days_until_expiry} days."
         
-        # Check if notification already exists for this specific day
-        existing = Notification.query.filter_by(
-            item_id=item.id,
-            type='in_app',
-            status='pending',
-            message=message
-        ).first()
-        
-        if existing:
-            return None
+        return {
+            'message': message,
+            'type': 'in_app',
+            'priority': priority,
+            'user_id': item.user_id,
+            'item_id': item.id,
+            'dedup_key': expiry_dedup_key(item.id, days_until_expiry, item.expiry_date),
+            'days_until_expiry': days_until_expiry,
+            'expiry_date': item.expiry_date
+        }
+    
+    def _insert_notifications(self, rows: List[Dict]) -> List[Notification]:
+        """Bulk insert notifications, skipping rows whose ``dedup_key`` already exists.
         
-        notification = Notification(
-            message=message,
-            type='in_app',
-            priority=priority,
-            user_id=item.user_id,
-            item_id=item.id
-        )
+        Returns only the notifications that were inserted.
+        """
+        rows = [{key: value for key, value in row.items() if key not in DIGEST_ONLY_KEYS} for row in rows]
+        if not rows:
+            return []
         
-        db.session.add(notification)
-        db.session.commit()
+        dialect = db.engine.dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            # No ON CONFLICT support: drop keys that already exist, then insert
+            existing = {key for (key,) in db.session.query(Notification.dedup_key).filter(
+                Notification.dedup_key.in_([row['dedup_key'] for row in rows])
+            )}
+            rows = [row for row in rows if row['dedup_key'] not in existing]
+            if not rows:
+                return []
+            return list(db.session.scalars(db.insert(Notification).returning(Notification), rows))
         
-        return notification
+        stmt = insert(Notification).on_conflict_do_nothing(
+            index_elements=['dedup_key']
+        ).returning(Notification)
+        return list(db.session.scalars(stmt, rows))
     
     def send_sms_notification(self, notification: Notification) -> bool:
-        """Send SMS notification using Twilio."""
-        if not current_app.config['TWILIO_ACCOUNT_SID']:
-            return False
-            
+        """Send a notification to its user by SMS."""
+        return self._send_over('sms', notification)
+    
+    def send_email_notification(self, notification: Notification) -> bool:
+        """Send a notification to its user by email."""
+        return self._send_over('email', notification)
+    
+    def _send_over(self, channel: str, notification: Notification) -> bool:
+        from app.services.notification_fanout import NotificationFanout
         try:
-            from twilio.rest import Client
-            
-            client = Client(
-                current_app.config['TWILIO_ACCOUNT_SID'],
-                current_app.config['TWILIO_AUTH_TOKEN']
-            )
-            
-            message = client.messages.create(
-                body=notification.message,
-                from_=current_app.config['TWILIO_PHONE_NUMBER'],
-                to=notification.user.phone_number  # You'll need to add this to User model
-            )
-            
-            if message.sid:
-                notification.mark_as_sent()
-                return True
-            return False
-            
+            return NotificationFanout([channel]).deliver([notification])[channel]['sent'] == 1
         except Exception as e:
-            current_app.logger.error(f"Error sending SMS notification: {str(e)}")
-            notification.mark_as_failed()
+            current_app.logger.error(f"Error sending {channel} notification: {str(e)}")
+            db.session.rollback()
             return False
     
-    def send_email_notification(self, notification: Notification) -> bool:
-        """Send email notification."""
-        # TODO: Implement email sending functionality
-        # This would use Flask-Mail or similar
-        return False
+    @staticmethod
+    def _wants_sms(user: User) -> bool:
+        return bool(user.sms_notifications) and bool(user.phone_number)
     
-    def get_user_notifications(self, user: Union[User, int], limit: int = 10) -> List[Notification]:
-        """Get recent notifications for a user.
+    @staticmethod
+    def _urgent_ids(notifications: List[Notification], sms_user_ids: set) -> List[int]:
+        """IDs of the urgent notifications among ``notifications`` for users who take SMS."""
+        return [n.id for n in notifications if n.priority in URGENT_PRIORITIES and n.user_id in sms_user_ids]
+    
+    @staticmethod
+    def _queue_urgent(notification_ids: List[int]):
+        """Queue urgent alerts for SMS in the caller's transaction.
+        
+        Email is covered by the daily digest, so only SMS is queued. The
+        ``send_queued_deliveries`` job sends them, so a slow gateway never
+        holds up the expiry run.
+        """
+        for start in range(0, len(notification_ids), SCAN_BATCH_SIZE):
+            db.session.execute(db.insert(NotificationDelivery), [
+                {'notification_id': notification_id, 'channel': 'sms',
+                 'status': DELIVERY_PENDING, 'attempts': 0}
+                for notification_id in notification_ids[start:start + SCAN_BATCH_SIZE]
+            ])
+    
+    def get_user_notifications(self, user: Union[User, int], limit: int = 10,
+                               cursor: Optional[str] = None) -> List[Notification]:
+        """Get recent notifications for a user, newest first.
+        
+        Pages are keyed by ``(created_at, id)`` so each page is an index range
+        scan no matter how deep it is.
         
         Args:
             user: Either a User object or a user ID
             limit: Maximum number of notifications to return
+            cursor: Cursor of the last notification on the previous page
+                (see ``notification_cursor``)
+        
+        Raises:
+            ValueError: If the cursor is malformed
         """
         user_id = user.id if isinstance(user, User) else user
-        return Notification.query.filter_by(
-            user_id=user_id
-        ).order_by(
-            Notification.created_at.desc()
+        query = Notification.query.filter_by(user_id=user_id)
+        
+        if cursor:
+            created_at, notification_id = self.parse_cursor(cursor)
+            query = query.filter(db.or_(
+                Notification.created_at < created_at,
+                db.and_(Notification.created_at == created_at, Notification.id < notification_id)
+            ))
+        
+        return query.order_by(
+            Notification.created_at.desc(),
+            Notification.id.desc()
         ).limit(limit).all()
     
+    @staticmethod
+    def notification_cursor(notification: Notification) -> str:
+        """Opaque cursor pointing just past ``notification`` in the newest-first order."""
+        raw = f"{notification.created_at.isoformat()}|{notification.id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+    
+    @staticmethod
+    def parse_cursor(cursor: str) -> Tuple[datetime, int]:
+        """Decode a cursor made by ``notification_cursor``."""
+        try:
+            created_at, notification_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+            return datetime.fromisoformat(created_at), int(notification_id)
+        except (ValueError, UnicodeDecodeError, binascii.Error):
+            raise ValueError("Invalid cursor")
+    
+    def get_unread_count(self, user_id: int) -> int:
+        """Number of unread notifications, counted from the partial unread index.
+        
+        Counting at read time keeps notification writes off the ``users`` row,
+        so the nightly run's inserts never lock out a user's mark-read calls.
+        """
+        return db.session.query(db.func.count(Notification.id)).filter(
+            Notification.user_id == user_id,
+            Notification.status == STATUS_UNREAD
+        ).scalar()
+    
+    def stream_events(self, user_id: int, last_event_id: Optional[int] = None) -> Iterator[str]:
+        """Yield Server-Sent Events for a user's new notifications and unread count.
+        
+        Sends the unread count first, then a ``notification`` event (with the
+        notification id as event id) for every notification newer than
+        ``last_event_id`` and an ``unread`` event whenever the count changes.
+        Commits in this process wake the stream at once through the
+        notification broker; writes from other workers are found by checking
+        the database every ``NOTIFICATION_STREAM_POLL_SECONDS``. The stream
+        ends after ``NOTIFICATION_STREAM_MAX_SECONDS`` and the client
+        reconnects with ``Last-Event-ID``.
+        """
+        poll_seconds = current_app.config.get('NOTIFICATION_STREAM_POLL_SECONDS', 5)
+        deadline = time.monotonic() + current_app.config.get('NOTIFICATION_STREAM_MAX_SECONDS', 300)
+        subscription = notification_broker.subscribe(user_id)
+        try:
+            if last_event_id is None:
+                last_event_id = db.session.query(
+                    db.func.max(Notification.id)
+                ).filter(Notification.user_id == user_id).scalar() or 0
+            unread = None
+            
+            while True:
+                new_notifications = Notification.query.filter(
+                    Notification.user_id == user_id,
+                    Notification.id > last_event_id
+                ).order_by(Notification.id).limit(STREAM_BATCH_SIZE).all()
+                count = self.get_unread_count(user_id)
+                
+                events = []
+                for notification in new_notifications:
+                    events.append(self._sse_event('notification', notification.to_dict(), notification.id))
+                    last_event_id = notification.id
+                if count != unread:
+                    events.append(self._sse_event('unread', {'unread': count}))
+                    unread = count
+                # Hand the connection back to the pool while waiting
+                db.session.close()
+                
+                yield ''.join(events) if events else ': keepalive\n\n'
+                
+                if len(new_notifications) == STREAM_BATCH_SIZE:
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    subscription.get(timeout=min(poll_seconds, remaining))
+                except queue.Empty:
+                    pass
+        finally:
+            notification_broker.unsubscribe(user_id, subscription)
+    
+    @staticmethod
+    def _sse_event(name: str, data: Dict, event_id: Optional[int] = None) -> str:
+        """Format one Server-Sent Event."""
+        lines = [f"event: {name}"]
+        if event_id is not None:
+            lines.append(f"id: {event_id}")
+        lines.append(f"data: {json.dumps(data)}")
+        return '\n'.join(lines) + '\n\n'
+    
     def mark_notification_read(self, notification_id: int, user_id: int) -> bool:
         """Mark a notification as read."""
         notification = Notification.query.filter_by(
@@ -222,6 +521,7 @@ class NotificationService:
         
         if notification:
             notification.status = 'read'
+            notification.is_read = True
             db.session.commit()
             return True
         return False 
\ No newline at end of file
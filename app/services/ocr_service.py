@@ -1,5 +1,7 @@
+import gc
 import os
 import re
+import threading
 from datetime import datetime
 from typing import Optional, Dict, Any
 from flask import current_app
@@ -7,10 +9,19 @@ import easyocr
 from PIL import Image
 
 class OCRService:
-    """Service for handling OCR operations."""
+    """Service for handling OCR operations.
+    
+    The easyocr model is loaded on first use and shared by every instance in
+    the process, so importing the API or running CLI commands and tests
+    does not pay for it. With ``OCR_PRELOAD`` set, ``create_app`` loads it
+    up front; run gunicorn with ``--preload`` so that happens once in the
+    master and the forked workers share the model's memory copy-on-write.
+    """
+    
+    _reader = None
+    _reader_lock = threading.Lock()
     
     def __init__(self):
-        self.reader = easyocr.Reader(['en'])
         self.date_patterns = [
             r'(\d{1,2})[-/](\d{1,2})[-/](\d{2,4})',  # DD/MM/YYYY or DD-MM-YYYY
             r'(\d{4})[-/](\d{1,2})[-/](\d{1,2})',    # YYYY/MM/DD or YYYY-MM-DD
@@ -18,6 +29,27 @@ class OCRService:
             r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+(\d{1,2}),?\s+(\d{2,4})'  # MMM DD, YYYY
         ]
     
+    @property
+    def reader(self):
+        """The process-wide easyocr reader, loaded on first use."""
+        return self.load_reader()
+    
+    @classmethod
+    def load_reader(cls):
+        """Load the easyocr reader unless this process already has it."""
+        if cls._reader is None:
+            with cls._reader_lock:
+                if cls._reader is None:
+                    cls._reader = easyocr.Reader(['en'])
+        return cls._reader
+    
+    @classmethod
+    def preload(cls):
+        """Load the reader before workers are forked from this process."""
+        cls.load_reader()
+        # Keep the collector from touching (and so copying) the shared pages
+        gc.freeze()
+    
     def extract_date_from_image(self, image_path: str) -> Optional[datetime]:
         """Extract expiry date from an image."""
         try:
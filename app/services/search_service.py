@@ -0,0 +1,107 @@
+import re
+from typing import List
+from weakref import WeakKeyDictionary
+from flask import current_app
+from sqlalchemy import event, inspect
+from app.core.extensions import db
+from app.models.item import Item, SEARCH_FTS_TABLE
+
+# Relative weights of name, description and unit when ranking FTS matches
+FTS_COLUMN_WEIGHTS = (10.0, 1.0, 2.0)
+
+# Escape character for literal LIKE matching
+LIKE_ESCAPE = '!'
+
+# Whether each engine's database has the FTS5 table, so the schema is
+# inspected once per engine rather than on every search
+_fts_tables = WeakKeyDictionary()
+
+def _forget_fts_table(target, connection, **kw):
+    """Drop the cached answer when the items table is created or dropped."""
+    _fts_tables.pop(connection.engine, None)
+
+event.listen(Item.__table__, 'after_create', _forget_fts_table)
+event.listen(Item.__table__, 'after_drop', _forget_fts_table)
+
+class SearchService:
+    """Service for indexed inventory search.
+
+    PostgreSQL searches go through pg_trgm GIN indexes on ``name``,
+    ``description`` and ``unit`` and are ranked by word similarity, with
+    prefix matches on the name first. SQLite searches go through the
+    ``items_fts`` FTS5 table, matching every term as a prefix and ranking by
+    BM25. Any other backend falls back to unindexed ``ILIKE`` filtering.
+    """
+
+    def apply_search(self, query, term: str):
+        """Filter and rank an ``Item`` query by a free-text search term."""
+        term = term.strip()
+        if not term:
+            return query
+
+        dialect = db.engine.dialect.name
+        if dialect == 'postgresql':
+            return self._search_trigram(query, term)
+        if dialect == 'sqlite' and self._has_fts_table():
+            return self._search_fts(query, term)
+        return self._search_like(query, term)
+
+    def _search_trigram(self, query, term: str):
+        """Substring match served by the trigram indexes, best matches first."""
+        return self._search_like(query, term).order_by(
+            Item.name.ilike(f'{self._escape_like(term)}%', escape=LIKE_ESCAPE).desc(),
+            db.func.word_similarity(term, Item.name).desc(),
+            Item.id.asc()
+        )
+
+    def _search_fts(self, query, term: str):
+        """Prefix match against the FTS5 shadow table, ranked by BM25."""
+        match = self._fts_match_expression(term)
+        if not match:
+            return self._search_like(query, term)
+
+        weights = ', '.join(str(weight) for weight in FTS_COLUMN_WEIGHTS)
+        matches = db.text(
+            f'SELECT rowid AS id, bm25({SEARCH_FTS_TABLE}, {weights}) AS rank '
+            f'FROM {SEARCH_FTS_TABLE} WHERE {SEARCH_FTS_TABLE} MATCH :match'
+        ).bindparams(match=match).columns(id=db.Integer, rank=db.Float).subquery()
+        return query.join(matches, matches.c.id == Item.id).order_by(
+            matches.c.rank.asc(),
+            Item.id.asc()
+        )
+
+    def _search_like(self, query, term: str):
+        """Case-insensitive substring match (index-backed on PostgreSQL)."""
+        pattern = f'%{self._escape_like(term)}%'
+        return query.filter(
+            db.or_(
+                Item.name.ilike(pattern, escape=LIKE_ESCAPE),
+                Item.description.ilike(pattern, escape=LIKE_ESCAPE),
+                Item.unit.ilike(pattern, escape=LIKE_ESCAPE)
+            )
+        )
+
+    @staticmethod
+    def _escape_like(term: str) -> str:
+        """Escape LIKE wildcards so the term is matched literally."""
+        return (term.replace(LIKE_ESCAPE, LIKE_ESCAPE * 2)
+                .replace('%', f'{LIKE_ESCAPE}%')
+                .replace('_', f'{LIKE_ESCAPE}_'))
+
+    @staticmethod
+    def _fts_match_expression(term: str) -> str:
+        """Build an FTS5 query that requires every word of ``term`` as a prefix."""
+        tokens: List[str] = re.findall(r'\w+', term)
+        return ' '.join(f'"{token}"*' for token in tokens)
+
+    @staticmethod
+    def _has_fts_table() -> bool:
+        """Check whether the FTS5 shadow table exists in this database."""
+        engine = db.engine
+        if engine not in _fts_tables:
+            try:
+                _fts_tables[engine] = inspect(engine).has_table(SEARCH_FTS_TABLE)
+            except Exception as e:
+                current_app.logger.warning(f"Could not inspect search index: {str(e)}")
+                return False
+        return _fts_tables[engine]
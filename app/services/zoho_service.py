@@ -12,7 +12,9 @@ from app.models.user import User
 class ZohoService:
     """Service for handling Zoho API interactions."""
     
-    def __init__(self):
+    def __init__(self, access_token: Optional[str] = None):
+        """Create the service; background jobs pass the ``access_token`` a request handed them."""
+        self._access_token = access_token
         self.client_id = current_app.config['ZOHO_CLIENT_ID']
         self.client_secret = current_app.config['ZOHO_CLIENT_SECRET']
         self.redirect_uri = current_app.config['ZOHO_REDIRECT_URI']
@@ -20,6 +22,8 @@ class ZohoService:
     
     def get_access_token(self) -> Optional[str]:
         """Get the current access token from session."""
+        if self._access_token is not None:
+            return self._access_token
         token = session.get('zoho_access_token')
         expires_at = session.get('zoho_token_expires_at')
         
@@ -37,6 +41,9 @@ class ZohoService:
     
     def get_refresh_token(self) -> Optional[str]:
         """Get the refresh token from session."""
+        if self._access_token is not None:
+            # Outside the request a refreshed token could not be kept
+            return None
         return session.get('zoho_refresh_token')
     
     def refresh_token(self) -> bool:
@@ -119,6 +126,11 @@ class ZohoService:
     def sync_inventory(self, user: User) -> bool:
         """Sync inventory with Zoho."""
         try:
+            # Cleaned-up items are deactivated in the background; until then
+            # they are still active in Zoho and must not be imported again
+            self.queue_deactivation_flush(user)
+            queued_zoho_ids = self._queued_deactivation_ids(user)
+            
             # Get items from Zoho
             zoho_items = self.get_inventory()
             if not zoho_items:
@@ -178,9 +190,14 @@ class ZohoService:
             # Add new items from Zoho
             for zoho_item in zoho_items:
                 zoho_item_id = zoho_item['item_id']
+                if zoho_item_id in queued_zoho_ids:
+                    continue
                 if zoho_item_id not in existing_zoho_ids:
                     # Check if item already exists with this Zoho ID for any user
-                    existing_item = Item.query.filter_by(zoho_item_id=zoho_item_id).first()
+                    existing_item = Item.including_deleted().filter_by(zoho_item_id=zoho_item_id).first()
+                    if existing_item and existing_item.deleted_at is not None:
+                        # Cleaned up and awaiting the purge; its deactivation is still queued
+                        continue
                     if existing_item:
                         # Only update if the item belongs to the current user
                         if existing_item.user_id == user.id:
@@ -551,29 +568,82 @@ class ZohoService:
             current_app.logger.error(f"Error marking item as inactive in Zoho: {str(e)}")
             return False
 
+    def queue_deactivation_flush(self, user: User) -> bool:
+        """Hand the user's queued deactivations to a background job.
+        
+        The Zoho calls run on the scheduler's thread pool with this request's
+        access token, so the page never waits on them. Returns whether a job
+        was queued.
+        """
+        from app.core.extensions import scheduler
+        from app.tasks.zoho_deactivations import flush_zoho_deactivations
+        if not self._queued_deactivation_ids(user):
+            return False
+        access_token = self.get_access_token()
+        if not access_token:
+            return False
+        scheduler.add_job(id=f'zoho_deactivations_{user.id}', func=flush_zoho_deactivations,
+                          args=[user.id, access_token], trigger='date', replace_existing=True)
+        return True
+
+    @staticmethod
+    def _queued_deactivation_ids(user: User) -> set:
+        """Zoho IDs of the user's items still waiting to be deactivated."""
+        from app.models.zoho_deactivation import ZohoDeactivation, DEACTIVATION_PENDING
+        return {zoho_item_id for (zoho_item_id,) in db.session.query(ZohoDeactivation.zoho_item_id).filter(
+            ZohoDeactivation.user_id == user.id,
+            ZohoDeactivation.status == DEACTIVATION_PENDING
+        )}
+
+    def flush_deactivations(self, user: User) -> int:
+        """Mark items queued by the expired-item cleanup inactive in Zoho.
+        
+        Returns the number of items Zoho accepted.
+        """
+        from app.models.zoho_deactivation import (
+            ZohoDeactivation, DEACTIVATION_PENDING, DEACTIVATION_DONE, DEACTIVATION_FAILED
+        )
+        max_attempts = current_app.config.get('ZOHO_DEACTIVATION_MAX_ATTEMPTS', 5)
+        pending = ZohoDeactivation.query.filter_by(
+            user_id=user.id, status=DEACTIVATION_PENDING
+        ).order_by(ZohoDeactivation.id).limit(current_app.config.get('ZOHO_DEACTIVATION_BATCH_SIZE', 100)).all()
+        
+        done = 0
+        for deactivation in pending:
+            deactivation.attempts += 1
+            if self.delete_item_in_zoho(deactivation.zoho_item_id):
+                deactivation.status = DEACTIVATION_DONE
+                deactivation.processed_at = datetime.utcnow()
+                deactivation.last_error = None
+                done += 1
+            else:
+                deactivation.last_error = 'Zoho did not accept the update'
+                if deactivation.attempts >= max_attempts:
+                    deactivation.status = DEACTIVATION_FAILED
+        if pending:
+            db.session.commit()
+            current_app.logger.info(f"Deactivated {done} of {len(pending)} cleaned-up items in Zoho")
+        return done
+
     def check_and_update_expired_items(self, user: User) -> bool:
         """Check for expired items and update their status in Zoho."""
         try:
-            # Get all items for the user
-            items = Item.query.filter_by(user_id=user.id).all()
-            current_date = datetime.now().date()
+            # Get the user's expired items that are synced with Zoho
+            items = Item.expired_query(user.id).filter(
+                Item.zoho_item_id.isnot(None)
+            ).all()
             
             for item in items:
-                if not item.zoho_item_id or not item.expiry_date:
-                    continue
-                    
-                # Check if item has expired
-                if item.expiry_date.date() <= current_date:
-                    # Update item status in Zoho to inactive
-                    self.update_item_in_zoho(item.zoho_item_id, {
-                        "name": item.name,
-                        "unit": item.unit,
-                        "rate": item.selling_price,
-                        "stock_on_hand": item.quantity,
-                        "description": item.description or "",
-                        "expiry_date": item.expiry_date.strftime('%Y-%m-%d'),
-                        "status": "inactive"
-                    })
+                # Update item status in Zoho to inactive
+                self.update_item_in_zoho(item.zoho_item_id, {
+                    "name": item.name,
+                    "unit": item.unit,
+                    "rate": item.selling_price,
+                    "stock_on_hand": item.quantity,
+                    "description": item.description or "",
+                    "expiry_date": item.expiry_date.strftime('%Y-%m-%d'),
+                    "status": "inactive"
+                })
             
             return True
             
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+from app.core.extensions import db
+from app.models.notification import Notification, NotificationArchive
+from app.models.notification_delivery import NotificationDelivery
+from flask import current_app
+
+# Columns copied from the hot table into the archive
+ARCHIVED_COLUMNS = ('id', 'user_id', 'item_id', 'message', 'type', 'priority',
+                    'status', 'is_read', 'created_at', 'dedup_key')
+
+def archive_notifications():
+    """Move read or old notifications to the archive table in chunks.
+
+    Read notifications older than ``NOTIFICATION_READ_RETENTION_DAYS`` and
+    any notification older than ``NOTIFICATION_RETENTION_DAYS`` are copied to
+    ``notifications_archive`` and deleted, ``NOTIFICATION_ARCHIVE_BATCH_SIZE``
+    rows per transaction, so the hot table stays small without long locks.
+
+    Returns:
+        int: Number of notifications archived
+    """
+    now = datetime.utcnow()
+    read_cutoff = now - timedelta(days=current_app.config.get('NOTIFICATION_READ_RETENTION_DAYS', 30))
+    cutoff = now - timedelta(days=current_app.config.get('NOTIFICATION_RETENTION_DAYS', 90))
+    batch_size = current_app.config.get('NOTIFICATION_ARCHIVE_BATCH_SIZE', 1000)
+
+    archivable = db.or_(
+        Notification.created_at < cutoff,
+        db.and_(
+            Notification.created_at < read_cutoff,
+            db.or_(Notification.status == 'read', Notification.is_read.is_(True))
+        )
+    )
+
+    archived = 0
+    last_id = 0
+    try:
+        while True:
+            # Walk the table by id so each chunk starts where the last one ended
+            ids = [notification_id for (notification_id,) in db.session.query(Notification.id).filter(
+                Notification.id > last_id,
+                archivable
+            ).order_by(Notification.id).limit(batch_size)]
+            if not ids:
+                break
+
+            columns = [getattr(Notification, name) for name in ARCHIVED_COLUMNS]
+            db.session.execute(
+                db.insert(NotificationArchive).from_select(
+                    list(ARCHIVED_COLUMNS),
+                    db.select(*columns).where(Notification.id.in_(ids))
+                )
+            )
+            # Delivery records go with the notification
+            db.session.execute(
+                db.delete(NotificationDelivery).where(NotificationDelivery.notification_id.in_(ids)),
+                execution_options={'synchronize_session': False}
+            )
+            db.session.execute(
+                db.delete(Notification).where(Notification.id.in_(ids)),
+                execution_options={'synchronize_session': False}
+            )
+            db.session.commit()
+
+            archived += len(ids)
+            last_id = ids[-1]
+            if len(ids) < batch_size:
+                break
+
+        current_app.logger.info(f"Archived {archived} notifications")
+    except Exception as e:
+        current_app.logger.error(f"Error archiving notifications: {str(e)}")
+        db.session.rollback()
+        raise
+
+    return archived
@@ -1,42 +1,149 @@
 from datetime import datetime, timedelta
 from app.core.extensions import db
-from app.models.item import Item
+from app.models.item import Item, STATUS_EXPIRED
 from app.models.notification import Notification
-from app.services.zoho_service import ZohoService
+from app.models.job_watermark import JobWatermark
+from app.models.zoho_deactivation import ZohoDeactivation
 from flask import current_app
 
-def cleanup_expired_items():
-    """Cleanup expired items and send notifications."""
+# Progress is kept under the job's registered name
+WATERMARK_JOB = 'cleanup_expired_items'
+
+def cleanup_expired_items(day=None):
+    """Cleanup expired items and send notifications.
+
+    Scheduled runs catch up from a watermark: every day after the last one
+    fully cleaned up, through yesterday, is processed oldest first, and the
+    watermark moves forward as each day finishes. A missed night is simply
+    picked up by the next run. Items that only appear behind the watermark
+    (created, imported or edited with an expiry date it has already passed)
+    are then swept up by id, so none are left behind for good. A run stops
+    after
+    ``CLEANUP_MAX_BATCHES_PER_RUN`` chunks, so a large backlog drains over
+    several hourly runs rather than in one long one.
+
+    Items are soft-deleted in chunks of ``CLEANUP_BATCH_SIZE``. Each chunk
+    is one transaction: a bulk insert of the users' notifications, a bulk
+    insert of Zoho deactivations (sent after the user's next Zoho sync), and an
+    ``UPDATE ... SET deleted_at`` by id. Only ``deleted_at`` is written, so
+    the cleanup takes no delete locks on ``items``; ``purge_deleted_items``
+    moves the rows to ``items_archive`` later. A failure only rolls back the
+    chunk it happened in, and since finished chunks no longer match the
+    query a rerun picks up exactly where a crashed run stopped.
+
+    Args:
+        day: Expiry date to clean up; given for backfills, which process
+            just that day and leave the watermark alone
+
+    Returns:
+        int: Number of items removed
+    """
+    batch_size = current_app.config.get('CLEANUP_BATCH_SIZE', 500)
+    removed = 0
     try:
-        current_date = datetime.now().date()
-        yesterday = current_date - timedelta(days=1)
-        
-        # Find items that expired yesterday
-        expired_items = Item.query.filter(
-            Item.expiry_date == yesterday,
-            Item.status == 'Expired'
-        ).all()
-        
-        zoho_service = ZohoService()
-        
-        for item in expired_items:
-            # Create notification for the user
-            notification = Notification(
-                user_id=item.user_id,
-                message=f"Item '{item.name}' (ID: {item.id}) has expired and will be removed from the system."
-            )
-            db.session.add(notification)
-            
-            # Mark item as inactive in Zoho if it has a Zoho ID
-            if item.zoho_item_id:
-                zoho_service.delete_item_in_zoho(item.zoho_item_id)
-            
-            # Remove item from database
-            db.session.delete(item)
-        
-        db.session.commit()
-        current_app.logger.info(f"Successfully cleaned up {len(expired_items)} expired items")
-        
+        if day is not None:
+            removed = _cleanup_day(day, batch_size)
+        else:
+            removed = _catch_up(batch_size, current_app.config.get('CLEANUP_MAX_BATCHES_PER_RUN', 40))
+        current_app.logger.info(f"Successfully cleaned up {removed} expired items")
+        return removed
+
     except Exception as e:
         current_app.logger.error(f"Error cleaning up expired items: {str(e)}")
-        db.session.rollback() 
\ No newline at end of file
+        db.session.rollback()
+        raise
+
+def _catch_up(batch_size, max_batches):
+    """Clean up every day since the watermark through yesterday; returns items removed."""
+    through = datetime.now().date() - timedelta(days=1)
+    removed = 0
+    batches = 0
+    while True:
+        watermark = JobWatermark.get(WATERMARK_JOB)
+        day = _next_expired_day(watermark, through)
+        if day is None:
+            # Nothing left up to yesterday, including the days in between
+            JobWatermark.advance(WATERMARK_JOB, through)
+            db.session.commit()
+            return removed + _sweep_late_items(through, batch_size, max_batches - batches)
+
+        while True:
+            if batches >= max_batches:
+                current_app.logger.info(
+                    f"Cleanup stopped after {batches} batches; resuming from {day} on the next run"
+                )
+                return removed
+            chunk = _cleanup_chunk(Item.expiry_date == day, batch_size)
+            removed += chunk
+            batches += 1
+            if chunk < batch_size:
+                break
+
+        JobWatermark.advance(WATERMARK_JOB, day)
+        db.session.commit()
+
+def _next_expired_day(after, through):
+    """The earliest day after ``after`` and up to ``through`` with expired items.
+
+    Expiry is judged by ``expiry_date`` alone: ``status`` is only refreshed
+    periodically. Days the watermark has passed are left to
+    ``_sweep_late_items``.
+    """
+    query = db.session.query(db.func.min(Item.expiry_date)).filter(
+        Item.expiry_date <= through
+    )
+    if after is not None:
+        query = query.filter(Item.expiry_date > after)
+    return query.scalar()
+
+def _sweep_late_items(through, batch_size, max_batches):
+    """Remove items expired through ``through`` that the day walk passed by; returns how many."""
+    removed = 0
+    for _ in range(max_batches):
+        chunk = _cleanup_chunk(Item.expiry_date <= through, batch_size)
+        removed += chunk
+        if chunk < batch_size:
+            return removed
+    current_app.logger.info("Cleanup stopped mid-sweep; the rest of the late items go on the next run")
+    return removed
+
+def _cleanup_day(day, batch_size):
+    """Remove every item that expired on ``day``; returns how many."""
+    if day >= datetime.now().date():
+        return 0
+    removed = 0
+    while True:
+        chunk = _cleanup_chunk(Item.expiry_date == day, batch_size)
+        removed += chunk
+        if chunk < batch_size:
+            return removed
+
+def _cleanup_chunk(condition, batch_size):
+    """Soft-delete one chunk of the items matching ``condition``; returns its size."""
+    rows = db.session.query(Item.id, Item.user_id, Item.name, Item.zoho_item_id).filter(
+        condition
+    ).order_by(Item.id).limit(batch_size).all()
+    if not rows:
+        return 0
+
+    ids = [row.id for row in rows]
+    db.session.execute(db.insert(Notification), [
+        {
+            'user_id': row.user_id,
+            'message': f"Item '{row.name}' (ID: {row.id}) has expired and will be removed from the system."
+        }
+        for row in rows
+    ])
+    deactivations = [
+        {'user_id': row.user_id, 'zoho_item_id': row.zoho_item_id}
+        for row in rows if row.zoho_item_id
+    ]
+    if deactivations:
+        db.session.execute(db.insert(ZohoDeactivation), deactivations)
+
+    db.session.execute(
+        db.update(Item).where(Item.id.in_(ids)).values(status=STATUS_EXPIRED, deleted_at=datetime.utcnow()),
+        execution_options={'synchronize_session': False}
+    )
+    db.session.commit()
+    return len(ids)
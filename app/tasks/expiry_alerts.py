@@ -0,0 +1,25 @@
+from app.core.extensions import alert_scheduler
+from app.services.notification_service import NotificationService
+from flask import current_app
+
+def send_due_alerts():
+    """Create notifications for expiry alerts that have come due.
+    
+    Returns:
+        int: Number of notifications created
+    """
+    alerts = []
+    try:
+        alerts = alert_scheduler.pop_due()
+        if not alerts:
+            return 0
+        notifications = NotificationService().send_due_alerts(alerts)
+        current_app.logger.info(f"Fired {len(alerts)} expiry alerts, {len(notifications)} new notifications")
+        return len(notifications)
+    except Exception as e:
+        current_app.logger.error(f"Error sending due expiry alerts: {str(e)}")
+        from app.core.extensions import db
+        db.session.rollback()
+        # Nothing was stored; let the next run fire them again
+        alert_scheduler.requeue(alerts)
+        raise
@@ -0,0 +1,15 @@
+from flask import current_app
+from app.services.notification_runner import NotificationRunner
+
+def check_expiry_dates():
+    """Run the full expiry notification check over every shard.
+    
+    The shards run one after another in this process; run them in parallel
+    with ``flask notify --processes N`` from a dedicated process instead.
+    
+    Returns:
+        int: Number of notifications created
+    """
+    summary = NotificationRunner().run(shard_count=current_app.config.get('NOTIFICATION_RUN_SHARDS') or None,
+                                       processes=1)
+    return summary['notifications']
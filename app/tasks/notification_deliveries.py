@@ -0,0 +1,30 @@
+from app.core.extensions import db
+from app.services.notification_channels import CHANNELS
+from app.services.notification_fanout import NotificationFanout
+from flask import current_app
+
+def send_queued_deliveries():
+    """Send notification deliveries queued for external channels.
+
+    The expiry run only queues urgent SMS as ``notification_deliveries``
+    rows; this job sends up to ``NOTIFICATION_DELIVERY_BATCH_SIZE`` of them
+    per run, paced by each channel's rate limiter, and retries failures up
+    to ``NOTIFICATION_DELIVERY_MAX_ATTEMPTS`` times.
+
+    Returns:
+        int: Number of messages sent
+    """
+    channels = [name for name in current_app.config.get('NOTIFICATION_CHANNELS', list(CHANNELS))
+                if not CHANNELS[name].stored]
+    if not channels:
+        return 0
+    try:
+        counts = NotificationFanout(channels).deliver_queued(
+            current_app.config.get('NOTIFICATION_DELIVERY_BATCH_SIZE', 200),
+            current_app.config.get('NOTIFICATION_DELIVERY_MAX_ATTEMPTS', 5)
+        )
+        return sum(stats['sent'] for stats in counts.values())
+    except Exception as e:
+        current_app.logger.error(f"Error sending queued notification deliveries: {str(e)}")
+        db.session.rollback()
+        raise
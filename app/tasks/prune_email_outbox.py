@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+from app.core.extensions import db
+from app.models.email_outbox import EmailOutbox, OUTBOX_SENT
+from flask import current_app
+
+def prune_email_outbox():
+    """Delete sent outbox emails older than the retention period in chunks.
+
+    Sent rows older than ``EMAIL_OUTBOX_SENT_RETENTION_DAYS`` are deleted,
+    ``EMAIL_OUTBOX_PRUNE_BATCH_SIZE`` rows per transaction, so the outbox
+    only holds recent history. Failed rows are kept for inspection.
+
+    Returns:
+        int: Number of outbox rows deleted
+    """
+    cutoff = datetime.utcnow() - timedelta(days=current_app.config.get('EMAIL_OUTBOX_SENT_RETENTION_DAYS', 7))
+    batch_size = current_app.config.get('EMAIL_OUTBOX_PRUNE_BATCH_SIZE', 1000)
+    lease = timedelta(seconds=current_app.config.get('EMAIL_OUTBOX_LEASE_SECONDS', 600))
+
+    # A sent row's next_attempt_at is the end of the lease it was sent under,
+    # so bounding it as well lets idx_email_outbox_due narrow the scan
+    prunable = db.and_(
+        EmailOutbox.status == OUTBOX_SENT,
+        EmailOutbox.next_attempt_at < cutoff + lease,
+        EmailOutbox.sent_at < cutoff
+    )
+
+    pruned = 0
+    last_id = 0
+    try:
+        while True:
+            # Walk the table by id so each chunk starts where the last one ended
+            ids = [entry_id for (entry_id,) in db.session.query(EmailOutbox.id).filter(
+                EmailOutbox.id > last_id,
+                prunable
+            ).order_by(EmailOutbox.id).limit(batch_size)]
+            if not ids:
+                break
+
+            db.session.execute(
+                db.delete(EmailOutbox).where(EmailOutbox.id.in_(ids)),
+                execution_options={'synchronize_session': False}
+            )
+            db.session.commit()
+
+            pruned += len(ids)
+            last_id = ids[-1]
+            if len(ids) < batch_size:
+                break
+
+        current_app.logger.info(f"Pruned {pruned} sent outbox emails")
+    except Exception as e:
+        current_app.logger.error(f"Error pruning the email outbox: {str(e)}")
+        db.session.rollback()
+        raise
+
+    return pruned
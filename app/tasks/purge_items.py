@@ -0,0 +1,70 @@
+import time
+from datetime import datetime, timedelta
+from app.core.extensions import db
+from app.models.item import Item, ItemArchive, INCLUDE_DELETED
+from app.models.notification import Notification
+from flask import current_app
+
+# Columns copied from the hot table into the archive
+ARCHIVED_COLUMNS = ('id', 'user_id', 'name', 'description', 'quantity', 'unit', 'batch_number',
+                    'purchase_date', 'expiry_date', 'purchase_price', 'selling_price', 'cost_price',
+                    'discounted_price', 'location', 'status', 'zoho_item_id', 'created_at', 'deleted_at')
+
+def purge_deleted_items():
+    """Move soft-deleted items to the archive table in small chunks.
+
+    Items soft-deleted more than ``ITEM_PURGE_AFTER_HOURS`` ago are copied
+    to ``items_archive``, their notifications are unlinked, and they are
+    deleted from ``items``, ``ITEM_PURGE_BATCH_SIZE`` rows per transaction.
+    The job runs off-peak and sleeps ``ITEM_PURGE_PAUSE_SECONDS`` between
+    chunks, so its row locks never queue up behind or ahead of user traffic.
+
+    Returns:
+        int: Number of items archived
+    """
+    cutoff = datetime.utcnow() - timedelta(hours=current_app.config.get('ITEM_PURGE_AFTER_HOURS', 24))
+    batch_size = current_app.config.get('ITEM_PURGE_BATCH_SIZE', 200)
+    pause = current_app.config.get('ITEM_PURGE_PAUSE_SECONDS', 0.5)
+    options = {INCLUDE_DELETED: True, 'synchronize_session': False}
+
+    purged = 0
+    last_id = 0
+    try:
+        while True:
+            # Walk the table by id so each chunk starts where the last one ended
+            ids = [item_id for (item_id,) in db.session.query(Item.id).filter(
+                Item.id > last_id,
+                Item.deleted_at < cutoff
+            ).order_by(Item.id).limit(batch_size).execution_options(**{INCLUDE_DELETED: True})]
+            if not ids:
+                break
+
+            columns = [getattr(Item, name) for name in ARCHIVED_COLUMNS]
+            db.session.execute(
+                db.insert(ItemArchive).from_select(
+                    list(ARCHIVED_COLUMNS),
+                    db.select(*columns).where(Item.id.in_(ids))
+                ),
+                execution_options=options
+            )
+            # Earlier notifications keep their text but lose the link to the item
+            db.session.execute(
+                db.update(Notification).where(Notification.item_id.in_(ids)).values(item_id=None),
+                execution_options=options
+            )
+            db.session.execute(db.delete(Item).where(Item.id.in_(ids)), execution_options=options)
+            db.session.commit()
+
+            purged += len(ids)
+            last_id = ids[-1]
+            if len(ids) < batch_size:
+                break
+            time.sleep(pause)
+
+        current_app.logger.info(f"Archived {purged} deleted items")
+    except Exception as e:
+        current_app.logger.error(f"Error purging deleted items: {str(e)}")
+        db.session.rollback()
+        raise
+
+    return purged
@@ -0,0 +1,25 @@
+from app.core.extensions import db, scheduler
+from app.models.user import User
+from app.services.zoho_service import ZohoService
+
+def flush_zoho_deactivations(user_id, access_token):
+    """Send a user's queued Zoho deactivations in the background.
+
+    Zoho tokens only live in the user's session, so the inventory page
+    hands its access token to this one-off job instead of making the calls
+    inside the request. The token is not refreshed here: if it has expired,
+    the rows stay queued and go out after the user's next visit.
+
+    Returns:
+        int: Number of items Zoho accepted
+    """
+    with scheduler.app.app_context():
+        try:
+            user = db.session.get(User, user_id)
+            if user is None:
+                return 0
+            return ZohoService(access_token=access_token).flush_deactivations(user)
+        except Exception as e:
+            scheduler.app.logger.error(f"Error flushing Zoho deactivations for user {user_id}: {str(e)}")
+            db.session.rollback()
+            raise
@@ -0,0 +1,42 @@
+"""Add notification_deliveries and users.phone_number
+
+Revision ID: 0d6b9e3a7c21
+Revises: f4c7a2d9e815
+Create Date: 2025-04-23 16:40:08.273951
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0d6b9e3a7c21'
+down_revision = 'f4c7a2d9e815'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('users', sa.Column('phone_number', sa.String(length=20), nullable=True))
+
+    op.create_table('notification_deliveries',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('notification_id', sa.Integer(), nullable=False),
+        sa.Column('channel', sa.String(length=20), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['notification_id'], ['notifications.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('uq_notification_deliveries_channel', 'notification_deliveries',
+                    ['notification_id', 'channel'], unique=True)
+
+
+def downgrade():
+    op.drop_index('uq_notification_deliveries_channel', table_name='notification_deliveries')
+    op.drop_table('notification_deliveries')
+    op.drop_column('users', 'phone_number')
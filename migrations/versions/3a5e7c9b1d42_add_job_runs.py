@@ -0,0 +1,41 @@
+"""Add job_runs table
+
+Revision ID: 3a5e7c9b1d42
+Revises: 0d6b9e3a7c21
+Create Date: 2025-04-25 10:22:51.604317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3a5e7c9b1d42'
+down_revision = '0d6b9e3a7c21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('job_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('job_id', sa.String(length=100), nullable=False),
+        sa.Column('trigger', sa.String(length=20), nullable=False),
+        sa.Column('run_for', sa.Date(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('duration_seconds', sa.Float(), nullable=True),
+        sa.Column('rows_processed', sa.Integer(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('worker', sa.String(length=100), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_job_runs_job_started', 'job_runs', ['job_id', 'started_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('idx_job_runs_job_started', table_name='job_runs')
+    op.drop_table('job_runs')
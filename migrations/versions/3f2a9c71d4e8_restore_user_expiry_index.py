@@ -0,0 +1,25 @@
+"""Restore (user_id, expiry_date) index on items
+
+Revision ID: 3f2a9c71d4e8
+Revises: bb1ce8cf50c2
+Create Date: 2025-04-02 10:14:27.513209
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2a9c71d4e8'
+down_revision = 'bb1ce8cf50c2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Expiring/expired inventory lookups are range scans on expiry_date per user
+    op.create_index('idx_user_expiry', 'items', ['user_id', 'expiry_date'], unique=False)
+
+
+def downgrade():
+    op.drop_index('idx_user_expiry', table_name='items')
@@ -0,0 +1,30 @@
+"""Add scheduler_leases table
+
+Revision ID: 5c2d8f1a9b36
+Revises: 8e1f4b6d2a07
+Create Date: 2025-04-29 10:12:44.516203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c2d8f1a9b36'
+down_revision = '8e1f4b6d2a07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('scheduler_leases',
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('holder', sa.String(length=200), nullable=False),
+        sa.Column('acquired_at', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('scheduler_leases')
@@ -0,0 +1,36 @@
+"""Add last_digest_sent_at to users
+
+Revision ID: 5e8f3a1c0b72
+Revises: a6b19f2e7c35
+Create Date: 2025-04-08 11:03:46.905127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e8f3a1c0b72'
+down_revision = 'a6b19f2e7c35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('users', sa.Column('last_digest_sent_at', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_users_last_digest_sent_at'), 'users', ['last_digest_sent_at'], unique=False)
+
+    # Carry over the throttle state recorded as synthetic "email sent" notifications
+    op.execute("""
+        UPDATE users SET last_digest_sent_at = (
+            SELECT MAX(notifications.created_at) FROM notifications
+            WHERE notifications.user_id = users.id
+              AND notifications.type = 'email'
+              AND notifications.status = 'sent'
+        )
+    """)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_users_last_digest_sent_at'), table_name='users')
+    op.drop_column('users', 'last_digest_sent_at')
@@ -0,0 +1,35 @@
+"""Store items.expiry_date as DATE with a partial index
+
+Revision ID: 8c4d1e6b2a90
+Revises: 3f2a9c71d4e8
+Create Date: 2025-04-03 09:41:52.118406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c4d1e6b2a90'
+down_revision = '3f2a9c71d4e8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.alter_column('items', 'expiry_date',
+               existing_type=sa.DateTime(),
+               type_=sa.Date(),
+               existing_nullable=True,
+               postgresql_using='expiry_date::date')
+    op.create_index('idx_expiry_date', 'items', ['expiry_date'], unique=False,
+                    postgresql_where=sa.text('expiry_date IS NOT NULL'))
+
+
+def downgrade():
+    op.drop_index('idx_expiry_date', table_name='items')
+    op.alter_column('items', 'expiry_date',
+               existing_type=sa.Date(),
+               type_=sa.DateTime(),
+               existing_nullable=True,
+               postgresql_using='expiry_date::timestamp')
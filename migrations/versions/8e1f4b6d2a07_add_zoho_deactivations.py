@@ -0,0 +1,39 @@
+"""Add zoho_deactivations table
+
+Revision ID: 8e1f4b6d2a07
+Revises: 3a5e7c9b1d42
+Create Date: 2025-04-28 13:47:19.082643
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e1f4b6d2a07'
+down_revision = '3a5e7c9b1d42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('zoho_deactivations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('zoho_item_id', sa.String(length=100), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('processed_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_zoho_deactivations_user_status', 'zoho_deactivations',
+                    ['user_id', 'status'], unique=False)
+
+
+def downgrade():
+    op.drop_index('idx_zoho_deactivations_user_status', table_name='zoho_deactivations')
+    op.drop_table('zoho_deactivations')
@@ -0,0 +1,29 @@
+"""Add job_watermarks table
+
+Revision ID: 9d3b7f2e6c18
+Revises: 5c2d8f1a9b36
+Create Date: 2025-04-30 09:26:51.204817
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d3b7f2e6c18'
+down_revision = '5c2d8f1a9b36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('job_watermarks',
+        sa.Column('job_id', sa.String(length=100), nullable=False),
+        sa.Column('processed_through', sa.Date(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('job_id')
+    )
+
+
+def downgrade():
+    op.drop_table('job_watermarks')
@@ -0,0 +1,26 @@
+"""Add dedup_key to notifications
+
+Revision ID: a6b19f2e7c35
+Revises: d57e0b3c9f14
+Create Date: 2025-04-07 08:55:31.274913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6b19f2e7c35'
+down_revision = 'd57e0b3c9f14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('notifications', sa.Column('dedup_key', sa.String(length=120), nullable=True))
+    op.create_index('uq_notifications_dedup_key', 'notifications', ['dedup_key'], unique=True)
+
+
+def downgrade():
+    op.drop_index('uq_notifications_dedup_key', table_name='notifications')
+    op.drop_column('notifications', 'dedup_key')
@@ -0,0 +1,64 @@
+"""Soft delete items and add items_archive table
+
+Revision ID: b47e2c9d1f53
+Revises: 9d3b7f2e6c18
+Create Date: 2025-05-02 11:38:05.917342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b47e2c9d1f53'
+down_revision = '9d3b7f2e6c18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('items', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+    # Per-user expiry lookups only ever read live items
+    op.drop_index('idx_user_expiry', table_name='items')
+    op.create_index('idx_user_expiry', 'items', ['user_id', 'expiry_date'], unique=False,
+                    postgresql_where=sa.text('deleted_at IS NULL'),
+                    sqlite_where=sa.text('deleted_at IS NULL'))
+    op.create_index('idx_items_deleted_at', 'items', ['deleted_at'], unique=False,
+                    postgresql_where=sa.text('deleted_at IS NOT NULL'),
+                    sqlite_where=sa.text('deleted_at IS NOT NULL'))
+
+    op.create_table('items_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('quantity', sa.Float(), nullable=True),
+        sa.Column('unit', sa.String(length=20), nullable=True),
+        sa.Column('batch_number', sa.String(length=50), nullable=True),
+        sa.Column('purchase_date', sa.DateTime(), nullable=True),
+        sa.Column('expiry_date', sa.Date(), nullable=True),
+        sa.Column('purchase_price', sa.Float(), nullable=True),
+        sa.Column('selling_price', sa.Float(), nullable=True),
+        sa.Column('cost_price', sa.Float(), nullable=True),
+        sa.Column('discounted_price', sa.Float(), nullable=True),
+        sa.Column('location', sa.String(length=100), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('zoho_item_id', sa.String(length=100), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_items_archive_user_deleted', 'items_archive', ['user_id', 'deleted_at'], unique=False)
+    # The purge unlinks notifications by item_id and deletes items they reference
+    op.create_index('ix_notifications_item_id', 'notifications', ['item_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_notifications_item_id', table_name='notifications')
+    op.drop_index('idx_items_archive_user_deleted', table_name='items_archive')
+    op.drop_table('items_archive')
+    op.drop_index('idx_items_deleted_at', table_name='items')
+    op.drop_index('idx_user_expiry', table_name='items')
+    op.create_index('idx_user_expiry', 'items', ['user_id', 'expiry_date'], unique=False)
+    op.drop_column('items', 'deleted_at')
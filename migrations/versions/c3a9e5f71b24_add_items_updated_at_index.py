@@ -0,0 +1,25 @@
+"""Add items updated_at index
+
+Revision ID: c3a9e5f71b24
+Revises: b47e2c9d1f53
+Create Date: 2025-05-06 15:04:22.731590
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3a9e5f71b24'
+down_revision = 'b47e2c9d1f53'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The alert scheduler polls for items changed by other processes
+    op.create_index('idx_items_updated_at', 'items', ['updated_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('idx_items_updated_at', table_name='items')
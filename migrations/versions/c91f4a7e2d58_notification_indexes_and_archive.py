@@ -0,0 +1,44 @@
+"""Add notification indexes and notifications_archive table
+
+Revision ID: c91f4a7e2d58
+Revises: 7b3e5d2f9a16
+Create Date: 2025-04-10 10:22:07.341965
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c91f4a7e2d58'
+down_revision = '7b3e5d2f9a16'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('idx_notifications_user_created', 'notifications', ['user_id', sa.text('created_at DESC')], unique=False)
+    op.create_index('idx_notifications_user_status', 'notifications', ['user_id', 'status'], unique=False)
+
+    op.create_table('notifications_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('item_id', sa.Integer(), nullable=True),
+        sa.Column('message', sa.String(length=500), nullable=False),
+        sa.Column('type', sa.String(length=20), nullable=True),
+        sa.Column('priority', sa.String(length=20), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('is_read', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('dedup_key', sa.String(length=120), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_notifications_archive_user_created', 'notifications_archive', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('idx_notifications_archive_user_created', table_name='notifications_archive')
+    op.drop_table('notifications_archive')
+    op.drop_index('idx_notifications_user_status', table_name='notifications')
+    op.drop_index('idx_notifications_user_created', table_name='notifications')
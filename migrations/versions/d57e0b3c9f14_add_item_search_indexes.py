@@ -0,0 +1,63 @@
+"""Add indexed search for items (pg_trgm on PostgreSQL, FTS5 on SQLite)
+
+Revision ID: d57e0b3c9f14
+Revises: 8c4d1e6b2a90
+Create Date: 2025-04-04 15:22:08.640137
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd57e0b3c9f14'
+down_revision = '8c4d1e6b2a90'
+branch_labels = None
+depends_on = None
+
+SEARCH_COLUMNS = ('name', 'description', 'unit')
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for column in SEARCH_COLUMNS:
+            op.create_index(f'idx_items_{column}_trgm', 'items', [column], unique=False,
+                            postgresql_using='gin',
+                            postgresql_ops={column: 'gin_trgm_ops'})
+    elif dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE items_fts USING fts5("
+            "name, description, unit, content='items', content_rowid='id')"
+        )
+        op.execute(
+            "CREATE TRIGGER items_fts_ai AFTER INSERT ON items BEGIN "
+            "INSERT INTO items_fts(rowid, name, description, unit) "
+            "VALUES (new.id, new.name, new.description, new.unit); END"
+        )
+        op.execute(
+            "CREATE TRIGGER items_fts_ad AFTER DELETE ON items BEGIN "
+            "INSERT INTO items_fts(items_fts, rowid, name, description, unit) "
+            "VALUES ('delete', old.id, old.name, old.description, old.unit); END"
+        )
+        op.execute(
+            "CREATE TRIGGER items_fts_au AFTER UPDATE OF name, description, unit ON items BEGIN "
+            "INSERT INTO items_fts(items_fts, rowid, name, description, unit) "
+            "VALUES ('delete', old.id, old.name, old.description, old.unit); "
+            "INSERT INTO items_fts(rowid, name, description, unit) "
+            "VALUES (new.id, new.name, new.description, new.unit); END"
+        )
+        # Index the rows that already exist
+        op.execute("INSERT INTO items_fts(items_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        for column in SEARCH_COLUMNS:
+            op.drop_index(f'idx_items_{column}_trgm', table_name='items')
+    elif dialect == 'sqlite':
+        for trigger in ('items_fts_ai', 'items_fts_ad', 'items_fts_au'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        op.execute('DROP TABLE IF EXISTS items_fts')
@@ -0,0 +1,26 @@
+"""Add partial index of unread notifications per user
+
+Revision ID: e2a8b4c6d913
+Revises: c91f4a7e2d58
+Create Date: 2025-04-11 14:05:39.802214
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a8b4c6d913'
+down_revision = 'c91f4a7e2d58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('idx_notifications_user_unread', 'notifications', ['user_id'], unique=False,
+                    postgresql_where=sa.text("status = 'pending'"),
+                    sqlite_where=sa.text("status = 'pending'"))
+
+
+def downgrade():
+    op.drop_index('idx_notifications_user_unread', table_name='notifications')
@@ -0,0 +1,24 @@
+"""Add timezone to users
+
+Revision ID: f4c7a2d9e815
+Revises: e2a8b4c6d913
+Create Date: 2025-04-21 09:12:37.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4c7a2d9e815'
+down_revision = 'e2a8b4c6d913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('users', sa.Column('timezone', sa.String(length=50), nullable=True))
+
+
+def downgrade():
+    op.drop_column('users', 'timezone')
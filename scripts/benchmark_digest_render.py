@@ -0,0 +1,49 @@
+"""Benchmark rendering daily notification emails.
+
+Renders ``count`` digests through ``EmailService.render``, as the outbox
+sender does, and reports the time per email.
+
+Usage: python scripts/benchmark_digest_render.py [count]
+"""
+import os
+import sys
+import time
+
+# Run from anywhere, e.g. the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.core.config import Config
+from app.services.email_service import EmailService
+
+class BenchmarkConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    SCHEDULER_API_ENABLED = False
+
+def make_contexts(count):
+    contexts = []
+    for i in range(count):
+        items = [
+            {'name': f'Item {i}-{n}', 'days_until_expiry': n % 8,
+             'priority': 'high' if n % 8 <= 3 else 'normal'}
+            for n in range(1 + i % 10)
+        ]
+        contexts.append({'user': {'username': f'user{i}'}, 'items': items})
+    return contexts
+
+def benchmark(count):
+    app = create_app(BenchmarkConfig)
+    contexts = make_contexts(count)
+    
+    with app.app_context():
+        start = time.perf_counter()
+        for context in contexts:
+            EmailService.render('daily_notification', **context)
+        elapsed = time.perf_counter() - start
+    
+    print(f"Rendered {count} daily_notification emails in {elapsed:.3f}s "
+          f"({elapsed / count * 1e6:.0f} us/email)")
+
+if __name__ == '__main__':
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
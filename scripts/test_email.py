@@ -26,7 +26,7 @@ def test_email():
             logger.info(f"Found user: {user.username} ({user.email})")
             
             # Get actual items from inventory
-            today = datetime.utcnow()
+            today = datetime.utcnow().date()
             items = Item.query.filter(
                 Item.user_id == user.id,
                 Item.expiry_date.isnot(None)
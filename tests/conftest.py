@@ -1 +1,79 @@
- 
\ No newline at end of file
+import pytest
+from datetime import datetime, timedelta
+from flask_jwt_extended import create_access_token
+from sqlalchemy.pool import StaticPool
+from app import create_app
+from app.core.config import Config
+from app.core.extensions import db, expiry_index
+from app.models.item import Item
+from app.models.notification import Notification
+from app.models.user import User
+
+class TestConfig(Config):
+    """Configuration for the test suite."""
+    TESTING = True
+    SECRET_KEY = 'test-secret-key'
+    JWT_SECRET_KEY = 'test-jwt-secret-key'
+    # One in-memory database shared by every connection, including other threads
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'poolclass': StaticPool,
+        'connect_args': {'check_same_thread': False}
+    }
+    MAIL_DEFAULT_SENDER = 'noreply@example.com'
+    MAIL_SUPPRESS_SEND = True
+    WTF_CSRF_ENABLED = False
+    SCHEDULER_API_ENABLED = False
+    OCR_PRELOAD = False
+
+@pytest.fixture(scope='session')
+def _app():
+    """Create the application once for the whole run."""
+    return create_app(TestConfig)
+
+@pytest.fixture
+def app(_app):
+    """Provide the application with an app context and empty tables."""
+    with _app.app_context():
+        db.drop_all()
+        db.create_all()
+        expiry_index.clear()
+        yield _app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    """Create a test client."""
+    return app.test_client()
+
+@pytest.fixture
+def test_user(app):
+    """Create a test user."""
+    user = User(username='testuser', email='test@example.com')
+    user.set_password('password123')
+    user.save()
+    return user
+
+@pytest.fixture
+def auth_headers(app, test_user):
+    """Authorization headers carrying an access token for the test user."""
+    token = create_access_token(identity=test_user.id)
+    return {'Authorization': f'Bearer {token}'}
+
+@pytest.fixture
+def test_item(app, test_user):
+    """Create a test item expiring in 60 days."""
+    item = Item(name='Test Item', description='desc', quantity=10, unit='pieces',
+                user_id=test_user.id, expiry_date=datetime.now().date() + timedelta(days=60))
+    item.save()
+    return item
+
+@pytest.fixture
+def test_notification(app, test_user, test_item):
+    """Create an unread in-app notification for the test item."""
+    notification = Notification(message='Test notification', type='in_app',
+                                user_id=test_user.id, item_id=test_item.id)
+    db.session.add(notification)
+    db.session.commit()
+    return notification
@@ -0,0 +1,135 @@
+import pytest
+from datetime import date, datetime, time, timedelta
+from app.core.alert_scheduler import AlertScheduler
+from app.core.extensions import db
+from app.models.item import Item
+from app.models.notification import Notification
+from app.services.notification_service import NotificationService
+
+@pytest.fixture
+def alert_scheduler(app, monkeypatch):
+    """Create an enabled alert scheduler following ORM writes."""
+    monkeypatch.setitem(app.config, 'ALERT_SCHEDULER_ENABLED', True)
+    monkeypatch.setitem(app.config, 'ALERT_SCHEDULER_WINDOW_DAYS', 3)
+    monkeypatch.setitem(app.config, 'EXPIRY_ALERT_HOUR', 8)
+    scheduler = AlertScheduler(app)
+    yield scheduler
+    scheduler.detach()
+
+def _add_item(user_id, name, days):
+    item = Item(name=name, quantity=1, user_id=user_id,
+                expiry_date=date.today() + timedelta(days=days))
+    item.save()
+    return item
+
+def _at(days, hour=8):
+    return datetime.combine(date.today() + timedelta(days=days), time(hour=hour))
+
+def test_pop_due_fires_each_offset_once(app, test_user, alert_scheduler):
+    """Test alerts fire on the day of each offset and only once."""
+    with app.app_context():
+        item = _add_item(test_user.id, 'Milk', 7)
+        
+        assert alert_scheduler.pop_due(_at(0, hour=7)) == []
+        assert alert_scheduler.pop_due(_at(0)) == [(item.id, 7)]
+        assert alert_scheduler.pop_due(_at(0, hour=23)) == []
+        # Later windows are loaded as time reaches them
+        assert alert_scheduler.pop_due(_at(4)) == [(item.id, 3)]
+        assert alert_scheduler.pop_due(_at(6)) == [(item.id, 1)]
+        assert alert_scheduler.pop_due(_at(30)) == []
+
+def test_follows_item_changes(app, test_user, alert_scheduler):
+    """Test created, rescheduled and deleted items update the heap."""
+    with app.app_context():
+        moved = _add_item(test_user.id, 'Moved', 7)
+        removed = _add_item(test_user.id, 'Removed', 3)
+        assert alert_scheduler.next_due() == _at(0)
+        
+        added = _add_item(test_user.id, 'Added', 1)
+        moved.expiry_date = date.today() + timedelta(days=4)
+        moved.save()
+        removed.delete()
+        
+        assert alert_scheduler.pop_due(_at(0)) == [(added.id, 1)]
+        assert alert_scheduler.pop_due(_at(1)) == [(moved.id, 3)]
+
+def test_send_due_alerts_creates_notifications(app, test_user, alert_scheduler):
+    """Test popped alerts become deduplicated notifications."""
+    with app.app_context():
+        item = _add_item(test_user.id, 'Bread', 3)
+        
+        alerts = alert_scheduler.pop_due(_at(0))
+        notifications = NotificationService().send_due_alerts(alerts)
+        
+        assert [(n.item_id, n.priority) for n in notifications] == [(item.id, 'high')]
+        assert NotificationService().send_due_alerts(alerts) == []
+        assert Notification.query.filter_by(item_id=item.id).count() == 1
+
+def test_picks_up_writes_from_other_processes(app, test_user, alert_scheduler):
+    """Test items written without this process's ORM events are found by polling."""
+    with app.app_context():
+        kept = _add_item(test_user.id, 'Kept', 7)
+        assert alert_scheduler.next_due() == _at(0)
+        
+        # Core statements bypass the session events, like a write from a web worker
+        db.session.execute(db.insert(Item.__table__).values(
+            name='Elsewhere', quantity=1, user_id=test_user.id, expiry_date=date.today() + timedelta(days=3)
+        ))
+        db.session.execute(db.update(Item.__table__).where(Item.__table__.c.id == kept.id).values(
+            expiry_date=date.today() + timedelta(days=8), updated_at=datetime.utcnow()
+        ))
+        db.session.commit()
+        elsewhere = Item.query.filter_by(name='Elsewhere').one()
+        
+        assert alert_scheduler.pop_due(_at(0)) == [(elsewhere.id, 3)]
+        assert alert_scheduler.pop_due(_at(1)) == [(kept.id, 7)]
+
+def test_requeue_returns_alerts_after_failure(app, test_user, alert_scheduler, monkeypatch):
+    """Test alerts are not lost when storing their notifications fails."""
+    from app.tasks.expiry_alerts import send_due_alerts
+    monkeypatch.setattr('app.tasks.expiry_alerts.alert_scheduler', alert_scheduler)
+    monkeypatch.setattr('app.core.alert_scheduler.datetime', _FrozenDatetime)
+    with app.app_context():
+        item = _add_item(test_user.id, 'Cheese', 3)
+        
+        def broken(self, alerts):
+            raise RuntimeError('database went away')
+        with monkeypatch.context() as patched:
+            patched.setattr(NotificationService, 'send_due_alerts', broken)
+            with pytest.raises(RuntimeError):
+                send_due_alerts()
+        
+        assert send_due_alerts() == 1
+        assert Notification.query.filter_by(item_id=item.id).count() == 1
+
+class _FrozenDatetime(datetime):
+    """``datetime`` whose ``now`` is 08:00 today, when today's alerts are due."""
+    @classmethod
+    def now(cls, tz=None):
+        return _at(0).replace(tzinfo=tz)
+
+def test_only_items_with_loaded_alerts_are_tracked(app, test_user, alert_scheduler, monkeypatch):
+    """Test items are held only while one of their alerts is loaded."""
+    monkeypatch.setattr(alert_scheduler, 'window_days', 1)
+    with app.app_context():
+        due = _add_item(test_user.id, 'Due', 3)
+        _add_item(test_user.id, 'Between', 5)
+        _add_item(test_user.id, 'Later', 29)
+        
+        assert alert_scheduler.next_due() == _at(0)
+        assert set(alert_scheduler._expiry) == {due.id}
+        assert alert_scheduler.pop_due(_at(0)) == [(due.id, 3)]
+        assert alert_scheduler._expiry == {}
+
+def test_due_times_follow_scheduler_timezone(app, test_user, monkeypatch):
+    """Test alerts come due at the alert hour in SCHEDULER_TIMEZONE, not the host's."""
+    monkeypatch.setitem(app.config, 'ALERT_SCHEDULER_ENABLED', True)
+    monkeypatch.setitem(app.config, 'SCHEDULER_TIMEZONE', 'Pacific/Kiritimati')
+    scheduler = AlertScheduler(app)
+    try:
+        now = scheduler._now()
+        utc_now = datetime.utcnow()
+        assert abs((now - utc_now) - timedelta(hours=14)) < timedelta(minutes=1)
+        assert scheduler._today_start() == datetime.combine(now.date(), time.min)
+    finally:
+        scheduler.detach()
@@ -1,8 +1,10 @@
 import pytest
 from datetime import datetime, timedelta
+from unittest.mock import patch
 from app.models.user import User
 from app.models.item import Item
 from app.models.notification import Notification
+from app.core.extensions import db
 
 def test_register(client):
     """Test user registration."""
@@ -97,6 +99,32 @@ def test_update_item(client, test_item, auth_headers):
     assert data['name'] == 'Updated Item'
     assert data['quantity'] == 20
 
+def test_update_item_rejects_malformed_expiry_date(client, test_item, auth_headers):
+    """Test a malformed expiry date is a 400 and leaves the item unchanged."""
+    response = client.put(f'/api/v1/inventory/{test_item.id}', headers=auth_headers, json={
+        'name': 'Renamed',
+        'expiry_date': '31/12/2030'
+    })
+    
+    assert response.status_code == 400
+    assert 'expiry_date' in response.get_json()['error']
+    assert db.session.get(Item, test_item.id).name == 'Test Item'
+
+def test_update_item_notifies_for_that_item_only(client, test_user, test_item, auth_headers):
+    """Test an edit that lands on an alert day notifies for the edited item without a full run."""
+    other = Item(name='Other', quantity=1, user_id=test_user.id,
+                 expiry_date=datetime.now().date() + timedelta(days=7))
+    other.save()
+    
+    with patch('app.api.v1.inventory.NotificationService.check_expiry_dates') as full_run:
+        response = client.put(f'/api/v1/inventory/{test_item.id}', headers=auth_headers, json={
+            'expiry_date': (datetime.now().date() + timedelta(days=3)).isoformat()
+        })
+    
+    assert response.status_code == 200
+    full_run.assert_not_called()
+    assert [n.item_id for n in Notification.query.all()] == [test_item.id]
+
 def test_delete_item(client, test_item, auth_headers):
     """Test deleting an item."""
     response = client.delete(f'/api/v1/inventory/{test_item.id}', headers=auth_headers)
@@ -135,6 +163,47 @@ def test_get_expired_items(client, test_item, auth_headers):
     assert len(data) > 0
     assert data[0]['id'] == test_item.id
 
+def test_get_expiring_items_horizon(client, test_user, auth_headers):
+    """Test expiring items respect horizon_days and are sorted by expiry."""
+    today = datetime.now().date()
+    for name, days in [('Later', 10), ('Soonest', 2), ('Outside', 45), ('Expired', -1)]:
+        Item(name=name, quantity=1, user_id=test_user.id,
+             expiry_date=today + timedelta(days=days)).save()
+    
+    response = client.get('/api/v1/inventory/expiring?horizon_days=14', headers=auth_headers)
+    
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [item['name'] for item in data] == ['Soonest', 'Later']
+    
+    response = client.get('/api/v1/inventory/expiring', headers=auth_headers)
+    assert [item['name'] for item in response.get_json()] == ['Soonest', 'Later']
+
+def test_get_expiring_items_invalid_horizon(client, auth_headers):
+    """Test rejecting a negative horizon."""
+    response = client.get('/api/v1/inventory/expiring?horizon_days=-1', headers=auth_headers)
+    
+    assert response.status_code == 400
+
+def test_get_inventory_summary(client, test_user, auth_headers):
+    """Test inventory summary counts, totals and upcoming items."""
+    today = datetime.now().date()
+    for name, days, quantity, cost in [('Soon', 3, 2, 5.0), ('Sooner', 1, 1, 10.0),
+                                       ('Later', 90, 4, 2.5), ('Gone', -2, 3, 1.0)]:
+        Item(name=name, quantity=quantity, cost_price=cost, user_id=test_user.id,
+             expiry_date=today + timedelta(days=days)).save()
+    Item(name='Undated', quantity=1, user_id=test_user.id).save()
+    
+    response = client.get('/api/v1/inventory/summary?limit=1', headers=auth_headers)
+    
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['total_items'] == 5
+    assert data['counts'] == {'expired': 1, 'expiring_soon': 2, 'active': 1, 'pending': 1}
+    assert data['total_quantity'] == 11
+    assert data['stock_value'] == 33.0
+    assert [item['name'] for item in data['upcoming']] == ['Sooner']
+
 def test_get_notifications(client, test_notification, auth_headers):
     """Test getting user's notifications."""
     response = client.get('/api/v1/notifications', headers=auth_headers)
@@ -145,6 +214,87 @@ def test_get_notifications(client, test_notification, auth_headers):
     assert len(data) > 0
     assert data[0]['id'] == test_notification.id
 
+def test_get_notifications_cursor_pagination(client, test_user, auth_headers):
+    """Test notifications are paged newest first with a keyset cursor."""
+    created = datetime.utcnow()
+    ids = []
+    for i in range(5):
+        notification = Notification(user_id=test_user.id, message=f'Notification {i}',
+                                    created_at=created - timedelta(minutes=i // 2))
+        db.session.add(notification)
+        db.session.commit()
+        ids.append(notification.id)
+    
+    pages = []
+    cursor = None
+    while True:
+        query = {'limit': 2} if cursor is None else {'limit': 2, 'cursor': cursor}
+        response = client.get('/api/v1/notifications', query_string=query, headers=auth_headers)
+        assert response.status_code == 200
+        pages.append([n['id'] for n in response.get_json()])
+        cursor = response.headers.get('X-Next-Cursor')
+        if cursor is None:
+            break
+    
+    # Same timestamps are ordered by id, so pairs (0, 1) and (2, 3) come newest id first
+    expected = [ids[1], ids[0], ids[3], ids[2], ids[4]]
+    assert [n for page in pages for n in page] == expected
+    assert [len(page) for page in pages] == [2, 2, 1]
+
+def test_get_notifications_invalid_cursor(client, test_user, auth_headers):
+    """Test a malformed cursor is rejected."""
+    response = client.get('/api/v1/notifications?cursor=not-a-cursor', headers=auth_headers)
+    
+    assert response.status_code == 400
+
+def test_unread_count(client, test_user, auth_headers):
+    """Test the unread count follows inserts, reads and read-all."""
+    notifications = [Notification(user_id=test_user.id, message=f'Notification {i}') for i in range(3)]
+    db.session.add_all(notifications)
+    db.session.commit()
+    
+    def unread():
+        response = client.get('/api/v1/notifications/unread-count', headers=auth_headers)
+        assert response.status_code == 200
+        return response.get_json()['unread']
+    
+    assert unread() == 3
+    client.put(f'/api/v1/notifications/{notifications[0].id}', headers=auth_headers)
+    assert unread() == 2
+    client.put('/api/v1/notifications/read-all', headers=auth_headers)
+    assert unread() == 0
+    
+    Notification.query.filter_by(user_id=test_user.id).delete()
+    db.session.add(Notification(user_id=test_user.id, message='New'))
+    db.session.commit()
+    assert unread() == 1
+
+def test_notification_stream(app, client, test_user, auth_headers, monkeypatch):
+    """Test the SSE endpoint accepts a stream token in the query string and streams events."""
+    monkeypatch.setitem(app.config, 'NOTIFICATION_STREAM_MAX_SECONDS', 0)
+    db.session.add(Notification(user_id=test_user.id, message='Old'))
+    db.session.commit()
+    token = client.post('/api/v1/notifications/stream-token', headers=auth_headers).get_json()['token']
+    
+    response = client.get(f'/api/v1/notifications/stream?jwt={token}',
+                          headers={'Last-Event-ID': '0'})
+    
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    body = response.get_data(as_text=True)
+    assert 'event: notification' in body and 'Old' in body
+    assert 'event: unread' in body
+
+def test_notification_stream_tokens_are_scoped(client, auth_headers):
+    """Test access tokens are refused in the stream URL and stream tokens everywhere else."""
+    access_token = auth_headers['Authorization'].split()[1]
+    response = client.get(f'/api/v1/notifications/stream?jwt={access_token}')
+    assert response.status_code == 401
+    
+    stream_token = client.post('/api/v1/notifications/stream-token', headers=auth_headers).get_json()['token']
+    response = client.get('/api/v1/notifications', headers={'Authorization': f'Bearer {stream_token}'})
+    assert response.status_code == 400
+
 def test_mark_notification_read(client, test_notification, auth_headers):
     """Test marking notification as read."""
     response = client.put(f'/api/v1/notifications/{test_notification.id}', headers=auth_headers)
@@ -181,4 +331,29 @@ def test_update_notification_preferences(client, test_user, auth_headers):
     
     assert response.status_code == 200
     data = response.get_json()
-    assert data['message'] == 'Notification preferences updated' 
\ No newline at end of file
+    assert data['message'] == 'Notification preferences updated' 
+def test_update_notification_timezone(client, test_user, auth_headers):
+    """Test setting the timezone digests are delivered in."""
+    response = client.put('/api/v1/notifications/preferences', headers=auth_headers, json={
+        'timezone': 'Europe/Berlin'
+    })
+    assert response.status_code == 200
+    
+    response = client.get('/api/v1/notifications/preferences', headers=auth_headers)
+    assert response.get_json()['timezone'] == 'Europe/Berlin'
+    
+    response = client.put('/api/v1/notifications/preferences', headers=auth_headers, json={
+        'timezone': 'Nowhere/Special'
+    })
+    assert response.status_code == 400
+
+def test_outbox_metrics_require_admin(client, test_user, auth_headers):
+    """Test outbox metrics are only served to admins."""
+    response = client.get('/api/v1/notifications/outbox-metrics', headers=auth_headers)
+    assert response.status_code == 403
+    
+    test_user.is_admin = True
+    db.session.commit()
+    response = client.get('/api/v1/notifications/outbox-metrics', headers=auth_headers)
+    assert response.status_code == 200
+    assert set(response.get_json()) == {'pending', 'due', 'sending', 'failed', 'lag_seconds'}
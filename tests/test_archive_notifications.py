@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+from app.core.extensions import db
+from app.models.notification import Notification, NotificationArchive
+from app.tasks.archive_notifications import archive_notifications
+
+def _notification(user_id, days_old, status='pending'):
+    notification = Notification(
+        user_id=user_id,
+        message=f'{status} notification from {days_old} days ago',
+        status=status,
+        created_at=datetime.utcnow() - timedelta(days=days_old)
+    )
+    db.session.add(notification)
+    return notification
+
+def test_archive_moves_read_and_old_notifications(app, test_user, monkeypatch):
+    """Test read and old notifications move to the archive in chunks."""
+    with app.app_context():
+        monkeypatch.setitem(app.config, 'NOTIFICATION_ARCHIVE_BATCH_SIZE', 2)
+        recent_read = _notification(test_user.id, 1, 'read')
+        old_read = [_notification(test_user.id, 40, 'read') for _ in range(3)]
+        old_pending = _notification(test_user.id, 45)
+        ancient = _notification(test_user.id, 120)
+        db.session.commit()
+        archived_ids = sorted([n.id for n in old_read] + [ancient.id])
+        kept_ids = sorted([recent_read.id, old_pending.id])
+        
+        assert archive_notifications() == 4
+        
+        assert sorted(n.id for n in Notification.query.all()) == kept_ids
+        archive = NotificationArchive.query.order_by(NotificationArchive.id).all()
+        assert [n.id for n in archive] == archived_ids
+        assert all(n.archived_at is not None and n.user_id == test_user.id for n in archive)
+        
+        # Nothing left to move on a second run
+        assert archive_notifications() == 0
+
+def test_user_notification_queries_use_indexes(app, test_user):
+    """Test per-user notification lookups are served by the composite indexes."""
+    with app.app_context():
+        if db.engine.dialect.name != 'sqlite':
+            return
+        plan = db.session.execute(db.text(
+            'EXPLAIN QUERY PLAN SELECT * FROM notifications '
+            'WHERE user_id = 1 ORDER BY created_at DESC LIMIT 10'
+        )).all()
+        assert 'idx_notifications_user_created' in str(plan)
+        
+        plan = db.session.execute(db.text(
+            "EXPLAIN QUERY PLAN SELECT count(*) FROM notifications "
+            "WHERE user_id = 1 AND status = 'pending'"
+        )).all()
+        assert 'idx_notifications_user_status' in str(plan)
@@ -0,0 +1,213 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from app.core.extensions import db
+from app.models.item import Item, ItemArchive
+from app.models.job_watermark import JobWatermark
+from app.models.notification import Notification
+from app.models.zoho_deactivation import ZohoDeactivation
+from app.tasks import cleanup
+from app.tasks.cleanup import cleanup_expired_items
+from app.tasks.purge_items import purge_deleted_items
+
+@pytest.fixture
+def expired_items(app, test_user, monkeypatch):
+    """Five items that expired yesterday, two of them synced with Zoho."""
+    monkeypatch.setitem(app.config, 'CLEANUP_BATCH_SIZE', 2)
+    yesterday = datetime.now().date() - timedelta(days=1)
+    ids = []
+    for i in range(5):
+        item = Item(name=f'Expired {i}', quantity=1, user_id=test_user.id, expiry_date=yesterday,
+                    status='Expired', zoho_item_id=f'zoho-{i}' if i < 2 else None)
+        item.save()
+        ids.append(item.id)
+    return ids
+
+def test_cleanup_removes_in_chunks(app, test_user, expired_items):
+    """Test expired items are soft-deleted with a notification each and Zoho updates queued."""
+    with app.app_context():
+        keep = Item(name='Fresh', quantity=1, user_id=test_user.id,
+                    expiry_date=datetime.now().date() + timedelta(days=10), status='Active')
+        keep.save()
+        
+        assert cleanup_expired_items() == 5
+        
+        assert Item.query.count() == 1
+        deleted = Item.including_deleted().filter(Item.deleted_at.isnot(None)).all()
+        assert sorted(item.id for item in deleted) == expired_items
+        assert Notification.query.filter(Notification.message.like('%has expired%')).count() == 5
+        queued = sorted(d.zoho_item_id for d in ZohoDeactivation.query.filter_by(status='pending'))
+        assert queued == ['zoho-0', 'zoho-1']
+
+def test_cleanup_resumes_after_failure(app, expired_items):
+    """Test a failed chunk keeps earlier chunks and a rerun finishes the rest."""
+    with app.app_context():
+        real_chunk = cleanup._cleanup_chunk
+        calls = []
+        def failing_chunk(condition, batch_size):
+            calls.append(condition)
+            if len(calls) == 2:
+                raise RuntimeError('connection lost')
+            return real_chunk(condition, batch_size)
+        
+        with patch.object(cleanup, '_cleanup_chunk', failing_chunk):
+            with pytest.raises(RuntimeError):
+                cleanup_expired_items()
+        assert Item.query.count() == 3
+        
+        assert cleanup_expired_items() == 3
+        assert Item.query.count() == 0
+        assert Notification.query.filter(Notification.message.like('%has expired%')).count() == 5
+
+def test_cleanup_catches_up_missed_days(app, test_user):
+    """Test a run cleans every day since the watermark and moves it to yesterday."""
+    with app.app_context():
+        today = datetime.now().date()
+        for days_ago in [1, 3, 4]:
+            Item(name=f'Expired {days_ago}d', quantity=1, user_id=test_user.id,
+                 expiry_date=today - timedelta(days=days_ago), status='Expired').save()
+        Item(name='Fresh', quantity=1, user_id=test_user.id, expiry_date=today, status='Expired').save()
+        JobWatermark.advance('cleanup_expired_items', today - timedelta(days=5))
+        db.session.commit()
+        
+        assert cleanup_expired_items() == 3
+        
+        assert [item.name for item in Item.query] == ['Fresh']
+        assert JobWatermark.get('cleanup_expired_items') == today - timedelta(days=1)
+
+def test_cleanup_sweeps_items_behind_watermark(app, test_user, monkeypatch):
+    """Test items written with an expiry the watermark has passed are still removed."""
+    monkeypatch.setitem(app.config, 'CLEANUP_BATCH_SIZE', 2)
+    with app.app_context():
+        today = datetime.now().date()
+        JobWatermark.advance('cleanup_expired_items', today - timedelta(days=1))
+        db.session.commit()
+        for i in range(3):
+            Item(name=f'Imported {i}', quantity=1, user_id=test_user.id,
+                 expiry_date=today - timedelta(days=10 + i)).save()
+        Item(name='Fresh', quantity=1, user_id=test_user.id, expiry_date=today + timedelta(days=3)).save()
+        
+        assert cleanup_expired_items() == 3
+        
+        assert [item.name for item in Item.query] == ['Fresh']
+        assert JobWatermark.get('cleanup_expired_items') == today - timedelta(days=1)
+
+def test_cleanup_ignores_stale_status(app, test_user):
+    """Test items past their expiry date are cleaned up even if status was never refreshed."""
+    with app.app_context():
+        today = datetime.now().date()
+        stale = Item(name='Stale', quantity=1, user_id=test_user.id,
+                     expiry_date=today - timedelta(days=2), status='Active')
+        stale.save()
+        Item(name='Today', quantity=1, user_id=test_user.id, expiry_date=today, status='Expired').save()
+        JobWatermark.advance('cleanup_expired_items', today - timedelta(days=3))
+        db.session.commit()
+        
+        assert cleanup_expired_items() == 1
+        
+        assert [item.name for item in Item.query] == ['Today']
+        assert Item.including_deleted().filter_by(id=stale.id).one().status == 'Expired'
+        assert JobWatermark.get('cleanup_expired_items') == today - timedelta(days=1)
+
+def test_cleanup_backlog_drains_over_runs(app, expired_items, monkeypatch):
+    """Test a run stops after its batch budget and the next run finishes the day."""
+    monkeypatch.setitem(app.config, 'CLEANUP_MAX_BATCHES_PER_RUN', 2)
+    with app.app_context():
+        assert cleanup_expired_items() == 4
+        assert JobWatermark.get('cleanup_expired_items') is None
+        
+        assert cleanup_expired_items() == 1
+        assert Item.query.count() == 0
+        assert JobWatermark.get('cleanup_expired_items') == datetime.now().date() - timedelta(days=1)
+
+def test_backfill_leaves_watermark(app, expired_items):
+    """Test cleaning up a given day does not move the watermark."""
+    with app.app_context():
+        assert cleanup_expired_items(datetime.now().date() - timedelta(days=1)) == 5
+        assert JobWatermark.get('cleanup_expired_items') is None
+
+def test_deleted_items_hidden_from_queries(app, test_user, expired_items):
+    """Test soft-deleted items are left out of lookups, updates and counts."""
+    with app.app_context():
+        cleanup_expired_items()
+        
+        assert db.session.get(Item, expired_items[0]) is None
+        assert Item.query.filter_by(user_id=test_user.id).count() == 0
+        updated = db.session.execute(db.update(Item).values(quantity=0)).rowcount
+        assert updated == 0
+        assert Item.including_deleted().count() == 5
+
+def test_deleted_items_hidden_from_relationships(app, expired_items):
+    """Test a user's items collection leaves out soft-deleted items."""
+    with app.app_context():
+        from app.models.user import User
+        user = User(username='owner', email='owner@example.com')
+        user.set_password('password123')
+        user.save()
+        Item(name='Gone', quantity=1, user_id=user.id,
+             expiry_date=datetime.now().date() - timedelta(days=1)).save()
+        Item(name='Kept', quantity=1, user_id=user.id,
+             expiry_date=datetime.now().date() + timedelta(days=5)).save()
+        cleanup_expired_items()
+        
+        db.session.expire(user, ['items'])
+        assert [item.name for item in user.items] == ['Kept']
+
+def test_purge_moves_deleted_items_to_archive(app, test_user, expired_items, monkeypatch):
+    """Test items deleted long enough ago are archived and unlinked from notifications."""
+    monkeypatch.setitem(app.config, 'ITEM_PURGE_BATCH_SIZE', 2)
+    monkeypatch.setitem(app.config, 'ITEM_PURGE_PAUSE_SECONDS', 0)
+    with app.app_context():
+        linked = Notification(message='Expires soon', user_id=test_user.id, item_id=expired_items[0])
+        db.session.add(linked)
+        db.session.commit()
+        cleanup_expired_items()
+        Item.including_deleted().filter(Item.id != expired_items[-1]).update(
+            {'deleted_at': datetime.utcnow() - timedelta(days=2)}, synchronize_session=False
+        )
+        db.session.commit()
+        
+        assert purge_deleted_items() == 4
+        
+        assert sorted(row.id for row in ItemArchive.query) == expired_items[:-1]
+        assert [item.id for item in Item.including_deleted()] == [expired_items[-1]]
+        assert db.session.get(Notification, linked.id).item_id is None
+
+def test_zoho_deactivations_handed_to_background_job(app, test_user):
+    """Test a sync queues a background flush with the session's token instead of calling Zoho."""
+    from flask import session
+    from app.services.zoho_service import ZohoService
+    with app.test_request_context():
+        db.session.add(ZohoDeactivation(user_id=test_user.id, zoho_item_id='zoho-1', attempts=0))
+        db.session.commit()
+        session['zoho_access_token'] = 'token'
+        session['zoho_token_expires_at'] = int(datetime.now().timestamp()) + 3600
+        
+        with patch('app.core.extensions.scheduler.add_job') as add_job, \
+                patch.object(ZohoService, 'delete_item_in_zoho') as delete_item:
+            assert ZohoService().queue_deactivation_flush(test_user)
+        
+        delete_item.assert_not_called()
+        assert add_job.call_args.kwargs['args'] == [test_user.id, 'token']
+        assert ZohoDeactivation.query.one().attempts == 0
+
+def test_zoho_deactivations_flushed_in_background(app, test_user):
+    """Test the background job sends queued deactivations with the handed-over token."""
+    from app.services.zoho_service import ZohoService
+    from app.tasks.zoho_deactivations import flush_zoho_deactivations
+    with app.app_context():
+        db.session.add(ZohoDeactivation(user_id=test_user.id, zoho_item_id='zoho-ok', attempts=0))
+        db.session.add(ZohoDeactivation(user_id=test_user.id, zoho_item_id='zoho-bad', attempts=0))
+        db.session.commit()
+    
+    tokens = []
+    def delete_item(self, zoho_id):
+        tokens.append(self.get_access_token())
+        return zoho_id == 'zoho-ok'
+    with patch.object(ZohoService, 'delete_item_in_zoho', delete_item):
+        assert flush_zoho_deactivations(test_user.id, 'token') == 1
+    
+    assert tokens == ['token', 'token']
+    with app.app_context():
+        statuses = {d.zoho_item_id: (d.status, d.attempts) for d in ZohoDeactivation.query}
+        assert statuses == {'zoho-ok': ('done', 1), 'zoho-bad': ('pending', 1)}
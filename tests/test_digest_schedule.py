@@ -0,0 +1,45 @@
+import pytest
+from datetime import datetime, timedelta
+from app.services.digest_schedule import DigestSchedule
+
+@pytest.fixture
+def schedule(app, monkeypatch):
+    """Create a schedule with a two hour window opening at 8:00."""
+    monkeypatch.setitem(app.config, 'DIGEST_LOCAL_HOUR', 8)
+    monkeypatch.setitem(app.config, 'DIGEST_WINDOW_MINUTES', 120)
+    monkeypatch.setitem(app.config, 'DIGEST_DEFAULT_TIMEZONE', 'UTC')
+    with app.app_context():
+        yield DigestSchedule()
+
+def test_offset_is_stable_and_inside_window(schedule):
+    """Test every user gets the same offset each time, within the window."""
+    offsets = [schedule.offset(user_id) for user_id in range(1, 500)]
+    assert offsets == [schedule.offset(user_id) for user_id in range(1, 500)]
+    assert all(timedelta(0) <= offset < timedelta(minutes=120) for offset in offsets)
+    # Users are spread over the window rather than sharing one slot
+    assert len(set(offsets)) > 400
+
+def test_send_at_uses_user_timezone(schedule):
+    """Test the slot is in the user's morning, returned as naive UTC."""
+    now = datetime(2025, 1, 15, 6, 0)
+    offset = schedule.offset(42)
+    
+    assert schedule.send_at(42, None, now) == datetime(2025, 1, 15, 8, 0) + offset
+    # 8:00 in New York is 13:00 UTC in January
+    assert schedule.send_at(42, 'America/New_York', now) == datetime(2025, 1, 15, 13, 0) + offset
+    # Unknown names fall back to the default timezone
+    assert schedule.send_at(42, 'Not/AZone', now) == datetime(2025, 1, 15, 8, 0) + offset
+
+def test_send_at_after_slot_waits_for_next_morning(schedule):
+    """Test a digest queued after the user's slot is sent at the next day's slot."""
+    offset = schedule.offset(42)
+    assert schedule.send_at(42, None, datetime(2025, 1, 15, 18, 0)) == datetime(2025, 1, 16, 8, 0) + offset
+    # 18:00 UTC is already the next morning in Tokyo (UTC+9)
+    assert schedule.send_at(42, 'Asia/Tokyo', datetime(2025, 1, 15, 18, 0)) == datetime(2025, 1, 15, 23, 0) + offset
+
+def test_is_valid_timezone():
+    """Test timezone name validation."""
+    assert DigestSchedule.is_valid_timezone('Europe/Berlin')
+    assert not DigestSchedule.is_valid_timezone('Mars/Olympus')
+    assert not DigestSchedule.is_valid_timezone('../etc/passwd')
+    assert not DigestSchedule.is_valid_timezone(None)
@@ -0,0 +1,111 @@
+import pytest
+import socketserver
+import threading
+from flask_mail import Message
+from app.services.email_dispatcher import EmailDispatcher
+
+class _SMTPSinkHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP server that accepts mail and records it."""
+
+    def _reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self._reply('220 sink ready')
+        recipients = []
+        for raw in self.rfile:
+            command = raw.decode().strip()
+            verb = command.split(' ', 1)[0].upper()
+            if verb in ('EHLO', 'HELO'):
+                self._reply('250 sink')
+            elif verb == 'MAIL':
+                recipients = []
+                self._reply('250 OK')
+            elif verb == 'RCPT':
+                if 'reject' in command:
+                    self._reply('550 No such user')
+                else:
+                    recipients.append(command.split(':', 1)[1].strip('<> '))
+                    self._reply('250 OK')
+            elif verb == 'DATA':
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+                for line in self.rfile:
+                    if line in (b'.\r\n', b'.\n'):
+                        break
+                self.server.delivered.extend(recipients)
+                self._reply('250 OK')
+            elif verb == 'QUIT':
+                self._reply('221 Bye')
+                return
+            else:
+                self._reply('250 OK')
+
+@pytest.fixture
+def smtp_sink(app, monkeypatch):
+    """Point Flask-Mail at a local SMTP sink."""
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), _SMTPSinkHandler)
+    server.daemon_threads = True
+    server.connections = 0
+    server.delivered = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    state = app.extensions['mail']
+    monkeypatch.setattr(state, 'server', '127.0.0.1')
+    monkeypatch.setattr(state, 'port', server.server_address[1])
+    monkeypatch.setattr(state, 'use_tls', False)
+    monkeypatch.setattr(state, 'use_ssl', False)
+    monkeypatch.setattr(state, 'username', None)
+    monkeypatch.setattr(state, 'suppress', False)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def _message(recipient):
+    return Message(subject='Digest', recipients=[recipient],
+                   sender='noreply@example.com', body='Items expiring soon')
+
+def test_dispatch_reuses_connections(app, smtp_sink):
+    """Test messages share a capped number of SMTP sessions."""
+    with app.app_context():
+        messages = [(i, _message(f'user{i}@example.com')) for i in range(10)]
+
+        results = EmailDispatcher(workers=2, max_per_connection=4).dispatch(messages)
+
+        assert [result.key for result in results] == list(range(10))
+        assert all(result.sent for result in results)
+        assert smtp_sink.connections == 3
+        assert sorted(smtp_sink.delivered) == sorted(f'user{i}@example.com' for i in range(10))
+
+def test_dispatch_reports_per_recipient_failures(app, smtp_sink):
+    """Test a refused recipient fails alone without dropping the connection."""
+    with app.app_context():
+        messages = [
+            (1, _message('one@example.com')),
+            (2, _message('reject@example.com')),
+            (3, _message('three@example.com'))
+        ]
+
+        results = EmailDispatcher(workers=1, max_per_connection=10).dispatch(messages)
+
+        assert [result.sent for result in results] == [True, False, True]
+        assert results[1].recipients == ['reject@example.com']
+        assert results[1].error
+        assert smtp_sink.connections == 1
+
+def test_dispatch_connection_failure(app, monkeypatch):
+    """Test every message is reported failed when the server is unreachable."""
+    with app.app_context():
+        state = app.extensions['mail']
+        monkeypatch.setattr(state, 'server', '127.0.0.1')
+        monkeypatch.setattr(state, 'port', 1)
+        monkeypatch.setattr(state, 'use_tls', False)
+        monkeypatch.setattr(state, 'suppress', False)
+
+        results = EmailDispatcher(workers=2, max_per_connection=1).dispatch(
+            [(i, _message(f'user{i}@example.com')) for i in range(2)]
+        )
+
+        assert [result.sent for result in results] == [False, False]
+        assert all(result.error for result in results)
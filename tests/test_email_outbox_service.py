@@ -0,0 +1,209 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from app.core.extensions import db
+from app.models.email_outbox import EmailOutbox
+from app.services.email_dispatcher import DeliveryResult
+from app.services.email_outbox_service import EmailOutboxService
+
+@pytest.fixture
+def outbox_service(app, monkeypatch):
+    """Create an outbox service that gives up after two attempts."""
+    monkeypatch.setitem(app.config, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 2)
+    monkeypatch.setitem(app.config, 'EMAIL_OUTBOX_BACKOFF_SECONDS', 60)
+    return EmailOutboxService()
+
+def _enqueue(recipient):
+    entry = EmailOutboxService.enqueue(
+        recipient=recipient,
+        subject='Daily Expiry Alert Summary',
+        template='daily_notification',
+        context={'user': {'username': 'testuser'}, 'items': []}
+    )
+    db.session.commit()
+    return entry
+
+def _dispatch(failing=()):
+    """Fake dispatcher outcome: every message sent unless its recipient is failing."""
+    def dispatch(messages):
+        return [
+            DeliveryResult(key, list(message.send_to), message.recipients[0] not in failing,
+                           'refused' if message.recipients[0] in failing else None)
+            for key, message in messages
+        ]
+    return dispatch
+
+def test_process_batch_sends_and_retries(app, outbox_service):
+    """Test sent rows are closed and failed rows are rescheduled with backoff."""
+    with app.app_context():
+        ok = _enqueue('ok@example.com')
+        bad = _enqueue('bad@example.com')
+        
+        with patch('app.services.email_outbox_service.EmailService.render', return_value='<p>Digest</p>'), \
+                patch('app.services.email_outbox_service.EmailDispatcher') as mock_dispatcher:
+            mock_dispatcher.return_value.dispatch.side_effect = _dispatch(failing={'bad@example.com'})
+            counts = outbox_service.process_batch()
+        
+        assert counts == {'sent': 1, 'retry': 1, 'failed': 0}
+        ok = db.session.get(EmailOutbox, ok.id)
+        bad = db.session.get(EmailOutbox, bad.id)
+        assert ok.status == 'sent' and ok.sent_at is not None
+        assert bad.status == 'pending' and bad.attempts == 1
+        assert bad.last_error == 'refused'
+        assert bad.next_attempt_at > datetime.utcnow() + timedelta(seconds=50)
+        
+        # Not due yet, so nothing is claimed
+        assert outbox_service.claim_batch() == []
+
+def test_failed_after_max_attempts(app, outbox_service):
+    """Test a row that keeps failing is given up after the attempt limit."""
+    with app.app_context():
+        entry = _enqueue('bad@example.com')
+        
+        with patch('app.services.email_outbox_service.EmailService.render', return_value='<p>Digest</p>'), \
+                patch('app.services.email_outbox_service.EmailDispatcher') as mock_dispatcher:
+            mock_dispatcher.return_value.dispatch.side_effect = _dispatch(failing={'bad@example.com'})
+            outbox_service.process_batch()
+            EmailOutbox.query.filter_by(id=entry.id).update({'next_attempt_at': datetime.utcnow()})
+            db.session.commit()
+            counts = outbox_service.process_batch()
+        
+        assert counts == {'sent': 0, 'retry': 0, 'failed': 1}
+        entry = db.session.get(EmailOutbox, entry.id)
+        assert entry.status == 'failed'
+        assert entry.attempts == 2
+
+def test_expired_lease_is_reclaimed(app, outbox_service):
+    """Test rows claimed by a sender that died are claimed again after the lease."""
+    with app.app_context():
+        entry = _enqueue('user@example.com')
+        
+        claimed = outbox_service.claim_batch()
+        assert [row.id for row in claimed] == [entry.id]
+        assert claimed[0].status == 'sending'
+        assert outbox_service.claim_batch() == []
+        
+        EmailOutbox.query.filter_by(id=entry.id).update({
+            'next_attempt_at': datetime.utcnow() - timedelta(seconds=1)
+        })
+        db.session.commit()
+        
+        reclaimed = outbox_service.claim_batch()
+        assert [row.id for row in reclaimed] == [entry.id]
+        assert reclaimed[0].attempts == 2
+
+def test_expired_lease_on_final_attempt_is_failed(app, outbox_service):
+    """Test a row whose lease runs out on its last attempt is not claimed again."""
+    with app.app_context():
+        entry = _enqueue('user@example.com')
+        
+        for _ in range(2):
+            EmailOutbox.query.filter_by(id=entry.id).update({
+                'next_attempt_at': datetime.utcnow() - timedelta(seconds=1)
+            })
+            db.session.commit()
+            assert [row.id for row in outbox_service.claim_batch()] == [entry.id]
+        
+        EmailOutbox.query.filter_by(id=entry.id).update({
+            'next_attempt_at': datetime.utcnow() - timedelta(seconds=1)
+        })
+        db.session.commit()
+        
+        assert outbox_service.claim_batch() == []
+        entry = db.session.get(EmailOutbox, entry.id)
+        assert entry.status == 'failed'
+        assert entry.attempts == 2
+        assert entry.last_error == 'Lease expired on the final attempt'
+
+def test_digest_days_counted_at_send_time(app, outbox_service):
+    """Test a digest counts days until expiry from the user's date when it is sent."""
+    with app.app_context():
+        today = datetime.utcnow().date()
+        EmailOutboxService.enqueue(
+            recipient='user@example.com',
+            subject='Daily Expiry Alert Summary',
+            template='daily_notification',
+            context={'user': {'username': 'testuser'}, 'timezone': 'Pacific/Kiritimati', 'items': [
+                {'name': 'Milk', 'expiry_date': (today + timedelta(days=4)).isoformat(),
+                 'days_until_expiry': 4, 'priority': 'normal'},
+                {'name': 'Bread', 'expiry_date': (today + timedelta(days=1)).isoformat(),
+                 'days_until_expiry': 1, 'priority': 'high'},
+            ]}
+        )
+        db.session.commit()
+        
+        contexts = []
+        def render(template, **context):
+            return contexts.append(context) or '<p>Digest</p>'
+        # 20:00 UTC is already the next morning in Kiritimati (UTC+14)
+        sent_at = datetime.combine(today, datetime.min.time()) + timedelta(hours=20)
+        with patch('app.services.email_outbox_service.EmailService.render', side_effect=render), \
+                patch('app.services.email_outbox_service.EmailDispatcher') as mock_dispatcher, \
+                patch('app.services.email_outbox_service.datetime') as mock_datetime:
+            mock_datetime.utcnow.return_value = sent_at
+            mock_dispatcher.return_value.dispatch.side_effect = _dispatch()
+            assert outbox_service.process_batch()['sent'] == 1
+        
+        # Bread now expires on the user's day and Milk moves up to high
+        items = [(item['name'], item['days_until_expiry'], item['priority']) for item in contexts[0]['items']]
+        assert items == [('Milk', 3, 'high'), ('Bread', 0, 'high')]
+
+def test_scheduled_email_is_held_until_send_at(app, outbox_service):
+    """Test an email with a later send time is not claimed before then."""
+    with app.app_context():
+        EmailOutboxService.enqueue(
+            recipient='later@example.com',
+            subject='Daily Expiry Alert Summary',
+            template='daily_notification',
+            context={'user': {'username': 'testuser'}, 'items': []},
+            send_at=datetime.utcnow() + timedelta(hours=1)
+        )
+        db.session.commit()
+        
+        assert outbox_service.claim_batch() == []
+
+def test_metrics_report_depth_and_lag(app, outbox_service):
+    """Test metrics count rows per state and measure the oldest due row's wait."""
+    with app.app_context():
+        now = datetime.utcnow()
+        due = _enqueue('due@example.com')
+        later = _enqueue('later@example.com')
+        sending = _enqueue('sending@example.com')
+        failed = _enqueue('failed@example.com')
+        sent = _enqueue('sent@example.com')
+        due.next_attempt_at = now - timedelta(minutes=5)
+        later.next_attempt_at = now + timedelta(hours=1)
+        sending.status = 'sending'
+        failed.status = 'failed'
+        sent.status = 'sent'
+        db.session.commit()
+        
+        metrics = outbox_service.metrics(now)
+        
+        assert metrics['pending'] == 2
+        assert metrics['due'] == 1
+        assert metrics['sending'] == 1
+        assert metrics['failed'] == 1
+        assert metrics['lag_seconds'] == pytest.approx(300, abs=1)
+
+def test_prune_deletes_old_sent_rows(app, monkeypatch):
+    """Test sent rows past the retention period are deleted in chunks; others are kept."""
+    from app.tasks.prune_email_outbox import prune_email_outbox
+    monkeypatch.setitem(app.config, 'EMAIL_OUTBOX_SENT_RETENTION_DAYS', 7)
+    monkeypatch.setitem(app.config, 'EMAIL_OUTBOX_PRUNE_BATCH_SIZE', 2)
+    with app.app_context():
+        now = datetime.utcnow()
+        for name, status, days_old in [('old1', 'sent', 10), ('old2', 'sent', 9), ('old3', 'sent', 8),
+                                       ('recent', 'sent', 1), ('failed', 'failed', 30), ('pending', 'pending', 30)]:
+            entry = _enqueue(f'{name}@example.com')
+            entry.status = status
+            entry.next_attempt_at = now - timedelta(days=days_old) + timedelta(minutes=10)
+            entry.sent_at = now - timedelta(days=days_old) if status == 'sent' else None
+        db.session.commit()
+        
+        assert prune_email_outbox() == 3
+        
+        assert sorted(entry.recipient for entry in EmailOutbox.query.all()) == [
+            'failed@example.com', 'pending@example.com', 'recent@example.com'
+        ]
+        assert prune_email_outbox() == 0
@@ -84,4 +84,27 @@ def test_send_email_failure():
             html_content='Test Content'
         )
         
-        assert success is False 
\ No newline at end of file
+        assert success is False 
+DIGEST_ITEMS = [
+    {'name': 'Milk', 'days_until_expiry': 0, 'priority': 'high'},
+    {'name': 'Bread', 'days_until_expiry': 3, 'priority': 'high'},
+    {'name': 'Rice', 'days_until_expiry': 7, 'priority': 'normal'}
+]
+
+def test_render_daily_notification(app):
+    """Test the digest renders its summary and the dashboard link."""
+    with app.test_request_context():
+        html = EmailService.render('daily_notification', user={'username': 'testuser'}, items=DIGEST_ITEMS)
+        
+        assert 'Hello testuser,' in html
+        assert 'Expired Items: 1' in html
+        assert 'Expires in 7 days' in html
+        assert 'href="http://localhost/"' in html
+
+def test_render_without_request_uses_base_url(app, monkeypatch):
+    """Test digests render from a worker's app context using APP_BASE_URL."""
+    monkeypatch.setitem(app.config, 'APP_BASE_URL', 'https://expiry.example.com/')
+    with app.app_context():
+        html = EmailService.render('daily_notification', user={'username': 'testuser'}, items=DIGEST_ITEMS)
+        
+        assert 'href="https://expiry.example.com/"' in html
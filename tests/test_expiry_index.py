@@ -0,0 +1,100 @@
+import pytest
+from datetime import datetime, timedelta
+from app.core.expiry_index import ExpiryIndex
+from app.core.extensions import db
+from app.models.item import Item
+
+@pytest.fixture
+def expiry_index(app):
+    """Create an enabled expiry index following ORM writes."""
+    app.config['EXPIRY_INDEX_ENABLED'] = True
+    index = ExpiryIndex(app)
+    yield index
+    index.detach()
+    app.config['EXPIRY_INDEX_ENABLED'] = False
+
+def _add_item(user_id, name, days):
+    item = Item(name=name, quantity=1, user_id=user_id,
+                expiry_date=datetime.now().date() + timedelta(days=days))
+    item.save()
+    return item
+
+def test_horizon_and_bucket_queries(app, test_user, expiry_index):
+    """Test horizon and bucket queries match the SQL semantics."""
+    with app.app_context():
+        expired = _add_item(test_user.id, 'Expired', -3)
+        today = _add_item(test_user.id, 'Today', 0)
+        soon = _add_item(test_user.id, 'Soon', 2)
+        later = _add_item(test_user.id, 'Later', 20)
+        _add_item(test_user.id, 'Active', 60)
+        Item(name='Undated', quantity=1, user_id=test_user.id).save()
+        
+        assert expiry_index.expiring_item_ids(test_user.id, 30) == [soon.id, later.id]
+        assert expiry_index.expiring_item_ids(test_user.id, 2) == [soon.id]
+        assert expiry_index.expired_item_ids(test_user.id) == [expired.id, today.id]
+        assert expiry_index.bucket_counts(test_user.id, 30) == {
+            'expired': 2, 'expiring_soon': 2, 'active': 1
+        }
+
+def test_index_follows_commits(app, test_user, expiry_index):
+    """Test loaded timelines are updated from committed ORM changes."""
+    with app.app_context():
+        item = _add_item(test_user.id, 'Milk', 5)
+        assert expiry_index.expiring_item_ids(test_user.id, 30) == [item.id]
+        
+        added = _add_item(test_user.id, 'Bread', 1)
+        assert expiry_index.expiring_item_ids(test_user.id, 30) == [added.id, item.id]
+        
+        item.expiry_date = datetime.now().date() - timedelta(days=1)
+        item.save()
+        assert expiry_index.expiring_item_ids(test_user.id, 30) == [added.id]
+        assert expiry_index.expired_item_ids(test_user.id) == [item.id]
+        
+        added.delete()
+        assert expiry_index.expiring_item_ids(test_user.id, 30) == []
+        assert len(expiry_index) == 1
+
+def test_index_ignores_rolled_back_changes(app, test_user, expiry_index):
+    """Test flushed changes are discarded on rollback."""
+    with app.app_context():
+        assert expiry_index.expiring_item_ids(test_user.id, 30) == []
+        
+        db.session.add(Item(name='Cheese', quantity=1, user_id=test_user.id,
+                            expiry_date=datetime.now().date() + timedelta(days=3)))
+        db.session.flush()
+        db.session.rollback()
+        
+        assert expiry_index.expiring_item_ids(test_user.id, 30) == []
+
+def test_bulk_update_resets_index(app, test_user, expiry_index):
+    """Test bulk statements drop cached timelines."""
+    with app.app_context():
+        _add_item(test_user.id, 'Eggs', 3)
+        assert len(expiry_index.expiring_item_ids(test_user.id, 30)) == 1
+        
+        Item.query.filter_by(user_id=test_user.id).update(
+            {'expiry_date': datetime.now().date() + timedelta(days=90)})
+        db.session.commit()
+        
+        assert len(expiry_index) == 0
+        assert expiry_index.expiring_item_ids(test_user.id, 30) == []
+
+def test_lru_eviction(app, expiry_index):
+    """Test least recently used users are evicted past the entry cap."""
+    with app.app_context():
+        from app.models.user import User
+        users = []
+        for i in range(3):
+            user = User(username=f'user{i}', email=f'user{i}@example.com')
+            user.set_password('password123')
+            user.save()
+            _add_item(user.id, 'Item', 5)
+            _add_item(user.id, 'Item', 6)
+            users.append(user)
+        expiry_index.max_entries = 4
+        
+        for user in users:
+            expiry_index.expiring_item_ids(user.id, 30)
+        
+        assert len(expiry_index) == 4
+        assert list(expiry_index._timelines) == [users[1].id, users[2].id]
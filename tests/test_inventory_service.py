@@ -0,0 +1,75 @@
+from datetime import date, timedelta
+from app.core.expiry_index import ExpiryIndex
+from app.core.extensions import db
+from app.models.item import Item
+from app.models.job_watermark import JobWatermark
+from app.services.inventory_service import InventoryService, REFRESH_WATERMARK_JOB
+
+def test_refresh_statuses_updates_stale_rows(app, test_user):
+    """Test statuses are recomputed from expiry dates in one pass."""
+    with app.app_context():
+        today = date.today()
+        for name, expiry, status in [
+            ('Gone', today - timedelta(days=1), 'Active'),
+            ('Soon', today + timedelta(days=5), 'Active'),
+            ('Later', today + timedelta(days=90), 'Active'),
+            ('Undated', None, 'Active'),
+        ]:
+            Item(name=name, quantity=1, user_id=test_user.id, expiry_date=expiry, status=status).save()
+        
+        assert InventoryService().refresh_statuses(test_user.id) == 3
+        
+        statuses = {item.name: item.status for item in Item.query.filter_by(user_id=test_user.id)}
+        assert statuses == {'Gone': 'Expired', 'Soon': 'Expiring Soon', 'Later': 'Active',
+                            'Undated': 'Pending Expiry Date'}
+        assert InventoryService().refresh_statuses(test_user.id) == 0
+
+def test_summary_from_expiry_index_matches_sql(app, test_user, monkeypatch):
+    """Test the summary is the same whether the dated buckets come from the index or SQL."""
+    with app.app_context():
+        today = date.today()
+        for name, days, quantity, cost in [('Soon', 3, 2, 5.0), ('Sooner', 1, 1, 10.0),
+                                           ('Later', 90, 4, 2.5), ('Gone', -2, 3, 1.0)]:
+            Item(name=name, quantity=quantity, cost_price=cost, user_id=test_user.id,
+                 expiry_date=today + timedelta(days=days)).save()
+        Item(name='Undated', quantity=1, user_id=test_user.id).save()
+        expected = InventoryService().get_summary(test_user.id, upcoming_limit=2)
+        
+        monkeypatch.setitem(app.config, 'EXPIRY_INDEX_ENABLED', True)
+        index = ExpiryIndex(app)
+        monkeypatch.setattr('app.services.inventory_service.expiry_index', index)
+        try:
+            summary = InventoryService().get_summary(test_user.id, upcoming_limit=2)
+            assert len(index) == 4
+        finally:
+            index.detach()
+        
+        assert summary['counts'] == expected['counts'] == {
+            'expired': 1, 'expiring_soon': 2, 'active': 1, 'pending': 1
+        }
+        assert summary['total_items'] == expected['total_items'] == 5
+        assert summary['total_quantity'] == expected['total_quantity']
+        assert summary['stock_value'] == expected['stock_value']
+        assert [item.name for item in summary['upcoming']] == ['Sooner', 'Soon']
+
+def test_refresh_statuses_for_user_only_checks_crossed_buckets(app, test_user):
+    """Test a per-user refresh only looks at items whose bucket changed since the nightly run."""
+    with app.app_context():
+        today = date.today()
+        for name, expiry in [('Gone', today - timedelta(days=1)), ('Soon', today + timedelta(days=30)),
+                             ('Edited', today + timedelta(days=90))]:
+            Item(name=name, quantity=1, user_id=test_user.id, expiry_date=expiry, status='Active').save()
+        db.session.add(JobWatermark(job_id=REFRESH_WATERMARK_JOB, processed_through=today - timedelta(days=2)))
+        db.session.commit()
+        Item.query.filter_by(name='Edited').update({'status': 'Expired'})
+        db.session.commit()
+        
+        assert InventoryService().refresh_statuses(test_user.id) == 2
+        
+        statuses = {item.name: item.status for item in Item.query.filter_by(user_id=test_user.id)}
+        assert statuses == {'Gone': 'Expired', 'Soon': 'Expiring Soon', 'Edited': 'Expired'}
+        
+        # The nightly run catches everything else and makes later dashboard calls free
+        assert InventoryService().refresh_statuses() == 1
+        assert JobWatermark.get(REFRESH_WATERMARK_JOB) == today
+        assert InventoryService().refresh_statuses(test_user.id) == 0
@@ -61,6 +61,30 @@ def test_item_expiry_dates(app, test_item):
         assert test_item.is_expired
         assert not test_item.is_near_expiry
 
+def test_item_expiry_date_is_date(app, test_user):
+    """Test expiry dates are stored and returned as plain dates."""
+    with app.app_context():
+        expiry = datetime.now().date() + timedelta(days=5)
+        item = Item(name='Dated Item', quantity=1, user_id=test_user.id, expiry_date=expiry)
+        item.save()
+        db.session.expire(item)
+        
+        assert type(item.expiry_date) is type(expiry)
+        assert item.expiry_date == expiry
+        assert item.to_dict()['expiry_date'] == expiry.isoformat()
+
+def test_item_expiry_queries(app, test_user):
+    """Test expiring/expired range queries."""
+    with app.app_context():
+        today = datetime.now().date()
+        for name, days in [('Today', 0), ('Tomorrow', 1), ('Month', 30), ('Later', 31)]:
+            Item(name=name, quantity=1, user_id=test_user.id,
+                 expiry_date=today + timedelta(days=days)).save()
+        
+        assert [i.name for i in Item.expiring_query(test_user.id)] == ['Tomorrow', 'Month']
+        assert [i.name for i in Item.expiring_query(test_user.id, 1)] == ['Tomorrow']
+        assert [i.name for i in Item.expired_query(test_user.id)] == ['Today']
+
 def test_item_discount(app, test_item):
     """Test item discount calculations."""
     with app.app_context():
@@ -0,0 +1,113 @@
+import pytest
+from datetime import date, datetime, timedelta
+from app.core.extensions import db, job_registry, scheduler
+from app.core.job_registry import Job
+from app.models.job_run import JobRun
+
+def _register(monkeypatch, job_id, func, max_seconds=None, backfill=False):
+    monkeypatch.setitem(job_registry.jobs, job_id, Job(job_id, func, 'cron', {'hour': 0}, max_seconds, backfill))
+
+def test_scheduled_jobs_are_registered(app):
+    """Test the expiry check is scheduled alongside the maintenance jobs."""
+    assert {'cleanup_expired_items', 'check_expiry_dates', 'archive_notifications',
+            'prune_job_runs'} <= set(job_registry.jobs)
+
+def test_cron_jobs_use_scheduler_timezone(app):
+    """Test cron triggers follow SCHEDULER_TIMEZONE rather than the host's local time."""
+    trigger = scheduler.get_job('check_expiry_dates').trigger
+    assert str(trigger.timezone) == app.config['SCHEDULER_TIMEZONE'] == 'UTC'
+    assert str(trigger.fields[trigger.FIELD_NAMES.index('hour')]) == str(app.config['EXPIRY_CHECK_HOUR'])
+
+def test_run_records_success(app, monkeypatch):
+    """Test a run records its outcome, duration and row count."""
+    _register(monkeypatch, 'count_things', lambda: 42)
+    with app.app_context():
+        run = job_registry.run('count_things', trigger='manual')
+        
+        assert run['status'] == 'succeeded'
+        assert run['rows_processed'] == 42
+        assert run['trigger'] == 'manual'
+        assert run['duration_seconds'] >= 0
+        stored = JobRun.query.filter_by(job_id='count_things').one()
+        assert stored.finished_at is not None
+        assert stored.error is None
+
+def test_run_records_failure(app, monkeypatch):
+    """Test a job that raises is recorded as failed with its error."""
+    def broken():
+        raise RuntimeError('database went away')
+    _register(monkeypatch, 'broken', broken)
+    with app.app_context():
+        run = job_registry.run('broken')
+        
+        assert run['status'] == 'failed'
+        assert run['error'] == 'database went away'
+        assert job_registry.stats('broken')['failed'] == 1
+
+def test_backfill_passes_the_day(app, monkeypatch):
+    """Test backfillable jobs get the day and others refuse one."""
+    days = []
+    _register(monkeypatch, 'daily', lambda day: days.append(day) or 1, backfill=True)
+    _register(monkeypatch, 'not_daily', lambda: 1)
+    with app.app_context():
+        run = job_registry.run('daily', trigger='backfill', day=date(2025, 1, 2))
+        
+        assert days == [date(2025, 1, 2)]
+        assert run['run_for'] == '2025-01-02'
+        with pytest.raises(ValueError):
+            job_registry.run('not_daily', day=date(2025, 1, 2))
+
+def test_stats_count_overruns(app, monkeypatch):
+    """Test runs over the job's limit are counted as overruns."""
+    _register(monkeypatch, 'slow', lambda: 0, max_seconds=10)
+    with app.app_context():
+        now = datetime.utcnow()
+        for seconds in [2, 4, 30]:
+            db.session.add(JobRun(job_id='slow', status='succeeded', started_at=now - timedelta(minutes=seconds),
+                                  duration_seconds=seconds))
+        db.session.commit()
+        
+        stats = job_registry.stats('slow')
+        
+        assert stats['runs'] == 3
+        assert stats['overruns'] == 1
+        assert stats['max_seconds'] == 30
+        assert stats['avg_seconds'] == 12
+
+def test_prune_drops_old_runs(app):
+    """Test runs older than the retention period are deleted."""
+    with app.app_context():
+        db.session.add(JobRun(job_id='old', status='succeeded', started_at=datetime.utcnow() - timedelta(days=400)))
+        db.session.add(JobRun(job_id='new', status='succeeded', started_at=datetime.utcnow()))
+        db.session.commit()
+        
+        assert job_registry.prune() == 1
+        assert [run.job_id for run in JobRun.query.all()] == ['new']
+
+def test_cli_backfill_runs_each_day(app, monkeypatch):
+    """Test `flask jobs backfill` runs the job once per day in the range."""
+    days = []
+    _register(monkeypatch, 'daily', lambda day: days.append(day) or 0, backfill=True)
+    
+    result = app.test_cli_runner().invoke(args=['jobs', 'backfill', 'daily',
+                                                '--start', '2025-01-01', '--end', '2025-01-03'])
+    
+    assert result.exit_code == 0, result.output
+    assert days == [date(2025, 1, 1), date(2025, 1, 2), date(2025, 1, 3)]
+    assert result.output.count('succeeded') == 3
+
+def test_idle_interval_runs_are_not_recorded(app, monkeypatch):
+    """Test scheduled interval runs only leave a row when they did something."""
+    results = iter([0, 3])
+    monkeypatch.setitem(job_registry.jobs, 'poll', Job('poll', lambda: next(results), 'interval',
+                                                       {'seconds': 30}, 30, False))
+    with app.app_context():
+        assert job_registry.run('poll') is None
+        run = job_registry.run('poll')
+        
+        assert run['rows_processed'] == 3
+        assert JobRun.query.filter_by(job_id='poll').count() == 1
+
+def test_testing_app_does_not_start_the_scheduler(app):
+    """Test building the app for tests or CLI commands leaves the scheduler stopped."""
+    assert not scheduler.running
@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+from app.core.extensions import db, job_registry, scheduler_leader
+from app.core.job_registry import Job
+from app.core.leader_election import LeaderElection
+from app.models.job_run import JobRun
+from app.models.scheduler_lease import SchedulerLease
+
+def _node(app, identity):
+    node = LeaderElection()
+    node.app = app  # Without init_app, so no release is registered at exit
+    node.identity = identity
+    return node
+
+def test_only_one_process_holds_the_lease(app):
+    """Test a second process cannot take a lease that is still live."""
+    with app.app_context():
+        first = _node(app, 'web-1:100:aaaa')
+        second = _node(app, 'web-2:200:bbbb')
+        
+        assert first.try_acquire()
+        assert not second.try_acquire()
+        assert first.try_acquire()  # Renewal
+        assert db.session.get(SchedulerLease, 'scheduler').holder == 'web-1:100:aaaa'
+
+def test_standby_takes_over_expired_lease(app):
+    """Test a standby becomes leader once the old leader stops renewing."""
+    with app.app_context():
+        first = _node(app, 'web-1:100:aaaa')
+        second = _node(app, 'web-2:200:bbbb')
+        assert first.try_acquire()
+        
+        SchedulerLease.query.filter_by(name='scheduler').update(
+            {'expires_at': datetime.utcnow() - timedelta(seconds=1)}
+        )
+        db.session.commit()
+        
+        assert second.try_acquire()
+        assert not first.try_acquire()
+        assert not first.is_leader()
+
+def test_release_hands_over_immediately(app):
+    """Test a released lease can be taken straight away."""
+    with app.app_context():
+        first = _node(app, 'web-1:100:aaaa')
+        second = _node(app, 'web-2:200:bbbb')
+        assert first.try_acquire()
+        
+        first.release()
+        
+        assert second.try_acquire()
+
+def test_standby_skips_scheduled_runs(app, monkeypatch):
+    """Test scheduled runs are skipped on standbys while manual runs go ahead."""
+    calls = []
+    monkeypatch.setitem(job_registry.jobs, 'tick', Job('tick', lambda: calls.append(1) or 1, 'cron', {}, None, False))
+    monkeypatch.setattr(scheduler_leader, 'enabled', True)
+    monkeypatch.setattr(scheduler_leader, '_leader_until', 0.0)
+    with app.app_context():
+        db.session.add(SchedulerLease(name='scheduler', holder='web-9:900:cccc', acquired_at=datetime.utcnow(),
+                                      expires_at=datetime.utcnow() + timedelta(minutes=1)))
+        db.session.commit()
+        
+        assert job_registry.run('tick') is None
+        assert job_registry.run('tick', trigger='manual')['status'] == 'succeeded'
+        assert calls == [1]
+
+def test_new_leader_fails_abandoned_runs(app):
+    """Test taking over the lease closes scheduled runs the old leader left running."""
+    with app.app_context():
+        db.session.add(JobRun(job_id='check_expiry_dates', trigger='scheduled', status='running',
+                              started_at=datetime.utcnow() - timedelta(minutes=5)))
+        db.session.add(JobRun(job_id='check_expiry_dates', trigger='manual', status='running',
+                              started_at=datetime.utcnow()))
+        db.session.commit()
+        node = _node(app, 'web-1:100:aaaa')
+        node.on_elected(job_registry.fail_abandoned_runs)
+        
+        assert node.try_acquire()
+        assert node.try_acquire()  # Renewing does not run the callbacks again
+        
+        runs = {run.trigger: run for run in JobRun.query.all()}
+        assert runs['scheduled'].status == 'failed'
+        assert runs['scheduled'].finished_at is not None
+        assert runs['manual'].status == 'running'
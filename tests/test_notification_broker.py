@@ -0,0 +1,49 @@
+import queue
+import pytest
+from app.core.extensions import db, notification_broker
+from app.models.notification import Notification
+
+@pytest.fixture
+def broker(app):
+    """The app's broker; subscriptions made by a test are dropped afterwards."""
+    yield notification_broker
+    notification_broker._subscribers.clear()
+
+def test_commit_wakes_subscriber(app, test_user, broker):
+    """Test a committed notification wakes only its user's streams."""
+    with app.app_context():
+        mine = broker.subscribe(test_user.id)
+        other = broker.subscribe(test_user.id + 1)
+        
+        db.session.add(Notification(user_id=test_user.id, message='Hello'))
+        db.session.flush()
+        assert mine.empty()
+        db.session.commit()
+        
+        assert mine.get_nowait() is True
+        assert other.empty()
+
+def test_rollback_does_not_wake(app, test_user, broker):
+    """Test rolled back writes publish nothing."""
+    with app.app_context():
+        subscription = broker.subscribe(test_user.id)
+        
+        db.session.add(Notification(user_id=test_user.id, message='Hello'))
+        db.session.flush()
+        db.session.rollback()
+        
+        with pytest.raises(queue.Empty):
+            subscription.get_nowait()
+
+def test_bulk_update_wakes_everyone(app, test_user, broker):
+    """Test bulk statements on notifications wake every stream."""
+    with app.app_context():
+        subscriptions = [broker.subscribe(test_user.id), broker.subscribe(test_user.id + 1)]
+        
+        Notification.query.filter_by(user_id=test_user.id).update({'status': 'read'})
+        db.session.commit()
+        
+        assert all(s.get_nowait() is True for s in subscriptions)
+        broker.unsubscribe(test_user.id, subscriptions[0])
+        broker.unsubscribe(test_user.id + 1, subscriptions[1])
+        assert broker.subscriber_count() == 0
@@ -0,0 +1,139 @@
+import pytest
+import time
+from app.core.extensions import db
+from app.core.rate_limiter import RateLimiter
+from app.models.notification import Notification
+from app.models.notification_delivery import NotificationDelivery
+from app.models.user import User
+from app.services.email_dispatcher import DeliveryResult
+from app.services.notification_channels import LocalEmailProvider, LocalSmsProvider
+from app.services.notification_fanout import NotificationFanout
+
+@pytest.fixture
+def local_channels(app, monkeypatch):
+    """Route email and SMS to the local stand-in providers without pacing."""
+    monkeypatch.setitem(app.config, 'NOTIFICATION_EMAIL_PROVIDER', 'local')
+    monkeypatch.setitem(app.config, 'NOTIFICATION_SMS_PROVIDER', 'local')
+    monkeypatch.setitem(app.config, 'NOTIFICATION_EMAIL_RATE_PER_SECOND', 0)
+    monkeypatch.setitem(app.config, 'NOTIFICATION_SMS_RATE_PER_SECOND', 0)
+    LocalEmailProvider.clear()
+    LocalSmsProvider.clear()
+    yield
+    LocalEmailProvider.clear()
+    LocalSmsProvider.clear()
+
+def _notification(user, message='Milk expires tomorrow'):
+    notification = Notification(message=message, type='in_app', priority='high', user_id=user.id)
+    db.session.add(notification)
+    db.session.commit()
+    return notification
+
+def test_fan_out_to_enabled_channels(app, test_user, local_channels):
+    """Test a notification goes to each channel the user enabled, and only those."""
+    with app.app_context():
+        test_user.sms_notifications = True
+        test_user.phone_number = '+15551234567'
+        test_user.in_app_notifications = False
+        db.session.commit()
+        notification = _notification(test_user)
+        
+        counts = NotificationFanout().deliver([notification])
+        
+        assert counts['email']['sent'] == 1
+        assert counts['sms']['sent'] == 1
+        assert counts['in_app'] == {'sent': 0, 'failed': 0, 'skipped': 1}
+        assert [m.recipient for m in LocalEmailProvider.outbox] == ['test@example.com']
+        assert 'Milk expires tomorrow' in LocalEmailProvider.outbox[0].html
+        assert [m.body for m in LocalSmsProvider.outbox] == ['Milk expires tomorrow']
+        statuses = {d.channel: d.status for d in NotificationDelivery.query.filter_by(notification_id=notification.id)}
+        assert statuses == {'email': 'sent', 'sms': 'sent'}
+
+def test_sms_needs_a_phone_number(app, test_user, local_channels):
+    """Test SMS is skipped for users without a phone number."""
+    with app.app_context():
+        test_user.sms_notifications = True
+        db.session.commit()
+        
+        counts = NotificationFanout(['sms']).deliver([_notification(test_user)])
+        
+        assert counts['sms'] == {'sent': 0, 'failed': 0, 'skipped': 1}
+        assert not LocalSmsProvider.outbox
+
+def test_fan_out_again_retries_only_failures(app, test_user, local_channels, monkeypatch):
+    """Test sent deliveries are not repeated and failed ones are retried."""
+    with app.app_context():
+        test_user.sms_notifications = True
+        test_user.phone_number = '+15551234567'
+        db.session.commit()
+        notification = _notification(test_user)
+        
+        def refuse(self, messages):
+            return [DeliveryResult(m.key, [m.recipient], False, 'gateway down') for m in messages]
+        with monkeypatch.context() as patched:
+            patched.setattr(LocalSmsProvider, 'send_batch', refuse)
+            counts = NotificationFanout(['email', 'sms']).deliver([notification])
+        assert counts['email']['sent'] == 1
+        assert counts['sms']['failed'] == 1
+        
+        counts = NotificationFanout(['email', 'sms']).deliver([notification])
+        
+        assert counts['email'] == {'sent': 0, 'failed': 0, 'skipped': 1}
+        assert counts['sms']['sent'] == 1
+        sms = NotificationDelivery.query.filter_by(notification_id=notification.id, channel='sms').one()
+        assert sms.attempts == 2
+        assert sms.last_error is None
+        assert len(LocalEmailProvider.outbox) == 1
+
+def test_send_sms_notification(app, test_user, test_notification, local_channels):
+    """Test the single-channel helper reports the outcome."""
+    with app.app_context():
+        from app.services.notification_service import NotificationService
+        service = NotificationService()
+        assert service.send_sms_notification(test_notification) is False
+        
+        User.query.filter_by(id=test_user.id).update({'sms_notifications': True, 'phone_number': '+15551234567'})
+        db.session.commit()
+        assert service.send_sms_notification(test_notification) is True
+
+def test_deliver_queued_sends_pending_and_gives_up(app, test_user, local_channels):
+    """Test queued deliveries are sent, and unreachable ones stop after the attempt limit."""
+    with app.app_context():
+        User.query.filter_by(id=test_user.id).update({'sms_notifications': True, 'phone_number': '+15551234567'})
+        db.session.commit()
+        queued = _notification(test_user)
+        db.session.add(NotificationDelivery(notification_id=queued.id, channel='sms', attempts=0))
+        db.session.commit()
+        
+        assert NotificationFanout(['sms']).deliver_queued(10, max_attempts=2)['sms']['sent'] == 1
+        assert [m.body for m in LocalSmsProvider.outbox] == ['Milk expires tomorrow']
+        
+        unreachable = _notification(test_user, 'Bread expires tomorrow')
+        db.session.add(NotificationDelivery(notification_id=unreachable.id, channel='sms', attempts=0))
+        User.query.filter_by(id=test_user.id).update({'phone_number': None})
+        db.session.commit()
+        for _ in range(3):
+            NotificationFanout(['sms']).deliver_queued(10, max_attempts=2)
+        
+        delivery = NotificationDelivery.query.filter_by(notification_id=unreachable.id).one()
+        assert (delivery.status, delivery.attempts) == ('failed', 2)
+
+def test_local_outbox_is_capped(local_channels):
+    """Test the local providers only keep the most recent messages."""
+    from app.services.notification_channels import ChannelMessage, LOCAL_OUTBOX_SIZE
+    messages = [ChannelMessage(i, '+15551234567', '', f'message {i}') for i in range(LOCAL_OUTBOX_SIZE + 5)]
+    
+    LocalSmsProvider().send_batch(messages)
+    
+    assert len(LocalSmsProvider.outbox) == LOCAL_OUTBOX_SIZE
+    assert LocalSmsProvider.outbox[0].body == 'message 5'
+    assert not LocalEmailProvider.outbox
+
+def test_rate_limiter_spaces_sends():
+    """Test acquires are spaced to the configured rate."""
+    limiter = RateLimiter(rate=50)
+    started = time.monotonic()
+    for _ in range(5):
+        limiter.acquire()
+    # The first slot is immediate, the next four 20ms apart
+    assert time.monotonic() - started >= 0.075
+    assert RateLimiter(rate=0).acquire(100) == 0.0
@@ -1,9 +1,16 @@
 import pytest
 from datetime import datetime, timedelta
 from unittest.mock import patch, MagicMock
+from sqlalchemy import event
+from app.core.extensions import db
 from app.services.notification_service import NotificationService
 from app.models.item import Item
 from app.models.notification import Notification
+from app.models.email_outbox import EmailOutbox
+from app.models.notification_delivery import NotificationDelivery
+from app.models.user import User
+from app.services.email_dispatcher import DeliveryResult
+from app.services.notification_channels import LocalEmailProvider, LocalSmsProvider
 
 @pytest.fixture
 def notification_service():
@@ -30,96 +37,294 @@ def test_check_expiry_dates(app, test_item, notification_service):
         assert notification.priority == 'critical'
         assert notification.status == 'pending'
 
+def test_check_expiry_dates_only_matches_notification_offsets(app, test_user, notification_service):
+    """Test only items expiring exactly on a configured offset are notified."""
+    with app.app_context():
+        today = datetime.now().date()
+        items = {}
+        for days in [1, 2, 7, 8, 30, 31]:
+            item = Item(name=f'Item {days}', quantity=1, user_id=test_user.id,
+                        expiry_date=today + timedelta(days=days))
+            item.save()
+            items[days] = item
+        
+        with patch('app.services.notification_service.EmailService') as mock_email:
+            notifications = notification_service.check_expiry_dates()
+        
+        notified = sorted(n.item_id for n in notifications)
+        assert notified == sorted(items[days].id for days in [1, 7, 30])
+        assert Notification.query.filter_by(type='in_app').count() == 3
+        mock_email.queue_daily_notification_email.assert_called_once()
+
+def test_check_expiry_dates_texts_urgent_alerts(app, test_user, notification_service, monkeypatch):
+    """Test high-priority alerts are also queued for SMS to users who enabled it."""
+    from app.services.notification_channels import LocalSmsProvider
+    monkeypatch.setitem(app.config, 'NOTIFICATION_SMS_PROVIDER', 'local')
+    monkeypatch.setitem(app.config, 'NOTIFICATION_SMS_RATE_PER_SECOND', 0)
+    LocalSmsProvider.clear()
+    with app.app_context():
+        from app.models.user import User
+        User.query.filter_by(id=test_user.id).update({'sms_notifications': True, 'phone_number': '+15551234567'})
+        today = datetime.now().date()
+        for days in [1, 7]:
+            Item(name=f'Item {days}', quantity=1, user_id=test_user.id,
+                 expiry_date=today + timedelta(days=days)).save()
+        
+        with patch('app.services.notification_service.EmailService'):
+            notification_service.check_expiry_dates()
+        
+        # Queued by the run and sent by the delivery job
+        assert not LocalSmsProvider.outbox
+        from app.tasks.notification_deliveries import send_queued_deliveries
+        assert send_queued_deliveries() == 1
+        assert send_queued_deliveries() == 0
+        assert [message.recipient for message in LocalSmsProvider.outbox] == ['+15551234567']
+        assert 'expires tomorrow' in LocalSmsProvider.outbox[0].body
+
+def test_check_expiry_dates_user_queries_do_not_scale(app, notification_service):
+    """Test users and their last email time are loaded in a fixed number of queries."""
+    with app.app_context():
+        from app.models.user import User
+        today = datetime.now().date()
+        for i in range(5):
+            user = User(username=f'user{i}', email=f'user{i}@example.com')
+            user.set_password('password123')
+            user.save()
+            Item(name=f'Item {i}', quantity=1, user_id=user.id,
+                 expiry_date=today + timedelta(days=3)).save()
+            Item(name=f'Expired {i}', quantity=1, user_id=user.id,
+                 expiry_date=today).save()
+        db.session.expire_all()
+        
+        statements = []
+        def count_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        event.listen(db.engine, 'before_cursor_execute', count_statement)
+        try:
+            with patch('app.services.notification_service.EmailService') as mock_email:
+                mock_email.queue_daily_notification_email.return_value = True
+                notification_service.check_expiry_dates()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count_statement)
+        
+        user_queries = [s for s in statements if s.lstrip().upper().startswith('SELECT') and 'users' in s]
+        assert len(user_queries) == 3  # expiring scan, expired scan, recipients
+        assert mock_email.queue_daily_notification_email.call_count == 5
+
+def test_check_expiry_dates_is_idempotent(app, test_user, notification_service):
+    """Test reruns skip alerts already created, using one insert per batch."""
+    with app.app_context():
+        today = datetime.now().date()
+        for i in range(4):
+            Item(name=f'Item {i}', quantity=1, user_id=test_user.id,
+                 expiry_date=today + timedelta(days=7)).save()
+        
+        statements = []
+        def count_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        event.listen(db.engine, 'before_cursor_execute', count_statement)
+        try:
+            with patch('app.services.notification_service.EmailService') as mock_email:
+                mock_email.queue_daily_notification_email.return_value = False
+                first = notification_service.check_expiry_dates()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count_statement)
+        
+        with patch('app.services.notification_service.EmailService') as mock_email:
+            second = notification_service.check_expiry_dates()
+        
+        inserts = [s for s in statements if s.lstrip().upper().startswith('INSERT INTO NOTIFICATIONS')]
+        assert len(first) == 4
+        assert len({n.dedup_key for n in first}) == 4
+        assert len(inserts) == 1
+        assert second == []
+        assert Notification.query.filter_by(type='in_app').count() == 4
+        mock_email.queue_daily_notification_email.assert_not_called()
+
+def test_check_expiry_dates_throttles_digest(app, test_user, notification_service):
+    """Test a digest is queued at most once per interval and recorded on the user."""
+    with app.app_context():
+        from app.models.user import User
+        Item(name='Milk', quantity=1, user_id=test_user.id,
+             expiry_date=datetime.now().date() + timedelta(days=3)).save()
+        
+        notification_service.check_expiry_dates()
+        
+        user = db.session.get(User, test_user.id)
+        assert user.last_digest_sent_at is not None
+        assert Notification.query.filter_by(type='email').count() == 0
+        queued = EmailOutbox.query.filter_by(user_id=test_user.id).one()
+        assert queued.template == 'daily_notification'
+        assert queued.context['items'][0]['name'] == 'Milk'
+        
+        Item(name='Bread', quantity=1, user_id=test_user.id,
+             expiry_date=datetime.now().date() + timedelta(days=1)).save()
+        with patch('app.services.notification_service.EmailService') as mock_email:
+            notifications = notification_service.check_expiry_dates()
+        
+        assert len(notifications) == 1
+        mock_email.queue_daily_notification_email.assert_not_called()
+        
+        user.last_digest_sent_at = datetime.utcnow() - timedelta(hours=25)
+        user.save()
+        Item(name='Eggs', quantity=1, user_id=test_user.id,
+             expiry_date=datetime.now().date() + timedelta(days=7)).save()
+        with patch('app.services.notification_service.EmailService') as mock_email:
+            notification_service.check_expiry_dates()
+        
+        mock_email.queue_daily_notification_email.assert_called_once()
+
+def test_stream_events(app, test_user, notification_service, monkeypatch):
+    """Test the stream sends the unread count, then new notifications as they commit."""
+    with app.app_context():
+        monkeypatch.setitem(app.config, 'NOTIFICATION_STREAM_POLL_SECONDS', 0.05)
+        db.session.add(Notification(user_id=test_user.id, message='Already seen'))
+        db.session.commit()
+        
+        stream = notification_service.stream_events(test_user.id)
+        first = next(stream)
+        assert 'event: unread' in first and '"unread": 1' in first
+        assert 'Already seen' not in first
+        
+        notification = Notification(user_id=test_user.id, message='Fresh alert')
+        db.session.add(notification)
+        db.session.commit()
+        
+        update = next(stream)
+        assert f'id: {notification.id}' in update
+        assert 'Fresh alert' in update
+        assert '"unread": 2' in update
+        
+        assert next(stream) == ': keepalive\n\n'
+        stream.close()
+
+def test_sharded_run_covers_each_user_once(app, notification_service):
+    """Test shards partition users into ID ranges and the runner aggregates their stats."""
+    with app.app_context():
+        from app.models.user import User
+        from app.services.notification_runner import NotificationRunner
+        today = datetime.now().date()
+        user_ids = []
+        for i in range(6):
+            user = User(username=f'shard{i}', email=f'shard{i}@example.com')
+            user.set_password('password123')
+            user.save()
+            user_ids.append(user.id)
+            Item(name=f'Item {i}', quantity=1, user_id=user.id,
+                 expiry_date=today + timedelta(days=7)).save()
+        
+        # Each shard takes a contiguous third of the user IDs
+        first = notification_service.run_shard(0, 3)
+        assert first['notifications'] == 2
+        assert sorted(n.user_id for n in Notification.query.all()) == user_ids[:2]
+        
+        summary = NotificationRunner().run(shard_count=3, processes=1)
+        
+        assert [stats['shard'] for stats in summary['shards']] == [0, 1, 2]
+        # Shard 0 already ran, so only the other users are new
+        assert summary['notifications'] == 6 - first['notifications']
+        assert summary['emails_queued'] == 6 - first['emails_queued']
+        assert sorted(n.user_id for n in Notification.query.all()) == sorted(user_ids)
+
 def test_create_notification(app, test_item, notification_service):
     """Test notification creation."""
     with app.app_context():
-        # Create notification
-        notification = notification_service._create_notification(
-            test_item,
-            'Test message',
-            'warning'
-        )
+        values = notification_service._notification_values(test_item, 5)
+        inserted = notification_service._insert_notifications([values])
+        db.session.commit()
         
-        assert notification is not None
-        assert notification.message == 'Test message'
+        assert len(inserted) == 1
+        notification = db.session.get(Notification, inserted[0].id)
+        assert notification.message.startswith('Notice: Product Test Item')
         assert notification.type == 'in_app'
-        assert notification.priority == 'warning'
+        assert notification.priority == 'normal'
         assert notification.status == 'pending'
         assert notification.user_id == test_item.user_id
         assert notification.item_id == test_item.id
+        assert notification.dedup_key == values['dedup_key']
 
 def test_duplicate_notification_prevention(app, test_item, notification_service):
     """Test prevention of duplicate notifications."""
     with app.app_context():
-        # Create first notification
-        notification_service._create_notification(
-            test_item,
-            'Test message',
-            'warning'
-        )
-        
-        # Try to create duplicate notification
-        notification = notification_service._create_notification(
-            test_item,
-            'Test message',
-            'warning'
-        )
+        values = notification_service._notification_values(test_item, 5)
+        assert len(notification_service._insert_notifications([values])) == 1
+        db.session.commit()
         
-        assert notification is None
+        # Same item, offset and expiry date: the dedup_key already exists
+        assert notification_service._insert_notifications([values]) == []
+        db.session.commit()
+        assert Notification.query.filter_by(dedup_key=values['dedup_key']).count() == 1
+
+@pytest.fixture
+def local_providers(app, monkeypatch):
+    """Send email and SMS through the local stand-in providers without pacing."""
+    monkeypatch.setitem(app.config, 'NOTIFICATION_EMAIL_PROVIDER', 'local')
+    monkeypatch.setitem(app.config, 'NOTIFICATION_SMS_PROVIDER', 'local')
+    monkeypatch.setitem(app.config, 'NOTIFICATION_EMAIL_RATE_PER_SECOND', 0)
+    monkeypatch.setitem(app.config, 'NOTIFICATION_SMS_RATE_PER_SECOND', 0)
+    LocalEmailProvider.clear()
+    LocalSmsProvider.clear()
+    yield
+    LocalEmailProvider.clear()
+    LocalSmsProvider.clear()
+
+def _failing_batch(provider, messages):
+    return [DeliveryResult(message.key, [message.recipient], False, 'Provider error') for message in messages]
+
+def _delivery(notification, channel):
+    return NotificationDelivery.query.filter_by(notification_id=notification.id, channel=channel).one()
 
-@patch('app.services.notification_service.twilio_client')
-def test_send_sms_notification_success(mock_twilio, notification_service, test_notification):
+def test_send_sms_notification_success(app, test_user, notification_service, test_notification, local_providers):
     """Test successful SMS notification sending."""
-    # Mock Twilio client
-    mock_message = MagicMock()
-    mock_message.sid = 'test_sid'
-    mock_twilio.messages.create.return_value = mock_message
-    
-    # Send notification
-    success = notification_service.send_sms_notification(test_notification)
-    
-    assert success is True
-    assert test_notification.status == 'sent'
-    assert test_notification.sent_at is not None
-    mock_twilio.messages.create.assert_called_once()
-
-@patch('app.services.notification_service.twilio_client')
-def test_send_sms_notification_failure(mock_twilio, notification_service, test_notification):
+    with app.app_context():
+        User.query.filter_by(id=test_user.id).update({'sms_notifications': True, 'phone_number': '+15551234567'})
+        db.session.commit()
+        
+        success = notification_service.send_sms_notification(test_notification)
+        
+        assert success is True
+        delivery = _delivery(test_notification, 'sms')
+        assert delivery.status == 'sent'
+        assert delivery.sent_at is not None
+        assert [message.recipient for message in LocalSmsProvider.outbox] == ['+15551234567']
+
+def test_send_sms_notification_failure(app, test_user, notification_service, test_notification,
+                                       local_providers, monkeypatch):
     """Test failed SMS notification sending."""
-    # Mock Twilio client error
-    mock_twilio.messages.create.side_effect = Exception('Twilio error')
-    
-    # Send notification
-    success = notification_service.send_sms_notification(test_notification)
-    
-    assert success is False
-    assert test_notification.status == 'failed'
-
-@patch('app.services.notification_service.mail')
-def test_send_email_notification_success(mock_mail, notification_service, test_notification):
+    monkeypatch.setattr(LocalSmsProvider, 'send_batch', _failing_batch)
+    with app.app_context():
+        User.query.filter_by(id=test_user.id).update({'sms_notifications': True, 'phone_number': '+15551234567'})
+        db.session.commit()
+        
+        success = notification_service.send_sms_notification(test_notification)
+        
+        assert success is False
+        delivery = _delivery(test_notification, 'sms')
+        assert delivery.status == 'failed'
+        assert delivery.last_error == 'Provider error'
+
+def test_send_email_notification_success(app, test_user, notification_service, test_notification, local_providers):
     """Test successful email notification sending."""
-    # Mock mail send
-    mock_mail.send.return_value = True
-    
-    # Send notification
-    success = notification_service.send_email_notification(test_notification)
-    
-    assert success is True
-    assert test_notification.status == 'sent'
-    assert test_notification.sent_at is not None
-    mock_mail.send.assert_called_once()
-
-@patch('app.services.notification_service.mail')
-def test_send_email_notification_failure(mock_mail, notification_service, test_notification):
+    with app.app_context():
+        success = notification_service.send_email_notification(test_notification)
+        
+        assert success is True
+        delivery = _delivery(test_notification, 'email')
+        assert delivery.status == 'sent'
+        assert delivery.sent_at is not None
+        assert [message.recipient for message in LocalEmailProvider.outbox] == [test_user.email]
+
+def test_send_email_notification_failure(app, notification_service, test_notification, local_providers, monkeypatch):
     """Test failed email notification sending."""
-    # Mock mail send error
-    mock_mail.send.side_effect = Exception('Mail error')
-    
-    # Send notification
-    success = notification_service.send_email_notification(test_notification)
-    
-    assert success is False
-    assert test_notification.status == 'failed'
+    monkeypatch.setattr(LocalEmailProvider, 'send_batch', _failing_batch)
+    with app.app_context():
+        success = notification_service.send_email_notification(test_notification)
+        
+        assert success is False
+        assert _delivery(test_notification, 'email').status == 'failed'
+        assert not LocalEmailProvider.outbox
 
 def test_get_user_notifications(app, test_user, notification_service):
     """Test retrieving user notifications."""
@@ -154,4 +359,11 @@ def test_mark_notification_read_invalid(app, notification_service):
     """Test marking invalid notification as read."""
     with app.app_context():
         success = notification_service.mark_notification_read(999, 999)
-        assert success is False 
\ No newline at end of file
+        assert success is False 
+def test_runner_refuses_to_fork_beside_the_scheduler(app, monkeypatch):
+    """Test the process pool is not forked from a process running scheduler threads."""
+    from app.services.notification_runner import NotificationRunner
+    monkeypatch.setattr('app.services.notification_runner.scheduler', MagicMock(running=True))
+    with app.app_context():
+        with pytest.raises(RuntimeError):
+            NotificationRunner().run(shard_count=2, processes=2)
@@ -135,4 +135,16 @@ def test_process_image_multiple_dates(ocr_service, sample_image_path):
             
             assert result is not None
             assert 'expiry_date' in result
-            assert result['expiry_date'] == "31/12/2024"  # Should use the first valid date 
\ No newline at end of file
+            assert result['expiry_date'] == "31/12/2024"  # Should use the first valid date 
+
+def test_reader_loaded_once_on_first_use(monkeypatch):
+    """Test the model is not loaded by the constructor and is shared afterwards."""
+    loaded = []
+    monkeypatch.setattr(OCRService, '_reader', None)
+    monkeypatch.setattr('app.services.ocr_service.easyocr.Reader', lambda langs: loaded.append(langs) or object())
+    
+    first, second = OCRService(), OCRService()
+    assert loaded == []
+    
+    assert first.reader is second.reader
+    assert loaded == [['en']]
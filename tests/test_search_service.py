@@ -0,0 +1,79 @@
+import pytest
+from unittest.mock import patch
+from app.core.extensions import db
+from app.models.item import Item
+from app.services.search_service import SearchService
+
+@pytest.fixture
+def search_service():
+    """Create a search service instance."""
+    return SearchService()
+
+def _search(search_service, user_id, term):
+    query = Item.query.filter_by(user_id=user_id)
+    return [item.name for item in search_service.apply_search(query, term).all()]
+
+def test_search_prefix_match(app, test_user, search_service):
+    """Test every search word is matched as a prefix."""
+    with app.app_context():
+        Item(name='Greek Yogurt', description='Plain', unit='cups', user_id=test_user.id).save()
+        Item(name='Milk', description='Semi skimmed', unit='litres', user_id=test_user.id).save()
+        
+        assert _search(search_service, test_user.id, 'yog') == ['Greek Yogurt']
+        assert _search(search_service, test_user.id, 'semi ski') == ['Milk']
+        assert _search(search_service, test_user.id, 'lit') == ['Milk']
+        assert _search(search_service, test_user.id, 'cheese') == []
+
+def test_search_ranks_name_matches_first(app, test_user, search_service):
+    """Test name matches rank above description matches."""
+    with app.app_context():
+        Item(name='Bread', description='Goes well with butter', user_id=test_user.id).save()
+        Item(name='Butter', description='Salted', user_id=test_user.id).save()
+        
+        assert _search(search_service, test_user.id, 'butter') == ['Butter', 'Bread']
+
+def test_search_index_follows_writes(app, test_user, search_service):
+    """Test updates and deletes are reflected in search results."""
+    with app.app_context():
+        item = Item(name='Apple Juice', user_id=test_user.id)
+        item.save()
+        
+        item.name = 'Orange Juice'
+        item.save()
+        assert _search(search_service, test_user.id, 'apple') == []
+        assert _search(search_service, test_user.id, 'orange') == ['Orange Juice']
+        
+        item.delete()
+        assert _search(search_service, test_user.id, 'juice') == []
+
+def test_search_scoped_to_query(app, test_user, search_service):
+    """Test search only returns rows from the base query."""
+    with app.app_context():
+        from app.models.user import User
+        other = User(username='other', email='other@example.com')
+        other.set_password('password123')
+        other.save()
+        Item(name='Cheddar', user_id=other.id).save()
+        Item(name='Cheddar', user_id=test_user.id).save()
+        
+        results = search_service.apply_search(Item.query.filter_by(user_id=test_user.id), 'ched').all()
+        assert [item.user_id for item in results] == [test_user.id]
+
+def test_search_blank_term(app, test_user, search_service):
+    """Test a blank term leaves the query untouched."""
+    with app.app_context():
+        Item(name='Eggs', user_id=test_user.id).save()
+        
+        assert _search(search_service, test_user.id, '   ') == ['Eggs']
+
+def test_fts_table_check_is_cached(app, test_user, search_service):
+    """Test the schema is inspected once rather than on every search."""
+    with app.app_context():
+        Item(name='Eggs', user_id=test_user.id).save()
+        _search(search_service, test_user.id, 'egg')
+        
+        with patch('app.services.search_service.inspect') as mock_inspect:
+            assert _search(search_service, test_user.id, 'egg') == ['Eggs']
+            assert _search(search_service, test_user.id, 'eg') == ['Eggs']
+        
+        mock_inspect.assert_not_called()